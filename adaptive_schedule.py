@@ -0,0 +1,153 @@
+"""
+Адаптивное расписание проверок новых статей по истории публикаций
+"""
+
+import logging
+import math
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+import schedule
+
+import bot_config
+import db
+
+HOURS_PER_WEEK = 7 * 24
+
+
+class AdaptivePollScheduler:
+    """
+    Расписание опросов, обученное на распределении публикаций по часам недели
+
+    Бюджет опросов в неделю распределяется по 168 часам недели пропорционально
+    корню из вероятности публикации в этот час - такое распределение минимизирует
+    среднюю задержку обнаружения при фиксированном числе запросов. Каждый час
+    получает минимальную частоту (не реже max_interval), но не чаще min_interval.
+    """
+
+    def __init__(self, db_path=None, polls_per_week=None, min_interval_minutes=None,
+                 max_interval_hours=None, history_days=56, relearn_hours=6):
+        """
+        Args:
+            db_path: Путь к базе данных статей (по умолчанию bot_config.DB_PATH)
+            polls_per_week: Бюджет запросов в неделю
+            min_interval_minutes: Минимальный интервал между опросами
+            max_interval_hours: Максимальный интервал между опросами
+            history_days: Глубина истории для обучения
+            relearn_hours: Как часто пересчитывать распределение
+        """
+        self.db_path = db_path
+        self.polls_per_week = polls_per_week or bot_config.POLL_BUDGET_PER_WEEK
+        self.min_interval_minutes = min_interval_minutes or bot_config.POLL_MIN_INTERVAL_MINUTES
+        self.max_interval_hours = max_interval_hours or bot_config.POLL_MAX_INTERVAL_HOURS
+        self.history_days = history_days
+        self.relearn_hours = relearn_hours
+        self.rates = [self.polls_per_week / HOURS_PER_WEEK] * HOURS_PER_WEEK  # опросов в час
+        self.learned_at = None
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def hour_of_week(moment):
+        return moment.weekday() * 24 + moment.hour
+
+    def load_history(self):
+        """
+        Моменты публикаций (UTC) за последние history_days дней
+
+        Точное время публикации (date_posted из ленты или REST API) предпочтительнее
+        времени обнаружения created_at, которое округлено до момента опроса.
+        """
+        database = db.get_database(self.db_path)
+        try:
+            # Читающее соединение потока расписания: не ждет записи других потоков
+            cursor = database.reader().execute('''
+                SELECT CASE
+                    WHEN date_posted GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9]:[0-9][0-9]:[0-9][0-9]'
+                    THEN date_posted ELSE created_at END AS posted
+                FROM articles
+                WHERE created_at >= datetime('now', ?)
+            ''', (f'-{self.history_days} days',))
+            moments = []
+            for (value,) in cursor.fetchall():
+                try:
+                    moments.append(datetime.strptime(value[:19], '%Y-%m-%d %H:%M:%S'))
+                except (TypeError, ValueError):
+                    continue
+            return moments
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при загрузке истории публикаций: {e}")
+            return []
+        finally:
+            database.close()
+
+    def learn(self):
+        """Пересчет частоты опросов для каждого часа недели"""
+        counts = [1.0] * HOURS_PER_WEEK  # Сглаживание Лапласа: у каждого часа ненулевая вероятность
+        for moment in self.load_history():
+            counts[self.hour_of_week(moment)] += 1
+        total = sum(counts)
+        weights = [math.sqrt(c / total) for c in counts]
+
+        floor_rate = 1.0 / self.max_interval_hours
+        ceiling_rate = 60.0 / self.min_interval_minutes
+        spare_budget = max(0.0, self.polls_per_week - floor_rate * HOURS_PER_WEEK)
+        weight_sum = sum(weights)
+        self.rates = [
+            min(ceiling_rate, floor_rate + spare_budget * w / weight_sum)
+            for w in weights
+        ]
+        self.learned_at = time.monotonic()
+        self.logger.info(
+            f"Расписание обновлено: {total - HOURS_PER_WEEK:.0f} публикаций в истории, "
+            f"от {min(self.rates):.2f} до {max(self.rates):.2f} опросов в час"
+        )
+
+    def seconds_until_next_poll(self, now=None):
+        """
+        Время до следующего опроса
+
+        Интенсивность опросов rate(t) интегрируется от текущего момента,
+        пока не наберется один опрос.
+        """
+        if self.learned_at is None or time.monotonic() - self.learned_at > self.relearn_hours * 3600:
+            self.learn()
+
+        now = now or datetime.utcnow()
+        moment = now
+        needed = 1.0
+        for _ in range(HOURS_PER_WEEK + 1):
+            rate = self.rates[self.hour_of_week(moment)]
+            hour_end = moment.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+            span_hours = (hour_end - moment).total_seconds() / 3600
+            if rate * span_hours >= needed:
+                moment += timedelta(hours=needed / rate)
+                break
+            needed -= rate * span_hours
+            moment = hour_end
+
+        seconds = (moment - now).total_seconds()
+        return max(self.min_interval_minutes * 60, min(seconds, self.max_interval_hours * 3600))
+
+
+def schedule_adaptive(poll_scheduler, job, scheduler=schedule):
+    """
+    Планирование job в библиотеке schedule с адаптивным интервалом
+
+    После каждого запуска задача переназначается на следующий момент опроса.
+    """
+    logger = logging.getLogger(__name__)
+
+    def plan_next():
+        seconds = int(poll_scheduler.seconds_until_next_poll())
+        logger.info(f"Следующая проверка через {seconds // 60} мин")
+        scheduler.every(seconds).seconds.do(run_and_reschedule)
+
+    def run_and_reschedule():
+        try:
+            job()
+        finally:
+            plan_next()
+        return schedule.CancelJob
+
+    plan_next()
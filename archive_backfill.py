@@ -0,0 +1,190 @@
+"""
+Загрузка архива статей Naked Capitalism (постраничный обход с возобновлением)
+"""
+
+import argparse
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+
+from article_monitor import NakedCapitalismMonitor
+
+
+class ArchiveBackfill:
+    """Параллельный обход архива с ограничением частоты запросов и курсором возобновления"""
+
+    def __init__(self, monitor: NakedCapitalismMonitor, workers: int = 4,
+                 min_interval: float = 1.0, retries: int = 3):
+        """
+        Args:
+            monitor: Монитор, задающий способ обнаружения статей и базу данных
+            workers: Число параллельно загружаемых страниц
+            min_interval: Минимальный интервал между запросами к сайту (секунды, на все потоки)
+            retries: Число попыток загрузки одной страницы
+        """
+        self.monitor = monitor
+        self.db = monitor.db
+        self.workers = max(1, workers)
+        self.min_interval = min_interval
+        self.retries = retries
+        self.name = monitor.discovery_backend
+        self.logger = logging.getLogger(__name__)
+
+        self._throttle_lock = threading.Lock()
+        self._next_request_at = 0.0
+
+        self.setup_database()
+
+    def setup_database(self):
+        """Таблица курсора возобновления"""
+        with self.db.write() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS backfill_state (
+                    name TEXT PRIMARY KEY,
+                    next_page INTEGER NOT NULL,
+                    finished INTEGER DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+    def load_cursor(self):
+        """Получение (next_page, finished) для текущего способа обнаружения"""
+        row = self.db.reader().execute('SELECT next_page, finished FROM backfill_state WHERE name = ?',
+                                       (self.name,)).fetchone()
+        return (row[0], bool(row[1])) if row else (1, False)
+
+    def save_cursor(self, next_page, finished=False):
+        """Сохранение курсора (внутри блока db.write - вместе со статьями)"""
+        with self.db.write() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO backfill_state (name, next_page, finished, updated_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ''', (self.name, next_page, int(finished)))
+
+    def reset(self):
+        """Сброс курсора - следующий запуск начнется с первой страницы"""
+        with self.db.write() as conn:
+            conn.execute('DELETE FROM backfill_state WHERE name = ?', (self.name,))
+
+    def throttle(self):
+        """Ожидание очереди на запрос (общий лимит частоты для всех потоков)"""
+        with self._throttle_lock:
+            now = time.monotonic()
+            wait_for = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + self.min_interval
+        if wait_for > 0:
+            time.sleep(wait_for)
+
+    def fetch_page(self, page):
+        """Загрузка одной страницы архива с повторами"""
+        for attempt in range(1, self.retries + 1):
+            self.throttle()
+            try:
+                return self.monitor.fetch_archive_page(page)
+            except requests.RequestException as e:
+                if attempt == self.retries:
+                    raise
+                self.logger.warning(f"Страница {page}: ошибка ({e}), повтор {attempt}/{self.retries - 1}")
+                time.sleep(self.min_interval * 2 ** attempt)
+
+    def run(self, max_pages=None):
+        """
+        Обход архива с сохраненного курсора
+
+        Args:
+            max_pages: Максимальное число страниц за запуск (None - до конца архива)
+
+        Returns:
+            Количество добавленных статей
+        """
+        start_page, finished = self.load_cursor()
+        if finished:
+            self.logger.info("Архив уже полностью загружен (используйте --reset для повторной загрузки)")
+            return 0
+
+        last_page = start_page + max_pages - 1 if max_pages else None
+        self.logger.info(f"Загрузка архива со страницы {start_page}, потоков: {self.workers}")
+
+        cursor_page = start_page   # Первая еще не сохраненная страница
+        next_to_submit = start_page
+        end_page = None            # Первая пустая страница (конец архива)
+        failed = False
+        completed = {}
+        pending = {}
+        inserted = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                while (not failed and len(pending) < self.workers
+                       and (end_page is None or next_to_submit < end_page)
+                       and (last_page is None or next_to_submit <= last_page)):
+                    pending[executor.submit(self.fetch_page, next_to_submit)] = next_to_submit
+                    next_to_submit += 1
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page = pending.pop(future)
+                    try:
+                        articles = future.result()
+                    except Exception as e:
+                        self.logger.error(f"Не удалось загрузить страницу {page}: {e}")
+                        failed = True
+                        continue
+                    completed[page] = articles
+                    if not articles and (end_page is None or page < end_page):
+                        end_page = page
+
+                # Сохраняем только непрерывный префикс страниц, чтобы курсор был точным
+                batch = []
+                while cursor_page in completed and (end_page is None or cursor_page < end_page):
+                    batch.extend(completed.pop(cursor_page))
+                    cursor_page += 1
+                if batch:
+                    # Статьи и курсор фиксируются одной транзакцией
+                    with self.db.write():
+                        inserted += self.monitor.save_articles_bulk(batch)
+                        self.save_cursor(cursor_page)
+                    self.logger.info(f"Сохранено до страницы {cursor_page - 1}, добавлено статей: {inserted}")
+
+        if end_page is not None and cursor_page >= end_page:
+            self.save_cursor(cursor_page, finished=True)
+            self.logger.info("Достигнут конец архива")
+
+        self.logger.info(f"Загрузка архива завершена: добавлено {inserted} статей")
+        return inserted
+
+
+def main():
+    """Запуск загрузки архива из командной строки"""
+    parser = argparse.ArgumentParser(description="Загрузка архива статей Naked Capitalism")
+    parser.add_argument('--backend', choices=['html', 'feed', 'rest'], default=None,
+                        help="Способ обнаружения статей (по умолчанию из bot_config.py)")
+    parser.add_argument('--workers', type=int, default=4, help="Число параллельных загрузок")
+    parser.add_argument('--delay', type=float, default=1.0,
+                        help="Минимальный интервал между запросами, сек")
+    parser.add_argument('--max-pages', type=int, default=None, help="Максимум страниц за запуск")
+    parser.add_argument('--reset', action='store_true', help="Начать с первой страницы")
+    args = parser.parse_args()
+
+    monitor = NakedCapitalismMonitor(discovery_backend=args.backend)
+    backfill = ArchiveBackfill(monitor, workers=args.workers, min_interval=args.delay)
+    if args.reset:
+        backfill.reset()
+
+    try:
+        inserted = backfill.run(max_pages=args.max_pages)
+        print(f"✅ Добавлено статей: {inserted}")
+    except KeyboardInterrupt:
+        print("\n⏸️ Остановлено - следующий запуск продолжит с сохраненной страницы")
+    finally:
+        monitor.db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,23 +2,155 @@
 Мониторинг новых статей с сайта Naked Capitalism
 """
 
+import asyncio
+import codecs
 import requests
+import aiohttp
 import time
 import json
 import logging
-from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+import xml.etree.ElementTree as ET
+from html.parser import HTMLParser
 from urllib.parse import urljoin
 import sqlite3
 import hashlib
+import html
+import async_http
+import db
+import html_parsing
+import bot_config
+import http_transport
+
+# Поддерживаемые способы обнаружения новых статей
+DISCOVERY_BACKENDS = ('html', 'feed', 'rest')
+
+# Поля записи WordPress REST API, которые нужны для таблицы articles
+REST_FIELDS = 'id,guid,date_gmt,link,title,author'
+REST_PER_PAGE = 100
+# Максимальное смещение часового пояса сайта - запас для курсора, если смещение неизвестно
+REST_CURSOR_FALLBACK_OVERLAP = timedelta(hours=14)
+
+# Размер фрагмента при потоковом чтении главной страницы
+STREAM_CHUNK_SIZE = 8192
+# Ссылки с такими словами в тексте - не статьи
+SKIP_LINK_WORDS = ['comment', 'comments', 'older entries', '←', 'topics:', 'posted by']
+
+# Разметка записей WordPress на главной странице
+POST_CONTAINER_CLASSES = {'post', 'hentry', 'type-post'}
+POST_HEADING_TAGS = {'h1', 'h2', 'h3'}
+POST_AUTHOR_CLASSES = {'author', 'byline-author'}
+# Закрепленная запись WordPress показывается первой независимо от даты
+POST_STICKY_CLASS = 'sticky'
+# Сколько заголовков уже сохраненных статей подряд останавливают чтение главной страницы
+KNOWN_HEADINGS_TO_STOP = 3
+
+
+class KnownArticleScanner(HTMLParser):
+    """
+    Инкрементальный поиск заголовков записей в потоке HTML главной страницы
+    
+    Главная страница перечисляет записи от новых к старым, поэтому несколько
+    подряд заголовков уже сохраненных статей означают, что дальше читать не нужно.
+    Учитываются только ссылки заголовков записей (как в post_block_to_article):
+    ссылки в тексте анонсов и закрепленные записи (sticky) чтение не останавливают.
+    """
+    
+    def __init__(self, monitor, encoding=None):
+        super().__init__(convert_charrefs=True)
+        self.monitor = monitor
+        self.decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+        self.in_content = False
+        # Текущий блок записи: тег, глубина вложенности одноименных тегов, закреплена ли запись
+        self.post_tag = None
+        self.post_depth = 0
+        self.post_sticky = False
+        self.heading_tag = None
+        self.heading_seen = False
+        self.href = None
+        self.known_in_row = 0
+        self.found_known = False
+    
+    def feed_bytes(self, chunk):
+        """Обработка очередного фрагмента; True, если встречено достаточно известных статей подряд"""
+        self.feed(self.decoder.decode(chunk))
+        return self.found_known
+    
+    def complete_prefix(self, data):
+        """
+        Прочитанные байты без незавершенного многобайтового символа в конце
+        
+        Иначе парсер, определяющий кодировку по байтам, не распознает
+        обрезанный UTF-8 и перейдет на windows-1252.
+        """
+        pending = self.decoder.getstate()[0]
+        return data[:len(data) - len(pending)] if pending else data
+    
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get('class') or '').split()
+        # Как и parse_articles, учитываем только записи внутри #content или main
+        if not self.in_content and (attrs.get('id') == 'content' or tag == 'main'):
+            self.in_content = True
+        if not self.in_content:
+            return
+        
+        if self.post_tag is None:
+            if tag == 'article' or POST_CONTAINER_CLASSES.intersection(classes):
+                self.post_tag = tag
+                self.post_depth = 1
+                self.post_sticky = POST_STICKY_CLASS in classes
+                self.heading_seen = False
+            return
+        if tag == self.post_tag:
+            self.post_depth += 1
+        
+        if self.heading_tag is None and not self.heading_seen:
+            if tag in POST_HEADING_TAGS or 'entry-title' in classes:
+                self.heading_tag = tag
+        elif self.heading_tag is not None and tag == 'a' and attrs.get('href') and self.href is None:
+            self.href = attrs['href']
+    
+    def handle_endtag(self, tag):
+        if self.post_tag is None:
+            return
+        if tag == 'a' and self.href is not None:
+            self.handle_post_link(self.href)
+            self.href = None
+        if tag == self.heading_tag:
+            # Как и post_block_to_article, берется только первый заголовок записи
+            self.heading_tag = None
+            self.heading_seen = True
+        if tag == self.post_tag:
+            self.post_depth -= 1
+            if not self.post_depth:
+                self.post_tag = self.heading_tag = self.href = None
+    
+    def handle_post_link(self, href):
+        """Учет ссылки заголовка записи: подряд известные статьи останавливают чтение"""
+        self.heading_seen = True
+        if self.post_sticky or self.found_known:
+            return
+        if self.monitor.is_known_article(urljoin(self.monitor.base_url, href)):
+            self.known_in_row += 1
+            self.found_known = self.known_in_row >= KNOWN_HEADINGS_TO_STOP
+        else:
+            self.known_in_row = 0
+
 
 class NakedCapitalismMonitor:
-    def __init__(self):
+    def __init__(self, discovery_backend=None, transport=None, database=None):
         self.base_url = "https://www.nakedcapitalism.com/"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.feed_url = urljoin(self.base_url, "feed/")
+        self.rest_url = urljoin(self.base_url, "wp-json/")
+        self.rest_authors = {}  # Кэш имен авторов по ID пользователя WordPress
+        self.rest_gmt_offset = None
+        self.discovery_backend = discovery_backend or bot_config.DISCOVERY_BACKEND
+        if self.discovery_backend not in DISCOVERY_BACKENDS:
+            raise ValueError(f"Неизвестный способ обнаружения статей: {self.discovery_backend}")
+        self.session = transport or http_transport.get_transport()
+        self.db = database or db.get_database()
         self.setup_database()
         self.setup_logging()
     
@@ -36,68 +168,386 @@ class NakedCapitalismMonitor:
     
     def setup_database(self):
         """Создание базы данных для хранения статей"""
-        self.conn = sqlite3.connect('articles.db')
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS articles (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                url TEXT UNIQUE NOT NULL,
-                author TEXT,
-                date_posted TEXT,
-                content_hash TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        self.conn.commit()
+        with self.db.write() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS articles (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT NOT NULL,
+                    url TEXT UNIQUE NOT NULL,
+                    author TEXT,
+                    date_posted TEXT,
+                    content_hash TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            # Валидаторы последнего ответа (ETag / Last-Modified) для условных запросов
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS poll_state (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # GUID записи из RSS/Atom ленты
+            columns = [column[1] for column in conn.execute("PRAGMA table_info(articles)")]
+            if 'guid' not in columns:
+                conn.execute('ALTER TABLE articles ADD COLUMN guid TEXT')
     
     def get_page_content(self, url):
-        """Получение содержимого страницы"""
+        """Получение содержимого страницы (байты - кодировку определяет парсер)"""
         try:
-            response = self.session.get(url, timeout=30)
+            response = self.session.get(url)
             response.raise_for_status()
-            return response.text
+            return response.content
+        except requests.RequestException as e:
+            self.logger.error(f"Ошибка при получении страницы {url}: {e}")
+            return None
+    
+    def get_poll_state(self, url):
+        """Получение сохраненных валидаторов (etag, last_modified) для URL"""
+        cursor = self.db.reader().execute('SELECT etag, last_modified FROM poll_state WHERE url = ?', (url,))
+        return cursor.fetchone() or (None, None)
+    
+    def save_poll_state(self, url, headers):
+        """Сохранение валидаторов из заголовков ответа"""
+        with self.db.write() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO poll_state (url, etag, last_modified, checked_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ''', (url, headers.get('ETag'), headers.get('Last-Modified')))
+    
+    def get_conditional_headers(self, url):
+        """Заголовки условного запроса по сохраненным валидаторам"""
+        etag, last_modified = self.get_poll_state(url)
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+    
+    def get_page_if_modified(self, url, stream=False):
+        """
+        Условный GET-запрос страницы
+        
+        Args:
+            url: URL страницы
+            stream: Не загружать тело ответа сразу (для потокового разбора)
+        
+        Returns:
+            Объект ответа (status_code 304, если страница не изменилась) или None при ошибке
+        """
+        try:
+            response = self.session.get(url, headers=self.get_conditional_headers(url), stream=stream)
+            response.raise_for_status()  # 304 не считается ошибкой
+            return response
         except requests.RequestException as e:
             self.logger.error(f"Ошибка при получении страницы {url}: {e}")
             return None
     
     def parse_articles(self, html_content):
         """Парсинг статей с главной страницы"""
-        soup = BeautifulSoup(html_content, 'html.parser')
-        articles = []
+        soup = html_parsing.make_soup(html_content)
         
         # Поиск статей в разделе "Recent Items"
         recent_items = soup.find('div', {'id': 'content'}) or soup.find('main')
-        if recent_items:
-            # Поиск заголовков статей
-            article_links = recent_items.find_all('a', href=True)
+        if not recent_items:
+            return []
+        # Если разметка записей не распознана - поиск по ссылкам
+        return self.extract_post_blocks(recent_items) or self.extract_article_links(recent_items)
+    
+    def extract_post_blocks(self, root):
+        """
+        Извлечение статей из блоков записей WordPress за один обход дерева
+        
+        Каждый блок (article, .post, .hentry) обходится один раз: из него берутся
+        ссылка заголовка, автор и время публикации. Одна запись на статью.
+        """
+        articles = []
+        seen_urls = set()
+        
+        def walk(node):
+            for child in node.children:
+                if child.name is None:
+                    continue
+                if child.name == 'article' or POST_CONTAINER_CLASSES.intersection(child.get('class') or ()):
+                    article = self.post_block_to_article(child)
+                    if article and article['url'] not in seen_urls:
+                        seen_urls.add(article['url'])
+                        articles.append(article)
+                else:
+                    walk(child)
+        
+        walk(root)
+        return articles
+    
+    def post_block_to_article(self, block):
+        """Преобразование блока записи в словарь статьи; None, если в блоке нет заголовка со ссылкой"""
+        heading = link = author = time_elem = None
+        for elem in block.descendants:
+            if elem.name is None:
+                continue
+            classes = elem.get('class') or ()
+            if heading is None and (elem.name in POST_HEADING_TAGS or 'entry-title' in classes):
+                heading = elem
+            elif (link is None and heading is not None and elem.name == 'a' and elem.get('href')
+                    and any(parent is heading for parent in elem.parents)):
+                link = elem
+            elif author is None and (elem.get('rel') == ['author'] or POST_AUTHOR_CLASSES.intersection(classes)):
+                author = elem
+            elif time_elem is None and elem.name == 'time':
+                time_elem = elem
+            if link is not None and author is not None and time_elem is not None:
+                break
+        
+        if link is None:
+            return None
+        title = link.get_text(strip=True)
+        if not title:
+            return None
+        
+        if time_elem is not None and time_elem.get('datetime'):
+            date_posted = self.normalize_feed_date(time_elem['datetime'])
+        elif time_elem is not None:
+            date_posted = time_elem.get_text(strip=True)
+        else:
+            date_posted = datetime.now().strftime('%Y-%m-%d')
+        
+        return {
+            'title': title,
+            'url': urljoin(self.base_url, link['href']),
+            'author': author.get_text(strip=True) if author is not None else "Unknown",
+            'date_posted': date_posted,
+            'content_hash': hashlib.md5(title.encode()).hexdigest()
+        }
+    
+    def extract_article_links(self, root):
+        """Поиск статей по ссылкам (если блоки записей не найдены)"""
+        articles = []
+        
+        # Поиск заголовков статей
+        article_links = root.find_all('a', href=True)
+        
+        for link in article_links:
+            href = link.get('href')
+            title = link.get_text(strip=True)
             
-            for link in article_links:
-                href = link.get('href')
-                title = link.get_text(strip=True)
+            # Фильтрация только статей (не навигационных ссылок)
+            if self.is_article_link(href, title):
                 
-                # Фильтрация только статей (не навигационных ссылок)
-                if (href and title and 
-                    len(title) > 15 and 
+                full_url = urljoin(self.base_url, href)
+                
+                # Попытка найти автора и дату
+                author = self.extract_author(link)
+                date_posted = self.extract_date(link)
+                
+                articles.append({
+                    'title': title,
+                    'url': full_url,
+                    'author': author,
+                    'date_posted': date_posted,
+                    'content_hash': hashlib.md5(title.encode()).hexdigest()
+                })
+        
+        return articles
+    
+    def is_article_link(self, href, title):
+        """Похожа ли ссылка на ссылку на статью (а не на навигацию)"""
+        return bool(href and title and
+                    len(title) > 15 and
                     not href.startswith('#') and
                     'nakedcapitalism.com' in href and
-                    not any(skip in title.lower() for skip in ['comment', 'comments', 'older entries', '←', 'topics:', 'posted by'])):
-                    
-                    full_url = urljoin(self.base_url, href)
-                    
-                    # Попытка найти автора и дату
-                    author = self.extract_author(link)
-                    date_posted = self.extract_date(link)
-                    
-                    articles.append({
-                        'title': title,
-                        'url': full_url,
-                        'author': author,
-                        'date_posted': date_posted,
-                        'content_hash': hashlib.md5(title.encode()).hexdigest()
-                    })
+                    not any(skip in title.lower() for skip in SKIP_LINK_WORDS))
+    
+    def is_known_article(self, url):
+        """Есть ли статья с таким URL в базе данных"""
+        cursor = self.db.reader().execute('SELECT 1 FROM articles WHERE url = ?', (url,))
+        return cursor.fetchone() is not None
+    
+    def read_until_known_article(self, chunks, encoding=None):
+        """
+        Потоковое чтение главной страницы до KNOWN_HEADINGS_TO_STOP известных статей подряд
         
-        return articles
+        Returns:
+            Кортеж (прочитанные байты, остановлено ли чтение досрочно)
+        """
+        scanner = KnownArticleScanner(self, encoding)
+        received = []
+        for chunk in chunks:
+            received.append(chunk)
+            if scanner.feed_bytes(chunk):
+                return scanner.complete_prefix(b''.join(received)), True
+        return b''.join(received), False
+    
+    def parse_feed(self, chunks):
+        """
+        Потоковый разбор RSS/Atom ленты WordPress
+        
+        Args:
+            chunks: Итерируемый источник байтовых фрагментов ленты
+        
+        Yields:
+            Словари статей в том же формате, что и parse_articles, плюс guid
+        """
+        parser = ET.XMLPullParser(events=('end',))
+        for chunk in chunks:
+            parser.feed(chunk)
+            for _, elem in parser.read_events():
+                if elem.tag.rsplit('}', 1)[-1] in ('item', 'entry'):
+                    article = self.feed_entry_to_article(elem)
+                    elem.clear()  # Освобождаем память уже разобранной записи
+                    if article:
+                        yield article
+        parser.close()
+    
+    def feed_entry_to_article(self, elem):
+        """Преобразование элемента item (RSS) или entry (Atom) в словарь статьи"""
+        fields = {}
+        for child in elem:
+            name = child.tag.rsplit('}', 1)[-1]
+            if name == 'link' and child.get('href'):
+                # Atom: <link rel="alternate" href="..."/>
+                if child.get('rel', 'alternate') == 'alternate':
+                    fields['link'] = child.get('href')
+            elif name == 'author':
+                # Atom: <author><name>...</name></author>, RSS: <author>email</author>
+                author_name = next((c.text for c in child if c.tag.rsplit('}', 1)[-1] == 'name'), None)
+                fields.setdefault('creator', author_name or child.text)
+            else:
+                fields.setdefault(name, (child.text or '').strip())
+        
+        title = fields.get('title')
+        url = fields.get('link')
+        if not title or not url:
+            return None
+        
+        return {
+            'title': title,
+            'url': url,
+            'author': fields.get('creator') or "Unknown",
+            'date_posted': self.normalize_feed_date(
+                fields.get('pubDate') or fields.get('published') or fields.get('updated')
+            ),
+            'content_hash': hashlib.md5(title.encode()).hexdigest(),
+            'guid': fields.get('guid') or fields.get('id') or url
+        }
+    
+    def normalize_feed_date(self, value):
+        """Приведение даты из ленты (RFC 822 или ISO 8601) к виду 'YYYY-MM-DD HH:MM:SS' в UTC"""
+        if value:
+            try:
+                if value[:4].isdigit():
+                    parsed = datetime.fromisoformat(value)
+                else:
+                    parsed = parsedate_to_datetime(value)
+                if parsed.tzinfo:
+                    parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+                return parsed.strftime('%Y-%m-%d %H:%M:%S')
+            except (TypeError, ValueError):
+                pass
+        return datetime.now().strftime('%Y-%m-%d')
+    
+    def get_rest_cursor(self):
+        """Дата (UTC) самой новой сохраненной статьи с точным временем публикации"""
+        cursor = self.db.reader().execute('''
+            SELECT MAX(date_posted) FROM articles
+            WHERE date_posted GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9]:[0-9][0-9]:[0-9][0-9]'
+        ''')
+        newest = cursor.fetchone()[0]
+        return datetime.strptime(newest, '%Y-%m-%d %H:%M:%S') if newest else None
+    
+    def get_rest_json(self, route, params=None):
+        """GET-запрос к WordPress REST API, возвращает (данные, заголовки)"""
+        response = self.session.get(urljoin(self.rest_url, route), params=params)
+        response.raise_for_status()
+        return response.json(), response.headers
+    
+    def get_rest_after_param(self, newest):
+        """
+        Значение параметра after= для курсора
+        
+        WordPress сравнивает after= с локальным временем публикации (post_date),
+        поэтому UTC-курсор переводится в часовой пояс сайта.
+        """
+        if self.rest_gmt_offset is None:
+            try:
+                data, _ = self.get_rest_json('', {'_fields': 'gmt_offset'})
+                self.rest_gmt_offset = float(data['gmt_offset'])
+            except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+                self.logger.warning(f"Не удалось получить часовой пояс сайта: {e}")
+        
+        if self.rest_gmt_offset is None:
+            after = newest - REST_CURSOR_FALLBACK_OVERLAP
+        else:
+            # Час запаса на случай перехода на летнее/зимнее время
+            after = newest + timedelta(hours=self.rest_gmt_offset - 1)
+        return after.strftime('%Y-%m-%dT%H:%M:%S')
+    
+    def fetch_rest_articles(self, newest=None):
+        """
+        Получение статей через WordPress REST API (/wp-json/wp/v2/posts)
+        
+        Args:
+            newest: Дата (UTC) самой новой сохраненной статьи; если None - загружается
+                    только первая страница последних записей
+        
+        Returns:
+            Список словарей статей
+        """
+        params = {
+            '_fields': REST_FIELDS,
+            'per_page': REST_PER_PAGE,
+            'orderby': 'date',
+            'order': 'desc',
+        }
+        if newest:
+            params['after'] = self.get_rest_after_param(newest)
+        
+        posts = []
+        page = 1
+        while True:
+            params['page'] = page
+            data, headers = self.get_rest_json('wp/v2/posts', params)
+            posts.extend(data)
+            total_pages = int(headers.get('X-WP-TotalPages', 1))
+            # Без курсора не выкачиваем весь архив - для этого есть backfill
+            if not newest or page >= total_pages or not data:
+                break
+            page += 1
+        
+        self.resolve_rest_authors({post.get('author') for post in posts})
+        return [self.rest_post_to_article(post) for post in posts if post.get('link')]
+    
+    def resolve_rest_authors(self, author_ids):
+        """Загрузка имен авторов, которых еще нет в кэше"""
+        missing = sorted(a for a in author_ids if a and a not in self.rest_authors)
+        if not missing:
+            return
+        try:
+            users, _ = self.get_rest_json('wp/v2/users', {
+                'include': ','.join(str(a) for a in missing),
+                'per_page': len(missing),
+                '_fields': 'id,name'
+            })
+            for user in users:
+                self.rest_authors[user['id']] = user['name']
+        except (requests.RequestException, ValueError, KeyError) as e:
+            self.logger.warning(f"Не удалось получить имена авторов: {e}")
+    
+    def rest_post_to_article(self, post):
+        """Преобразование записи WordPress REST API в словарь статьи"""
+        title = html.unescape((post.get('title') or {}).get('rendered', '')).strip()
+        date_gmt = post.get('date_gmt')
+        return {
+            'title': title,
+            'url': post['link'],
+            'author': self.rest_authors.get(post.get('author'), "Unknown"),
+            'date_posted': date_gmt.replace('T', ' ') if date_gmt else datetime.now().strftime('%Y-%m-%d'),
+            'content_hash': hashlib.md5(title.encode()).hexdigest(),
+            'guid': (post.get('guid') or {}).get('rendered') or str(post.get('id'))
+        }
     
     def extract_author(self, element):
         """Извлечение автора статьи"""
@@ -120,48 +570,237 @@ class NakedCapitalismMonitor:
     
     def save_articles(self, articles):
         """Сохранение статей в базу данных"""
-        cursor = self.conn.cursor()
         new_articles = []
         
-        for article in articles:
-            try:
-                cursor.execute('''
-                    INSERT OR IGNORE INTO articles (title, url, author, date_posted, content_hash)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (
-                    article['title'],
-                    article['url'],
-                    article['author'],
-                    article['date_posted'],
-                    article['content_hash']
-                ))
-                
-                if cursor.rowcount > 0:
-                    new_articles.append(article)
+        with self.db.write() as conn:
+            for article in articles:
+                try:
+                    cursor = conn.execute('''
+                        INSERT OR IGNORE INTO articles (title, url, author, date_posted, content_hash, guid)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    ''', (
+                        article['title'],
+                        article['url'],
+                        article['author'],
+                        article['date_posted'],
+                        article['content_hash'],
+                        article.get('guid')
+                    ))
                     
-            except sqlite3.Error as e:
-                self.logger.error(f"Ошибка при сохранении статьи: {e}")
+                    if cursor.rowcount > 0:
+                        new_articles.append(article)
+                        
+                except sqlite3.Error as e:
+                    self.logger.error(f"Ошибка при сохранении статьи: {e}")
         
-        self.conn.commit()
         return new_articles
     
+    def save_articles_bulk(self, articles):
+        """
+        Пакетное сохранение статей (для загрузки архива)
+        
+        created_at берется из date_posted (дата без времени - полночь этого дня),
+        чтобы исторические статьи не выглядели только что найденными в /latest,
+        /links и истории адаптивного расписания. Внутри внешнего блока db.write
+        статьи фиксируются вместе с ним.
+        
+        Returns:
+            Количество добавленных статей
+        """
+        rows = []
+        for article in articles:
+            date_posted = article['date_posted']
+            created_at = self.posted_timestamp(date_posted)
+            rows.append((
+                article['title'],
+                article['url'],
+                article['author'],
+                date_posted,
+                article['content_hash'],
+                article.get('guid'),
+                created_at
+            ))
+        
+        with self.db.write() as conn:
+            before = conn.total_changes
+            conn.executemany('''
+                INSERT OR IGNORE INTO articles (title, url, author, date_posted, content_hash, guid, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+            ''', rows)
+            return conn.total_changes - before
+    
+    def posted_timestamp(self, date_posted):
+        """Время публикации 'YYYY-MM-DD HH:MM:SS' из date_posted (для даты без времени - полночь) или None"""
+        for date_format in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
+            try:
+                return datetime.strptime(date_posted, date_format).strftime('%Y-%m-%d %H:%M:%S')
+            except (TypeError, ValueError):
+                continue
+        return None
+    
+    def fetch_archive_page(self, page):
+        """
+        Получение статей со страницы архива с номером page (без обращения к БД)
+        
+        Returns:
+            Список статей; пустой список, если страница за пределами архива
+        
+        Raises:
+            requests.RequestException: при сетевой ошибке
+        """
+        if self.discovery_backend == 'rest':
+            try:
+                posts, _ = self.get_rest_json('wp/v2/posts', {
+                    '_fields': REST_FIELDS,
+                    'per_page': REST_PER_PAGE,
+                    'orderby': 'date',
+                    'order': 'desc',
+                    'page': page
+                })
+            except requests.HTTPError as e:
+                # WordPress отвечает 400 rest_post_invalid_page_number за последней страницей
+                if e.response is not None and e.response.status_code in (400, 404):
+                    return []
+                raise
+            self.resolve_rest_authors({post.get('author') for post in posts})
+            return [self.rest_post_to_article(post) for post in posts if post.get('link')]
+        
+        if self.discovery_backend == 'feed':
+            url = f"{self.feed_url}?paged={page}"
+        else:
+            url = self.base_url if page == 1 else urljoin(self.base_url, f"page/{page}/")
+        
+        response = self.session.get(url)
+        if response.status_code == 404:
+            return []
+        response.raise_for_status()
+        
+        if self.discovery_backend == 'feed':
+            return list(self.parse_feed([response.content]))
+        return self.parse_articles(response.content)
+    
+    def get_discovery_url(self):
+        """URL источника обнаружения статей для выбранного способа"""
+        if self.discovery_backend == 'rest':
+            return urljoin(self.rest_url, 'wp/v2/posts')
+        return self.feed_url if self.discovery_backend == 'feed' else self.base_url
+    
     def check_for_new_articles(self):
         """Проверка новых статей"""
         self.logger.info("Проверка новых статей...")
+        source_url = self.get_discovery_url()
+        
+        if self.discovery_backend == 'rest':
+            try:
+                articles = self.fetch_rest_articles(self.get_rest_cursor())
+            except (requests.RequestException, ValueError) as e:
+                self.logger.error(f"Ошибка при запросе к REST API {source_url}: {e}")
+                return []
+            return self.process_articles(articles)
+        
+        # Получение главной страницы или ленты (условный запрос)
+        response = self.get_page_if_modified(source_url, stream=True)
+        if response is None:
+            self.logger.error(f"Не удалось получить содержимое {source_url}")
+            return []
+        
+        # Потоковый ответ закрывается на любом пути, включая 304 и ошибки разбора
+        try:
+            if response.status_code == 304:
+                self.logger.info(f"{source_url} не изменилась (304), парсинг пропущен")
+                return []
+            
+            # Парсинг статей
+            if self.discovery_backend == 'feed':
+                try:
+                    articles = list(self.parse_feed(response.iter_content(chunk_size=16384)))
+                except (ET.ParseError, requests.RequestException) as e:
+                    self.logger.error(f"Ошибка при разборе ленты {source_url}: {e}")
+                    return []
+            else:
+                try:
+                    content, stopped = self.read_until_known_article(
+                        response.iter_content(chunk_size=STREAM_CHUNK_SIZE), response.encoding
+                    )
+                except requests.RequestException as e:
+                    self.logger.error(f"Ошибка при чтении главной страницы: {e}")
+                    return []
+        finally:
+            response.close()
+        
+        if self.discovery_backend != 'feed':
+            if not content:
+                self.logger.error("Не удалось получить содержимое главной страницы")
+                return []
+            if stopped:
+                self.logger.info(f"Чтение остановлено на известных статьях ({len(content) // 1024} КБ)")
+            articles = self.parse_articles(content)
+        return self.process_articles(articles, source_url, response.headers)
+    
+    async def check_for_new_articles_async(self):
+        """Проверка новых статей без блокировки event loop"""
+        self.logger.info("Проверка новых статей (async)...")
+        source_url = self.get_discovery_url()
+        
+        if self.discovery_backend == 'rest':
+            try:
+                # Только HTTP-запросы выполняются в потоке, работа с БД - в event loop
+                articles = await asyncio.to_thread(self.fetch_rest_articles, self.get_rest_cursor())
+            except (requests.RequestException, ValueError) as e:
+                self.logger.error(f"Ошибка при запросе к REST API {source_url}: {e}")
+                return []
+            return self.process_articles(articles)
+        
+        try:
+            async with async_http.get(source_url, headers=self.get_conditional_headers(source_url),
+                                      limiter=self.session.limiter) as response:
+                if response.status == 304:
+                    self.logger.info(f"{source_url} не изменилась (304), парсинг пропущен")
+                    return []
+                response.raise_for_status()
+                headers = response.headers
+                if self.discovery_backend == 'feed':
+                    content = await response.read()
+                else:
+                    # Потоковое чтение главной страницы до известных статей подряд
+                    scanner = KnownArticleScanner(self, response.charset)
+                    received = []
+                    async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                        received.append(chunk)
+                        if scanner.feed_bytes(chunk):
+                            self.logger.info("Чтение остановлено на известных статьях")
+                            break
+                    content = scanner.complete_prefix(b''.join(received))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.logger.error(f"Ошибка при получении страницы {source_url}: {e}")
+            return []
         
-        # Получение главной страницы
-        html_content = self.get_page_content(self.base_url)
-        if not html_content:
-            self.logger.error("Не удалось получить содержимое главной страницы")
+        if not content:
+            self.logger.error(f"Не удалось получить содержимое {source_url}")
             return []
         
-        # Парсинг статей
-        articles = self.parse_articles(html_content)
+        # Парсинг - CPU-работа, выполняется в отдельном потоке
+        try:
+            if self.discovery_backend == 'feed':
+                articles = await asyncio.to_thread(lambda: list(self.parse_feed([content])))
+            else:
+                articles = await asyncio.to_thread(self.parse_articles, content)
+        except ET.ParseError as e:
+            self.logger.error(f"Ошибка при разборе ленты {source_url}: {e}")
+            return []
+        return self.process_articles(articles, source_url, headers)
+    
+    def process_articles(self, articles, source_url=None, headers=None):
+        """Сохранение найденных статей и валидаторов ответа, логирование результата"""
         self.logger.info(f"Найдено {len(articles)} статей")
         
         # Сохранение в базу данных
         new_articles = self.save_articles(articles)
         
+        # Валидаторы сохраняются только после успешной обработки страницы
+        if source_url and headers is not None:
+            self.save_poll_state(source_url, headers)
+        
         if new_articles:
             self.logger.info(f"Обнаружено {len(new_articles)} новых статей:")
             for article in new_articles:
@@ -173,37 +812,40 @@ class NakedCapitalismMonitor:
     
     def get_latest_articles(self, limit=10, offset=0):
         """Получение последних статей из базы данных с поддержкой пагинации"""
-        cursor = self.conn.cursor()
-        # Проверяем, существует ли колонка telegraph_url
-        cursor.execute("PRAGMA table_info(articles)")
-        columns = [column[1] for column in cursor.fetchall()]
-        
-        if 'telegraph_url' in columns:
-            cursor.execute('''
-                SELECT title, url, author, date_posted, created_at, telegraph_url
-                FROM articles
-                ORDER BY created_at DESC
-                LIMIT ? OFFSET ?
-            ''', (limit, offset))
-        else:
-            cursor.execute('''
-                SELECT title, url, author, date_posted, created_at, NULL as telegraph_url
-                FROM articles
-                ORDER BY created_at DESC
-                LIMIT ? OFFSET ?
-            ''', (limit, offset))
+        reader = self.db.reader()
+        # Колонки telegraph_url и summary добавляются конвертером и процессором статей
+        columns = [column[1] for column in reader.execute("PRAGMA table_info(articles)")]
+        telegraph_url = 'telegraph_url' if 'telegraph_url' in columns else 'NULL AS telegraph_url'
+        summary = 'summary' if 'summary' in columns else 'NULL AS summary'
+        
+        cursor = reader.execute(f'''
+            SELECT title, url, author, date_posted, created_at, {telegraph_url}, {summary}
+            FROM articles
+            ORDER BY created_at DESC
+            LIMIT ? OFFSET ?
+        ''', (limit, offset))
         
         return cursor.fetchall()
     
     def get_total_articles_count(self):
         """Получение общего количества статей"""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM articles")
-        return cursor.fetchone()[0]
+        return self.db.reader().execute("SELECT COUNT(*) FROM articles").fetchone()[0]
     
-    def run_monitoring(self, interval_hours=1):
-        """Запуск мониторинга с заданным интервалом"""
-        self.logger.info(f"Запуск мониторинга с интервалом {interval_hours} час(ов)")
+    def run_monitoring(self, interval_hours=None):
+        """
+        Запуск мониторинга
+        
+        Args:
+            interval_hours: Фиксированный интервал проверки; None - адаптивное расписание
+                            по истории публикаций
+        """
+        poll_scheduler = None
+        if interval_hours is None:
+            from adaptive_schedule import AdaptivePollScheduler
+            poll_scheduler = AdaptivePollScheduler()
+            self.logger.info("Запуск мониторинга по адаптивному расписанию")
+        else:
+            self.logger.info(f"Запуск мониторинга с интервалом {interval_hours} час(ов)")
         
         try:
             while True:
@@ -214,8 +856,11 @@ class NakedCapitalismMonitor:
                     self.notify_new_articles(new_articles)
                 
                 # Ожидание до следующей проверки
-                sleep_seconds = interval_hours * 3600
-                self.logger.info(f"Ожидание {interval_hours} час(ов) до следующей проверки...")
+                if poll_scheduler:
+                    sleep_seconds = poll_scheduler.seconds_until_next_poll()
+                else:
+                    sleep_seconds = interval_hours * 3600
+                self.logger.info(f"Ожидание {sleep_seconds / 60:.0f} мин до следующей проверки...")
                 time.sleep(sleep_seconds)
                 
         except KeyboardInterrupt:
@@ -223,7 +868,7 @@ class NakedCapitalismMonitor:
         except Exception as e:
             self.logger.error(f"Ошибка в мониторинге: {e}")
         finally:
-            self.conn.close()
+            self.db.close()
     
     def notify_new_articles(self, articles):
         """Уведомление о новых статьях (заглушка для интеграции с ботом)"""
@@ -261,7 +906,7 @@ def main():
     print("Нажмите Ctrl+C для остановки")
     
     # Запуск мониторинга
-    monitor.run_monitoring(interval_hours=1)
+    monitor.run_monitoring()
 
 if __name__ == "__main__":
     main()
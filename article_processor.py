@@ -2,101 +2,490 @@
 Процессор статей для извлечения контента
 """
 
-import requests
-import re
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from bs4 import BeautifulSoup
-import sqlite3
 import time
+from urllib.parse import urljoin, urlsplit
+import async_http
+import bot_config
+import db
+import http_transport
+import html_cache
+import html_parsing
+from content_extractor import extract_main_content
+from streaming_extractor import extract_text_streaming
+from summarizer import textrank_summary
+
+
+# Функции разбора для пула процессов: объявлены на уровне модуля, чтобы передаваться
+# через pickle; принимают байты HTML и URL страницы и возвращают простые объекты
+
+def extract_article_element(html):
+    """
+    Поиск основного текста статьи в HTML страницы
+    
+    Returns:
+        ExtractedContent (элемент без служебных поддеревьев и текстовые блоки) или None
+    """
+    soup = html_parsing.make_soup(html)
+    # Основной текст - блок с наибольшей оценкой по плотности текста и ссылок
+    return extract_main_content(soup)
+
+
+def parse_article_text(html, url=None):
+    """Текст статьи из HTML страницы (url не используется - сигнатура функции разбора)"""
+    extracted = extract_article_element(html)
+    if extracted and extracted.blocks:
+        return '\n'.join(extracted.blocks)
+    return None
+
+
+def extract_links(element, base_url=None):
+    """Ссылки элемента: [(абсолютный URL, текст ссылки)] в порядке документа"""
+    links = []
+    for link in element.find_all('a', href=True):
+        href = urljoin(base_url, link['href'].strip()) if base_url else link['href'].strip()
+        links.append((href, ' '.join(link.get_text(' ').split())))
+    return links
+
+
+def parse_article_body(html, url=None):
+    """Текст статьи и ссылки из ее основного текста: (текст, [(URL, текст ссылки)]) или None"""
+    extracted = extract_article_element(html)
+    if not extracted or not extracted.blocks:
+        return None
+    return '\n'.join(extracted.blocks), extract_links(extracted.element, url)
+
+
+def link_domain(url):
+    """Домен ссылки в нижнем регистре без порта и www. ('' для некорректного URL)"""
+    try:
+        host = urlsplit(url).hostname or ''
+    except ValueError:
+        return ''
+    return host[4:] if host.startswith('www.') else host
+
+
+def reversed_domain(domain):
+    """
+    Домен с метками в обратном порядке ('markets.ft.com' -> 'com.ft.markets')
+    
+    Поддомены идут в индексе сразу за доменом, поэтому поиск домена вместе
+    с поддоменами - диапазон по индексу, а не LIKE '%.домен' по всей таблице.
+    """
+    return '.'.join(reversed(domain.split('.')))
+
+
+def outbound_links(links, source_url):
+    """
+    Внешние ссылки статьи
+    
+    Args:
+        links: Пары (URL, текст ссылки)
+        source_url: URL статьи (ссылки на ее домен не считаются внешними)
+    
+    Returns:
+        Список (URL, текст ссылки, домен) без повторов URL, в порядке статьи
+    """
+    source_domain = link_domain(source_url)
+    seen = set()
+    result = []
+    for href, anchor in links:
+        if not href.startswith(('http://', 'https://')) or href in seen:
+            continue
+        domain = link_domain(href)
+        if domain and domain != source_domain:
+            seen.add(href)
+            result.append((href, anchor, domain))
+    return result
+
+
+def _parse_batch(parse, batch):
+    """Разбор пачки страниц в процессе пула: [(url, html)] -> [(url, результат)]"""
+    results = []
+    for url, html in batch:
+        try:
+            results.append((url, parse(html, url)))
+        except Exception as e:
+            print(f"Ошибка при разборе статьи {url}: {e}")
+            results.append((url, None))
+    return results
+
 
 class ArticleProcessor:
-    def __init__(self, db_path='articles.db'):
-        self.db_path = db_path
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+    # Верхняя граница числа параллельных загрузок (по размеру пула соединений транспорта)
+    MAX_FETCH_CONCURRENCY = http_transport.POOL_MAXSIZE
+    # Размер фрагмента при потоковом извлечении
+    STREAM_CHUNK_SIZE = 65536
+    
+    def __init__(self, db_path=None, transport=None, cache=None, streaming=None,
+                 parse_workers=None):
+        self.db_path = db_path or bot_config.DB_PATH
+        self.db = db.get_database(self.db_path)
+        self.session = transport or http_transport.get_transport()
+        self.cache = cache or html_cache.get_cache()
+        self.streaming = bot_config.STREAMING_EXTRACTION if streaming is None else streaming
+        self.max_body_bytes = bot_config.MAX_ARTICLE_BYTES
+        # Разбор в пуле процессов при массовой загрузке (0 или 1 - в потоках загрузки)
+        workers = bot_config.PARSE_WORKERS if parse_workers is None else parse_workers
+        self.parse_workers = workers or 0
+        self.parse_chunksize = bot_config.PARSE_CHUNKSIZE
+        self._parse_pool = None
+        self.setup_database()
+    
+    def setup_database(self):
+        """
+        Обновление базы данных: колонка краткого содержания и таблица ссылок статей
+        
+        Таблицу articles создает монитор; без нее ALTER TABLE завершается ошибкой
+        sqlite3.OperationalError, как и в TelegraphArticleConverter.setup_database.
+        """
+        with self.db.write() as conn:
+            columns = [column[1] for column in conn.execute('PRAGMA table_info(articles)')]
+            if 'summary' not in columns:
+                conn.execute('ALTER TABLE articles ADD COLUMN summary TEXT')
+            
+            # Внешние ссылки статей (подборки Links - сотни ссылок на другие сайты)
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS article_links (
+                    article_id INTEGER NOT NULL,
+                    position INTEGER NOT NULL,
+                    url TEXT NOT NULL,
+                    anchor TEXT,
+                    domain TEXT NOT NULL,
+                    reversed_domain TEXT,
+                    PRIMARY KEY (article_id, url)
+                )
+            ''')
+            
+            # Поиск по домену вместе с поддоменами идет по reversed_domain (см. reversed_domain)
+            link_columns = [column[1] for column in conn.execute('PRAGMA table_info(article_links)')]
+            if 'reversed_domain' not in link_columns:
+                conn.execute('ALTER TABLE article_links ADD COLUMN reversed_domain TEXT')
+            domains = [row[0] for row in conn.execute(
+                'SELECT DISTINCT domain FROM article_links WHERE reversed_domain IS NULL')]
+            conn.executemany('UPDATE article_links SET reversed_domain = ? WHERE domain = ?',
+                             [(reversed_domain(domain), domain) for domain in domains])
+            conn.execute('DROP INDEX IF EXISTS idx_article_links_domain')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_article_links_reversed_domain '
+                         'ON article_links(reversed_domain, article_id)')
     
     def close(self):
-        """Закрытие соединения с базой данных"""
-        if self.conn:
-            self.conn.close()
+        """Закрытие пула процессов разбора и освобождение общей базы (см. db.get_database)"""
+        if self._parse_pool:
+            self._parse_pool.shutdown()
+            self._parse_pool = None
+        self.db.close()
     
     def fetch_article_content(self, url):
-        """Получение полного контента статьи"""
+        """Получение полного контента статьи (краткое содержание сохраняется при первой загрузке)"""
+        content = self.fetch_article_text(url)
+        if content:
+            self.record_article_text(url, content)
+        return content
+    
+    def fetch_article_text(self, url):
+        """Загрузка и извлечение текста статьи без сохранения в базу; None при ошибке"""
         try:
-            response = self.session.get(url, timeout=30)
+            if self.streaming:
+                return self.fetch_article_content_streaming(url)
+            html = self.cache.fetch(self.session, url)
+            return self.extract_article_content(html)
+        except Exception as e:
+            print(f"Ошибка при получении контента статьи {url}: {e}")
+            return None
+    
+    def fetch_article_content_streaming(self, url):
+        """
+        Получение контента статьи с разбором по мере загрузки
+        
+        Дерево документа не строится, а тело ответа не хранится целиком, поэтому
+        потребление памяти не зависит от размера страницы. Кэш HTML не используется:
+        для записи в него нужно все тело страницы.
+        """
+        with self.session.get(url, stream=True) as response:
             response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Извлечение основного контента статьи
-            content_selectors = [
-                'div.entry-content',
-                'div.post-content',
-                'div.article-content',
-                'div.content',
-                'article',
-                'main'
-            ]
-            
-            article_content = None
-            for selector in content_selectors:
-                article_content = soup.select_one(selector)
-                if article_content:
-                    break
-            
-            if not article_content:
-                # Fallback: поиск по классам
-                article_content = soup.find('div', class_=re.compile(r'content|entry|post|article'))
-            
-            if article_content:
-                # Очистка контента
-                content_text = self.extract_text_content(article_content)
-                return content_text
+            # Без charset в заголовке requests подставляет ISO-8859-1 - тогда считаем страницу UTF-8
+            encoding = response.encoding if 'charset' in response.headers.get('Content-Type', '') else None
+            content, truncated = extract_text_streaming(
+                response.iter_content(chunk_size=self.STREAM_CHUNK_SIZE), encoding, self.max_body_bytes
+            )
+        if truncated:
+            print(f"⚠️ Страница {url} больше {self.max_body_bytes // (1024 * 1024)} МБ, прочитано только начало")
+        return content
+    
+    def fetch_many(self, urls, concurrency=8, parse=None):
+        """
+        Параллельное получение контента нескольких статей
+        
+        Результат определяет одна функция разбора: в потоках загрузки она вызывается
+        сразу после загрузки, а при parse_workers > 1 - в пуле процессов на всех ядрах.
+        Для разбора по умолчанию (текст статьи) применяется потоковое извлечение
+        (STREAMING_EXTRACTION) и сохраняется краткое содержание, как в fetch_article_content;
+        результаты других функций разбора сохраняет вызывающий код (record_article_text).
+        
+        Args:
+            urls: Список URL статей
+            concurrency: Максимальное число одновременных загрузок
+            parse: Функция уровня модуля (html, url) -> результат, передается в пул
+                   процессов через pickle (по умолчанию parse_article_text)
+        
+        Yields:
+            Кортежи (url, content) по мере завершения загрузок; content = None при ошибке
+        """
+        concurrency = max(1, min(concurrency, self.MAX_FETCH_CONCURRENCY))
+        if parse is not None:
+            yield from self._fetch_many(urls, concurrency, parse)
+            return
+        
+        for url, content in self._fetch_many(urls, concurrency, parse_article_text, self.streaming):
+            if content:
+                self.record_article_text(url, content)
+            yield url, content
+    
+    def _fetch_many(self, urls, concurrency, parse, streaming=False):
+        """Загрузка и разбор в потоках или в пуле процессов (см. fetch_many), без сохранения в базу"""
+        if streaming:
+            fetch = self.fetch_article_text
+        elif self.parse_workers > 1:
+            yield from self._fetch_and_parse_in_processes(urls, concurrency, parse)
+            return
+        else:
+            fetch = functools.partial(self.fetch_and_parse, parse=parse)
+        
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {executor.submit(fetch, url): url for url in urls}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+    
+    def fetch_and_parse(self, url, parse):
+        """Загрузка HTML статьи через кэш и разбор функцией parse(html, url); None при ошибке"""
+        html = self.fetch_html(url)
+        if html is None:
+            return None
+        return _parse_batch(parse, [(url, html)])[0][1]
+    
+    def fetch_html(self, url):
+        """Загрузка HTML статьи через кэш; None при ошибке"""
+        try:
+            return self.cache.fetch(self.session, url)
+        except Exception as e:
+            print(f"Ошибка при получении контента статьи {url}: {e}")
+            return None
+    
+    def get_parse_pool(self):
+        """Пул процессов разбора (создается при первом использовании)"""
+        if self._parse_pool is None:
+            # spawn: дочерние процессы не наследуют потоки загрузки и соединения с базой
+            self._parse_pool = ProcessPoolExecutor(
+                max_workers=self.parse_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._parse_pool
+    
+    def _fetch_and_parse_in_processes(self, urls, concurrency, parse):
+        """
+        Загрузка в потоках и разбор пачками по parse_chunksize страниц в пуле процессов
+        
+        Пачки отправляются по мере загрузки, а готовые результаты выдаются сразу,
+        поэтому загрузка и разбор идут одновременно.
+        """
+        parsing = {}  # Future пачки -> пачка [(url, html)]
+        batch = []
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {executor.submit(self.fetch_html, url): url for url in urls}
+            for index, future in enumerate(as_completed(futures), 1):
+                url, html = futures[future], future.result()
+                if html is None:
+                    yield url, None
+                else:
+                    batch.append((url, html))
+                if batch and (len(batch) >= self.parse_chunksize or index == len(futures)):
+                    try:
+                        parsing[self.get_parse_pool().submit(_parse_batch, parse, batch)] = batch
+                    except BrokenProcessPool as e:
+                        yield from self._parse_inline(batch, parse, e)
+                    batch = []
+                for done in [f for f in parsing if f.done()]:
+                    yield from self._batch_results(done, parsing.pop(done), parse)
+        
+        for done in as_completed(parsing):
+            yield from self._batch_results(done, parsing[done], parse)
+    
+    def _batch_results(self, future, batch, parse):
+        """Результаты пачки; если процесс пула аварийно завершился - разбор в текущем процессе"""
+        try:
+            return future.result()
+        except BrokenProcessPool as e:
+            return self._parse_inline(batch, parse, e)
+    
+    def _parse_inline(self, batch, parse, error):
+        print(f"⚠️ Пул процессов разбора недоступен ({error}), разбор в текущем процессе")
+        # Сломанный пул не восстанавливается - при следующей пачке создается новый
+        if self._parse_pool:
+            self._parse_pool.shutdown(wait=False)
+            self._parse_pool = None
+        return _parse_batch(parse, batch)
+    
+    async def fetch_article_content_async(self, url):
+        """Получение полного контента статьи без блокировки event loop"""
+        try:
+            entry = await asyncio.to_thread(self.cache.lookup, url)
+            if entry and entry.fresh:
+                html = entry.content
             else:
-                return None
-                
+                async with async_http.get(url, headers=self.cache.conditional_headers(entry),
+                                          limiter=self.session.limiter) as response:
+                    if entry and response.status == 304:
+                        await asyncio.to_thread(self.cache.touch, url)
+                        html = entry.content
+                    else:
+                        response.raise_for_status()
+                        html = await response.read()
+                        await asyncio.to_thread(self.cache.store, url, html,
+                                                response.headers.get('ETag'),
+                                                response.headers.get('Last-Modified'))
+            # Разбор HTML - CPU-работа, выполняется в отдельном потоке
+            content = await asyncio.to_thread(self.extract_article_content, html)
+            if content:
+                await asyncio.to_thread(self.record_article_text, url, content)
+            return content
         except Exception as e:
             print(f"Ошибка при получении контента статьи {url}: {e}")
             return None
     
-    def extract_text_content(self, soup_element):
-        """Извлечение текстового контента из HTML элемента"""
-        # Удаление ненужных элементов
-        for element in soup_element.find_all(['script', 'style', 'nav', 'footer', 'header', 'aside']):
-            element.decompose()
+    def extract_article_content(self, html):
+        """Извлечение текста статьи из HTML страницы"""
+        return parse_article_text(html)
+    
+    def extract_summary(self, content, max_sentences=3):
+        """Краткое содержание контента: предложения с наибольшим рангом TextRank"""
+        return textrank_summary(content, max_sentences)
+    
+    def get_summary(self, url):
+        """Сохраненное краткое содержание статьи или None"""
+        row = self.db.reader().execute('SELECT summary FROM articles WHERE url = ?', (url,)).fetchone()
+        return row[0] if row else None
+    
+    def ensure_summary(self, url, content, force=False):
+        """
+        Краткое содержание статьи, вычисляемое один раз при первой загрузке текста
         
-        # Удаление элементов с классами рекламы
-        for element in soup_element.find_all(class_=re.compile(r'ads|advertisement|sponsor|promo')):
-            element.decompose()
+        Args:
+            url: URL статьи
+            content: Текст статьи
+            force: Пересчитать, даже если краткое содержание уже сохранено (текст изменился)
         
-        # Извлечение текста
-        text_content = soup_element.get_text(separator='\n', strip=True)
+        Returns:
+            Краткое содержание или None, если в тексте нет предложений
+        """
+        if not force:
+            summary = self.get_summary(url)
+            if summary:
+                return summary
+        summary = self.extract_summary(content) if content else None
+        self.store_summary(url, summary)
+        return summary
+    
+    def store_summary(self, url, summary):
+        """Сохранение готового краткого содержания (внутри блока db.write - в его транзакции)"""
+        if summary:
+            with self.db.write() as conn:
+                conn.execute('UPDATE articles SET summary = ? WHERE url = ?', (summary, url))
+    
+    def record_article_text(self, url, content, links=None):
+        """
+        Сохранение результатов загрузки текста статьи: краткое содержание и внешние ссылки
         
-        # Очистка текста
-        lines = text_content.split('\n')
-        cleaned_lines = []
+        Вызывается на каждом пути загрузки текста (fetch_article_content, fetch_many,
+        ingest_articles, публикация в Telegraph), поэтому краткое содержание
+        вычисляется один раз, какой бы путь ни загрузил статью первым.
         
-        for line in lines:
-            line = line.strip()
-            if line and len(line) > 10:  # Пропускаем короткие строки
-                cleaned_lines.append(line)
+        Args:
+            url: URL статьи
+            content: Текст статьи
+            links: Пары (URL, текст ссылки) из основного текста или None, если ссылки не извлекались
         
-        return '\n'.join(cleaned_lines)
+        Returns:
+            Краткое содержание или None
+        """
+        summary = self.ensure_summary(url, content)
+        if links is not None:
+            self.store_links(url, links)
+        return summary
     
-    def extract_summary(self, content, max_sentences=3):
-        """Извлечение краткого содержания из контента"""
-        # Разбиение на предложения
-        sentences = re.split(r'[.!?]+', content)
+    def store_links(self, url, links, replace=False):
+        """
+        Сохранение внешних ссылок статьи в article_links одной пакетной вставкой
         
-        # Фильтрация коротких предложений
-        valid_sentences = [s.strip() for s in sentences if len(s.strip()) > 20]
+        Args:
+            url: URL статьи
+            links: Пары (URL, текст ссылки) из основного текста статьи
+            replace: Удалить ранее сохраненные ссылки (текст статьи изменился)
         
-        if valid_sentences:
-            # Берем первые несколько предложений
-            summary_sentences = valid_sentences[:max_sentences]
-            return '. '.join(summary_sentences) + '.'
+        Returns:
+            Число добавленных ссылок
+        """
+        rows = outbound_links(links, url)
+        with self.db.write() as conn:
+            row = conn.execute('SELECT id FROM articles WHERE url = ?', (url,)).fetchone()
+            if not row:
+                return 0
+            article_id = row[0]
+            
+            if replace:
+                conn.execute('DELETE FROM article_links WHERE article_id = ?', (article_id,))
+            before = conn.total_changes
+            conn.executemany('''
+                INSERT OR IGNORE INTO article_links (article_id, position, url, anchor, domain, reversed_domain)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(article_id, position, href, anchor, domain, reversed_domain(domain))
+                  for position, (href, anchor, domain) in enumerate(rows)])
+            return conn.total_changes - before
+    
+    def find_articles_linking_to(self, domain, days=30, limit=20):
+        """
+        Статьи за последние days дней со ссылками на домен или его поддомены
+        (ft.com находит и markets.ft.com) по индексу article_links
         
-        return None
+        Returns:
+            Список (заголовок, URL, дата добавления, число ссылок на домен), новые первыми
+        """
+        key = reversed_domain(link_domain(domain if '://' in domain else f'http://{domain}'))
+        # Сам домен и диапазон поддоменов: 'com.ft.' < 'com.ft.markets' < 'com.ft/' ('/' следует за '.')
+        cursor = self.db.reader().execute('''
+            SELECT articles.title, articles.url, articles.created_at, COUNT(*)
+            FROM article_links
+            JOIN articles ON articles.id = article_links.article_id
+            WHERE (article_links.reversed_domain = ?
+                   OR (article_links.reversed_domain > ? AND article_links.reversed_domain < ?))
+              AND articles.created_at >= datetime('now', ?)
+            GROUP BY articles.id
+            ORDER BY articles.created_at DESC
+            LIMIT ?
+        ''', (key, key + '.', key + '/', f'-{int(days)} days', limit))
+        return cursor.fetchall()
+    
+    def ingest_articles(self, urls, concurrency=8):
+        """
+        Обработка текста новых статей: краткое содержание и индекс внешних ссылок
+        
+        Сохраненное краткое содержание берется из базы; остальные статьи
+        загружаются параллельно (fetch_many) один раз.
+        
+        Returns:
+            Словарь url -> краткое содержание (None, если не удалось получить текст)
+        """
+        summaries = {url: self.get_summary(url) for url in urls}
+        missing = [url for url, summary in summaries.items() if not summary]
+        # Страница разбирается целиком (без потокового извлечения): ссылки нужны из дерева документа
+        for url, body in self.fetch_many(missing, concurrency=concurrency, parse=parse_article_body):
+            if not body:
+                continue
+            content, links = body
+            summaries[url] = self.record_article_text(url, content, links)
+        return summaries
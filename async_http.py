@@ -0,0 +1,98 @@
+"""
+Общий асинхронный HTTP-клиент (пул соединений aiohttp) для монитора и процессора статей
+
+Запросы идут через request(): он берет токены из того же RateLimiter, что и
+HttpTransport, и повторяет запросы по той же политике (429/5xx, full jitter,
+Retry-After приостанавливает корзину хоста).
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import aiohttp
+
+import http_transport
+from http_transport import (DEFAULT_HEADERS, DEFAULT_TIMEOUT, IDEMPOTENT_METHODS, MAX_RETRIES,
+                            RETRY_STATUSES, backoff_delay, parse_retry_after)
+
+CONNECTION_LIMIT = 20
+CONNECTION_LIMIT_PER_HOST = 8
+
+_session = None
+
+
+async def get_session():
+    """Получение общей сессии aiohttp (создается при первом обращении внутри event loop)"""
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=CONNECTION_LIMIT,
+            limit_per_host=CONNECTION_LIMIT_PER_HOST,
+            ttl_dns_cache=300
+        )
+        connect_timeout, read_timeout = DEFAULT_TIMEOUT
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            headers=DEFAULT_HEADERS,
+            timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        )
+    return _session
+
+
+@asynccontextmanager
+async def request(method, url, limiter=None, max_retries=MAX_RETRIES, **kwargs):
+    """
+    Запрос через общую сессию с ограничением частоты и повторами
+
+    limiter по умолчанию - ограничитель общего HttpTransport, поэтому синхронные
+    и асинхронные запросы к одному хосту расходуют одну корзину токенов.
+
+        async with async_http.request('GET', url, limiter=transport.limiter) as response:
+            html = await response.read()
+    """
+    limiter = limiter or http_transport.get_transport().limiter
+    session = await get_session()
+    retryable = method.upper() in IDEMPOTENT_METHODS
+
+    attempt = 0
+    while True:
+        # Корзина токенов синхронная (общая с потоками) - ожидание в отдельном потоке
+        await asyncio.to_thread(limiter.acquire, url)
+        delay = backoff_delay(attempt)
+        try:
+            response = await session.request(method, url, **kwargs)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if not retryable or attempt >= max_retries:
+                raise
+        else:
+            status = response.status
+            # Как в HttpTransport: 429 можно повторить для любого метода
+            if (status not in RETRY_STATUSES or (not retryable and status != 429)
+                    or attempt >= max_retries):
+                break
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                limiter.pause(url, retry_after)
+                delay = 0
+            response.release()
+
+        await asyncio.sleep(delay)
+        attempt += 1
+
+    try:
+        yield response
+    finally:
+        response.release()
+
+
+def get(url, **kwargs):
+    """GET-запрос через request()"""
+    return request('GET', url, **kwargs)
+
+
+async def close_session():
+    """Закрытие общей сессии aiohttp"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
@@ -0,0 +1,81 @@
+"""
+Сравнение скорости парсеров HTML на сохраненных страницах (fixtures/)
+
+Для каждого доступного парсера BeautifulSoup измеряется время разбора
+страницы, parse_articles и extract_article_content целиком, а также
+извлечение статей из готового дерева главной страницы: по блокам записей
+(extract_post_blocks) и прежним поиском по ссылкам (extract_article_links).
+"""
+
+import argparse
+
+from bs4 import BeautifulSoup, FeatureNotFound
+
+import bot_config
+import html_parsing
+from article_monitor import NakedCapitalismMonitor
+from article_processor import ArticleProcessor
+from benchmark_suite import load_corpus, measure
+
+PARSERS = ['lxml', 'html.parser', 'html5lib']
+
+
+def available_parsers():
+    parsers = []
+    for parser in PARSERS:
+        try:
+            BeautifulSoup('<p></p>', parser)
+            parsers.append(parser)
+        except FeatureNotFound:
+            print(f"⚠️ Парсер {parser} не установлен - пропущен")
+    return parsers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение скорости парсеров HTML")
+    parser.add_argument('--repeat', type=int, default=20, help="Число повторов каждого замера")
+    args = parser.parse_args()
+
+    _, pages = load_corpus()
+    homepage, article = pages['homepage.html'], pages['article.html']
+
+    monitor = NakedCapitalismMonitor.__new__(NakedCapitalismMonitor)  # Без подключения к БД и сети
+    monitor.base_url = "https://www.nakedcapitalism.com/"
+    processor = ArticleProcessor.__new__(ArticleProcessor)
+
+    # (название, setup, run) - как в benchmark_suite.measure
+    cases = [
+        ('разбор homepage.html', lambda: homepage, html_parsing.make_soup),
+        ('разбор article.html', lambda: article, html_parsing.make_soup),
+        ('parse_articles', lambda: homepage, monitor.parse_articles),
+        ('extract_article_content', lambda: article, processor.extract_article_content),
+    ]
+
+    parsers = available_parsers()
+    print(f"📊 Время на страницу, мс (медиана / среднее из {args.repeat})")
+    print(f"   homepage.html: {len(homepage) // 1024} КБ, article.html: {len(article) // 1024} КБ")
+    print("=" * 72)
+    print(f"{'':28}" + "".join(f"{name:>15}" for name in parsers))
+
+    results = {}
+    for name in parsers:
+        bot_config.HTML_PARSER = name
+        for label, setup, run in cases:
+            results[label, name] = measure(setup, run, args.repeat)
+        root = html_parsing.make_soup(homepage).find('div', {'id': 'content'})
+        results['блоки записей', name] = measure(lambda: root, monitor.extract_post_blocks, args.repeat)
+        results['поиск по ссылкам', name] = measure(lambda: root, monitor.extract_article_links, args.repeat)
+
+    labels = [label for label, _, _ in cases] + ['блоки записей', 'поиск по ссылкам']
+    for label in labels:
+        row = "".join(f"{results[label, name]['p50_ms']:7.2f}/{results[label, name]['mean_ms']:<7.2f}"
+                      for name in parsers)
+        print(f"{label:28}{row}")
+
+    root = html_parsing.make_soup(homepage).find('div', {'id': 'content'})
+    print(f"\n📰 Записей: блоки - {len(monitor.extract_post_blocks(root))}, "
+          f"поиск по ссылкам - {len(monitor.extract_article_links(root))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Замеры скорости парсеров на зафиксированном наборе страниц (fixtures/manifest.json)
+
+Для каждой функции и страницы выводятся пропускная способность, медиана (p50)
+и 99-й перцентиль (p99) времени вызова и пиковая память. С --baseline результаты
+сравниваются с сохраненными; при ухудшении больше порога код выхода 1.
+
+    python benchmark_suite.py --save-baseline       # записать fixtures/baseline.json
+    python benchmark_suite.py --baseline            # сравнить с fixtures/baseline.json
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import bot_config
+import html_parsing
+from content_extractor import extract_main_content
+from article_monitor import NakedCapitalismMonitor
+from article_processor import ArticleProcessor
+from telegraph_article_converter import TelegraphArticleConverter
+from telegraph_publisher import TelegraphPublisher
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+MANIFEST_PATH = os.path.join(FIXTURES_DIR, 'manifest.json')
+DEFAULT_BASELINE = os.path.join(FIXTURES_DIR, 'baseline.json')
+DEFAULT_THRESHOLD = 0.25  # Допустимое ухудшение: +25%
+
+# Сравниваемые показатели (больше - хуже) и множитель порога:
+# хвост распределения (p99) шумнее медианы и пиковой памяти
+COMPARED_METRICS = {'p50_ms': 1, 'p99_ms': 4, 'peak_kb': 1}
+# Разница меньше этой считается шумом (мс для времени, КБ для памяти)
+MIN_DIFFERENCE = {'p50_ms': 0.5, 'p99_ms': 1.0, 'peak_kb': 16}
+
+
+def load_corpus(manifest_path=MANIFEST_PATH):
+    """
+    Загрузка страниц из манифеста с проверкой контрольных сумм
+
+    Returns:
+        Кортеж (манифест, словарь имя -> байты)
+
+    Raises:
+        ValueError: если страница изменена без обновления манифеста
+    """
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    directory = os.path.dirname(manifest_path)
+    pages = {}
+    for fixture in manifest['fixtures']:
+        with open(os.path.join(directory, fixture['name']), 'rb') as f:
+            data = f.read()
+        if hashlib.sha256(data).hexdigest() != fixture['sha256']:
+            raise ValueError(f"{fixture['name']} не совпадает с манифестом - обновите sha256 и version")
+        pages[fixture['name']] = data
+    return manifest, pages
+
+
+def percentile(sorted_values, fraction):
+    """Перцентиль по ближайшему рангу"""
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def measure(setup, run, repeat):
+    """
+    Замер одной функции
+
+    Args:
+        setup: Подготовка аргумента перед каждым вызовом (не входит в замер)
+        run: Замеряемая функция от результата setup
+
+    Returns:
+        Словарь с p50/p99 (мс), средним временем (мс) и пиковой памятью (КБ)
+    """
+    run(setup())  # Прогрев
+    times = []
+    # Как в timeit: сборка мусора, вызванная чужими объектами, не попадает в замер
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            argument = setup()
+            start = time.perf_counter()
+            run(argument)
+            times.append((time.perf_counter() - start) * 1000)
+    finally:
+        gc.enable()
+    times.sort()
+
+    argument = setup()
+    tracemalloc.start()
+    try:
+        run(argument)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'p50_ms': round(percentile(times, 0.50), 3),
+        'p99_ms': round(percentile(times, 0.99), 3),
+        'mean_ms': round(sum(times) / len(times), 3),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def build_cases(manifest, pages):
+    """
+    Набор замеров: (функция, страница, размер входа в байтах, setup, run)
+
+    Объекты создаются без __init__: замеряемым методам не нужны ни база данных, ни сеть.
+    """
+    monitor = NakedCapitalismMonitor.__new__(NakedCapitalismMonitor)
+    monitor.base_url = "https://www.nakedcapitalism.com/"
+    processor = ArticleProcessor.__new__(ArticleProcessor)
+    converter = TelegraphArticleConverter.__new__(TelegraphArticleConverter)
+    publisher = TelegraphPublisher.__new__(TelegraphPublisher)
+    converter.processor, converter.publisher = processor, publisher
+
+    def entry_content(data):
+        return html_parsing.make_soup(data).select_one('div.entry-content')
+
+    cases = []
+    for fixture in manifest['fixtures']:
+        name = fixture['name']
+        data = pages[name]
+        if fixture['kind'] == 'homepage':
+            cases.append(('parse_articles', name, len(data),
+                          lambda data=data: data, monitor.parse_articles))
+            continue
+
+        text = processor.extract_article_content(data) or ''
+        fragment = ''.join(str(child) for child in entry_content(data).contents)
+        cases += [
+            ('extract_main_content', name, len(data),
+             lambda data=data: html_parsing.make_soup(data), extract_main_content),
+            ('extract_summary', name, len(text.encode()),
+             lambda text=text: text, processor.extract_summary),
+            ('format_article_for_telegraph', name, len(text.encode()),
+             lambda text=text: text,
+             lambda text: converter.format_article_for_telegraph(
+                 "Benchmark article", text, "Yves Smith", "https://www.nakedcapitalism.com/")),
+            ('html_to_nodes', name, len(fragment.encode()),
+             lambda fragment=fragment: fragment, publisher.html_to_nodes),
+            ('html_to_article_nodes', name, len(data),
+             lambda data=data: data, converter.html_to_article_nodes),
+        ]
+    return cases
+
+
+def run_suite(repeat, only=None):
+    """Выполнение всех замеров; ключ результата - 'функция:страница'"""
+    manifest, pages = load_corpus()
+    results = {}
+    for function, fixture, size, setup, run in build_cases(manifest, pages):
+        if only and function not in only:
+            continue
+        stats = measure(setup, run, repeat)
+        stats['throughput_mb_s'] = round(size / (1024 * 1024) / (stats['mean_ms'] / 1000), 2) if stats['mean_ms'] else None
+        results[f"{function}:{fixture}"] = stats
+    return manifest, results
+
+
+def compare(results, baseline, threshold):
+    """Список ухудшений относительно baseline больше порога"""
+    regressions = []
+    for key, stats in results.items():
+        previous = baseline['results'].get(key)
+        if not previous:
+            continue
+        for metric, factor in COMPARED_METRICS.items():
+            old, new = previous.get(metric), stats.get(metric)
+            if (old and new is not None and new > old * (1 + threshold * factor)
+                    and new - old > MIN_DIFFERENCE[metric]):
+                regressions.append(f"{key} {metric}: {old} -> {new} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def print_results(results, baseline=None):
+    print(f"{'функция:страница':52}{'МБ/с':>9}{'p50, мс':>10}{'p99, мс':>10}{'пик, КБ':>10}")
+    print("=" * 91)
+    for key, stats in results.items():
+        line = (f"{key:52}{stats['throughput_mb_s'] or 0:9.2f}{stats['p50_ms']:10.2f}"
+                f"{stats['p99_ms']:10.2f}{stats['peak_kb']:10.1f}")
+        previous = baseline['results'].get(key) if baseline else None
+        if previous and previous.get('p50_ms'):
+            line += f"   p50 {(stats['p50_ms'] / previous['p50_ms'] - 1) * 100:+.0f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры скорости парсеров на сохраненных страницах")
+    parser.add_argument('--repeat', type=int, default=30, help="Число вызовов каждой функции")
+    parser.add_argument('--only', nargs='+', help="Замерять только указанные функции")
+    parser.add_argument('--baseline', nargs='?', const=DEFAULT_BASELINE, help="Сравнить с сохраненными результатами")
+    parser.add_argument('--save-baseline', nargs='?', const=DEFAULT_BASELINE, help="Сохранить результаты как baseline")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Допустимое ухудшение (доля, по умолчанию 0.25)")
+    args = parser.parse_args()
+
+    try:
+        manifest, results = run_suite(args.repeat, args.only)
+    except (OSError, ValueError) as e:
+        print(f"❌ Набор страниц поврежден: {e}")
+        return 2
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('corpus_version') != manifest['version']:
+            print(f"❌ baseline снят на версии набора {baseline.get('corpus_version')}, "
+                  f"текущая версия {manifest['version']} - пересоздайте его с --save-baseline")
+            return 2
+
+    print(f"📊 Набор страниц v{manifest['version']}, парсер {bot_config.HTML_PARSER}, повторов: {args.repeat}\n")
+    print_results(results, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                'corpus_version': manifest['version'],
+                'parser': bot_config.HTML_PARSER,
+                'python': platform.python_version(),
+                'results': results,
+            }, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"\n💾 Baseline сохранен: {args.save_baseline}")
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ Ухудшение больше {args.threshold * 100:.0f}%:")
+            for regression in regressions:
+                print(f"   {regression}")
+            return 1
+        print(f"\n✅ Ухудшений больше {args.threshold * 100:.0f}% нет")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
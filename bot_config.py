@@ -1 +1,57 @@
+"""
+Настройки мониторинга статей
+"""
 
+# Способ обнаружения новых статей:
+#   'html' - разбор главной страницы
+#   'feed' - RSS лента WordPress (реальные автор, дата публикации и GUID)
+#   'rest' - WordPress REST API: загружаются только записи новее последней сохраненной
+DISCOVERY_BACKEND = 'html'
+
+# Парсер HTML для BeautifulSoup: 'lxml' (быстрый, на C), 'html.parser' (стандартная библиотека)
+# или 'html5lib'; если выбранный парсер не установлен, используется 'html.parser'
+HTML_PARSER = 'lxml'
+
+# Потоковое извлечение текста статей: постоянная память на любых страницах
+# (ежедневные Links и Water Cooler), но без кэша HTML
+STREAMING_EXTRACTION = False
+# Максимальный размер страницы статьи при потоковом извлечении
+MAX_ARTICLE_BYTES = 16 * 1024 * 1024
+
+# Разбор HTML при массовой загрузке (публикация пачками) в пуле процессов:
+# число процессов (например, os.cpu_count()); 0 - разбор в потоках загрузки
+PARSE_WORKERS = 0
+# Число страниц в одной задаче пула процессов
+PARSE_CHUNKSIZE = 4
+
+# Кэш исходного HTML статей
+HTML_CACHE_DIR = 'html_cache'
+HTML_CACHE_MAX_BYTES = 512 * 1024 * 1024
+HTML_CACHE_TTL_SECONDS = 24 * 3600
+
+# Адаптивное расписание проверок (по истории публикаций)
+POLL_BUDGET_PER_WEEK = 168      # Столько же запросов, сколько при проверке раз в час
+POLL_MIN_INTERVAL_MINUTES = 5
+POLL_MAX_INTERVAL_HOURS = 4
+
+# Изображения статей выгружаются в Telegraph (каждое уникальное - один раз);
+# при ошибке загрузки или выгрузки остается ссылка на сайт
+REHOST_IMAGES = True
+TELEGRAPH_UPLOAD_URL = 'https://telegra.ph/upload'
+IMAGE_STORE_DIR = 'image_store'
+IMAGE_DOWNLOAD_CONCURRENCY = 8
+MAX_IMAGE_BYTES = 5 * 1024 * 1024   # Ограничение Telegraph на размер файла
+
+# Обновление страниц Telegraph для статей, измененных на сайте
+REFRESH_WINDOW_DAYS = 3         # Проверяются статьи, опубликованные за последние N дней
+REFRESH_INTERVAL_HOURS = 6      # Период автоматической проверки (0 - только командой /refresh)
+
+# Поиск по индексу внешних ссылок статей (команда /links)
+LINKS_WINDOW_DAYS = 30          # Период поиска по умолчанию
+
+# База данных статей (SQLite в режиме WAL, см. db.py)
+DB_PATH = 'articles.db'
+DB_SYNCHRONOUS = 'NORMAL'                 # В режиме WAL безопасно и без fsync на каждую транзакцию
+DB_CACHE_SIZE_KB = 16 * 1024              # Кэш страниц на соединение
+DB_MMAP_SIZE = 128 * 1024 * 1024          # Чтение файла базы через отображение в память
+DB_BUSY_TIMEOUT_SECONDS = 10              # Ожидание блокировки записи другим процессом
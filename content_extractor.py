@@ -0,0 +1,177 @@
+"""
+Поиск основного текста страницы по оценке блоков (в духе Readability)
+
+Дерево обходится один раз: по пути считаются длина текста и текста ссылок
+каждого элемента, абзацы добавляют очки родителю и прародителю, а текст
+собирается в блоки. Побеждает кандидат с наибольшей оценкой с поправкой
+на долю текста ссылок.
+"""
+
+import re
+from collections import namedtuple
+
+from bs4.element import PreformattedString
+
+# Поддеревья, которые не участвуют в оценке и удаляются из результата
+SKIP_TAGS = {'script', 'style', 'nav', 'footer', 'header', 'aside', 'noscript', 'form', 'iframe'}
+SKIP_CLASS_PATTERN = re.compile(r'ads|advertisement|sponsor|promo')
+
+# Классы и id, повышающие и понижающие оценку кандидата
+POSITIVE_PATTERN = re.compile(r'article|body|content|entry|main|post|text', re.I)
+NEGATIVE_PATTERN = re.compile(r'comment|sidebar|widget|share|related|meta|menu|masthead|footer|nav', re.I)
+CLASS_WEIGHT = 25
+
+# Элементы-абзацы, приносящие очки контейнерам
+PARAGRAPH_TAGS = {'p', 'pre', 'td'}
+MIN_PARAGRAPH_LENGTH = 25
+# Наименьшая оценка основного текста - примерно один полноценный абзац; меньше -
+# текст не найден (вместо всей страницы с меню, боковой колонкой и подвалом)
+MIN_CONTENT_SCORE = 3
+
+# Теги, закрывающие текущий текстовый блок
+BLOCK_TAGS = {
+    'p', 'div', 'li', 'ul', 'ol', 'blockquote', 'pre', 'br', 'hr', 'tr', 'td', 'th',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'section', 'article', 'main', 'figure', 'figcaption', 'table',
+}
+MIN_BLOCK_LENGTH = 10  # Короткие строки (подписи, кнопки) пропускаются
+
+ExtractedContent = namedtuple('ExtractedContent', 'element blocks score')
+
+
+def class_weight(element):
+    """Поправка оценки по классу и id элемента"""
+    names = ' '.join(element.get('class') or ()) + ' ' + (element.get('id') or '')
+    weight = 0
+    if NEGATIVE_PATTERN.search(names):
+        weight -= CLASS_WEIGHT
+    elif POSITIVE_PATTERN.search(names):
+        weight += CLASS_WEIGHT
+    return weight
+
+
+class _Walker:
+    """Состояние единственного обхода дерева"""
+
+    def __init__(self):
+        # id элемента -> [элемент, очки, длина текста, длина текста ссылок, диапазоны блоков и пропусков]
+        self.candidates = {}
+        self.blocks = []        # Текстовые блоки в порядке документа
+        self.skipped = []       # Пропущенные поддеревья в порядке документа
+        self.buffer = []
+
+    def flush(self):
+        if not self.buffer:
+            return
+        text = ' '.join(''.join(self.buffer).split())
+        self.buffer = []
+        if len(text) > MIN_BLOCK_LENGTH:
+            self.blocks.append(text)
+
+    def candidate(self, element):
+        entry = self.candidates.get(id(element))
+        if entry is None:
+            entry = self.candidates[id(element)] = [element, float(class_weight(element)), 0, 0, None]
+        return entry
+
+    def walk(self, root):
+        """
+        Обход поддерева root; возвращает (длина текста, длина текста ссылок, число запятых)
+
+        Стек обхода вместо рекурсии, как в telegraph_publisher.element_to_nodes:
+        глубоко вложенная разметка не упирается в предел рекурсии.
+        """
+        # Кадр: (элемент, итератор дочерних, внутри ссылки, первый блок, первый пропуск,
+        #        [длина текста, длина текста ссылок, число запятых])
+        stack = [(root, iter(root.children), False, 0, 0, [0, 0, 0])]
+        while True:
+            element, children, in_link, first_block, first_skipped, totals = stack[-1]
+            child = next(children, None)
+            if child is not None:
+                name = child.name
+                if name is None:
+                    # Текстовый узел (комментарии, CDATA и doctype не учитываются)
+                    if isinstance(child, PreformattedString):
+                        continue
+                    text = str(child)
+                    self.buffer.append(text)
+                    length = len(text.strip())
+                    totals[0] += length
+                    totals[2] += text.count(',')
+                    if in_link:
+                        totals[1] += length
+                    continue
+
+                classes = child.attrs.get('class')
+                if name in SKIP_TAGS or (classes and SKIP_CLASS_PATTERN.search(' '.join(classes))):
+                    self.skipped.append(child)
+                    continue
+
+                if name in BLOCK_TAGS:
+                    self.flush()
+                # Обход в глубину: блоки и пропуски поддерева занимают непрерывный диапазон списков
+                stack.append((child, iter(child.children), in_link or name == 'a',
+                              len(self.blocks), len(self.skipped), [0, 0, 0]))
+                continue
+
+            # Дочерние элементы обойдены - итоги элемента передаются родителю (stack[-1])
+            stack.pop()
+            if not stack:
+                return tuple(totals)
+            name = element.name
+            if name in BLOCK_TAGS:
+                self.flush()
+            child_text, child_links, child_commas = totals
+
+            if name in PARAGRAPH_TAGS and child_text - child_links >= MIN_PARAGRAPH_LENGTH:
+                # Очки абзаца: длина собственного текста (без ссылок) и число запятых
+                own_text = child_text - child_links
+                score = 1 + min(own_text // 100, 3) + child_commas
+                self.candidate(stack[-1][0])[1] += score
+                if len(stack) >= 2:
+                    self.candidate(stack[-2][0])[1] += score / 2
+
+            entry = self.candidates.get(id(element))
+            if entry is not None:
+                entry[2], entry[3] = child_text, child_links
+                entry[4] = (first_block, len(self.blocks), first_skipped, len(self.skipped))
+            parent_totals = stack[-1][5]
+            parent_totals[0] += child_text
+            parent_totals[1] += child_links
+            parent_totals[2] += child_commas
+
+
+def extract_main_content(soup):
+    """
+    Поиск основного содержимого страницы
+
+    Args:
+        soup: Документ BeautifulSoup
+
+    Returns:
+        ExtractedContent (элемент основного текста без служебных поддеревьев,
+        список очищенных текстовых блоков, оценка) или None, если текста нет или
+        ни один кандидат не набрал MIN_CONTENT_SCORE (страница целиком - не основной текст)
+    """
+    root = soup.body or soup
+    walker = _Walker()
+    total_text, total_links, _ = walker.walk(root)
+    walker.flush()
+    if not walker.blocks:
+        return None
+    whole = (0, len(walker.blocks), 0, len(walker.skipped))
+
+    best, best_score, best_span = None, 0.0, whole
+    for element, score, text_length, link_length, span in walker.candidates.values():
+        if element is root:
+            text_length, link_length, span = total_text, total_links, whole
+        link_density = link_length / text_length if text_length else 1.0
+        score *= 1 - link_density
+        if score > best_score:
+            best, best_score, best_span = element, score, span
+    if best is None or best_score < MIN_CONTENT_SCORE:
+        return None
+
+    first_block, last_block, first_skipped, last_skipped = best_span
+    for element in walker.skipped[first_skipped:last_skipped]:
+        element.decompose()
+    return ExtractedContent(best, walker.blocks[first_block:last_block], best_score)
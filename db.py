@@ -0,0 +1,146 @@
+"""
+Доступ к базе данных статей (SQLite): создание соединений, настройки и порядок записи
+
+База работает в режиме WAL: чтение не ждет записи и видит последнюю
+зафиксированную версию, пока, например, публикация в Telegraph обновляет статьи.
+Каждый поток читает через собственное соединение (reader), а все изменения
+идут через единственное соединение записи под блокировкой (write).
+
+Экземпляр Database для файла общий (get_database): каждый получивший его
+компонент - владелец и освобождает его через close(); соединения закрываются,
+когда экземпляр освободит последний владелец.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import bot_config
+
+
+def connect(path):
+    """
+    Соединение с базой с настройками bot_config.DB_*
+
+    Соединение в режиме autocommit: транзакции записи явно открывает Database.write.
+    """
+    conn = sqlite3.connect(path, timeout=bot_config.DB_BUSY_TIMEOUT_SECONDS,
+                           isolation_level=None, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    # В режиме WAL NORMAL не теряет целостность при сбое, но не ждет fsync на каждой транзакции
+    conn.execute(f'PRAGMA synchronous={bot_config.DB_SYNCHRONOUS}')
+    # Отрицательное значение cache_size - размер в КБ, а не в страницах
+    conn.execute(f'PRAGMA cache_size=-{bot_config.DB_CACHE_SIZE_KB}')
+    conn.execute(f'PRAGMA mmap_size={bot_config.DB_MMAP_SIZE}')
+    return conn
+
+
+class Database:
+    """Соединения с одной базой: читатели по потокам и один писатель"""
+
+    def __init__(self, path=None):
+        # Абсолютный путь: соединения потоков открываются позже и не зависят от смены каталога
+        self.path = os.path.abspath(path or bot_config.DB_PATH)
+        self._local = threading.local()
+        # Соединения читателей по потокам: закрываются все сразу при закрытии базы
+        self._readers = {}
+        self._readers_lock = threading.Lock()
+        # Число владельцев: создавший экземпляр и каждый вызов get_database (см. close)
+        self._owners = 1
+        # Повторно входимая: запись может вызывать методы, которые тоже пишут
+        self._write_lock = threading.RLock()
+        self._write_depth = 0
+        self._writer = connect(self.path)
+
+    def reader(self):
+        """Соединение для чтения текущего потока (создается при первом обращении)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path)
+            with self._readers_lock:
+                # Соединения завершившихся потоков больше не нужны
+                for thread in [thread for thread in self._readers if not thread.is_alive()]:
+                    self._readers.pop(thread).close()
+                self._readers[threading.current_thread()] = conn
+        return conn
+
+    @contextmanager
+    def write(self):
+        """
+        Транзакция записи через общее соединение писателя
+
+        Вложенные блоки write входят в транзакцию внешнего; фиксация - при выходе
+        из внешнего блока, откат - при исключении. Внутри блока читать нужно
+        через полученное соединение: читатели не видят незафиксированных изменений.
+
+            with db.write() as conn:
+                conn.execute('UPDATE articles SET ... WHERE id = ?', (...))
+        """
+        with self._write_lock:
+            if self._write_depth:
+                self._write_depth += 1
+                try:
+                    yield self._writer
+                finally:
+                    self._write_depth -= 1
+                return
+
+            # IMMEDIATE: блокировка записи берется сразу, а не при первом изменении
+            self._writer.execute('BEGIN IMMEDIATE')
+            self._write_depth = 1
+            try:
+                yield self._writer
+            except BaseException:
+                self._writer.execute('ROLLBACK')
+                raise
+            else:
+                self._writer.execute('COMMIT')
+            finally:
+                self._write_depth = 0
+
+    def close(self):
+        """
+        Освобождение экземпляра владельцем
+
+        Соединения писателя и читателей всех потоков закрываются, только когда
+        экземпляр освободит последний владелец: закрытие в одном компоненте
+        (например, в finally скрипта) не закрывает базу для остальных.
+        Повторный вызов после закрытия ничего не делает.
+        """
+        with _databases_lock:
+            if not self._owners:
+                return
+            self._owners -= 1
+            if self._owners:
+                return
+            if _databases.get(self.path) is self:
+                del _databases[self.path]
+
+        with self._readers_lock:
+            readers = list(self._readers.values())
+            self._readers.clear()
+        for conn in readers:
+            conn.close()
+        with self._write_lock:
+            self._writer.close()
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(path=None):
+    """
+    Общий экземпляр Database для файла базы (по умолчанию bot_config.DB_PATH)
+
+    Каждый вызов добавляет владельца: получивший экземпляр освобождает его через close().
+    """
+    path = os.path.abspath(path or bot_config.DB_PATH)
+    with _databases_lock:
+        database = _databases.get(path)
+        if database is None:
+            database = _databases[path] = Database(path)
+        else:
+            database._owners += 1
+        return database
@@ -50,7 +50,7 @@ def demo_monitoring():
         
         # Статистика
         print("\n📊 СТАТИСТИКА:")
-        cursor = monitor.conn.cursor()
+        cursor = monitor.db.reader().cursor()
         cursor.execute("SELECT COUNT(*) FROM articles")
         total = cursor.fetchone()[0]
         
@@ -64,7 +64,7 @@ def demo_monitoring():
     else:
         print("❌ Сайт недоступен")
     
-    monitor.conn.close()
+    monitor.db.close()
     
     print("\n" + "=" * 60)
     print("✅ Демонстрация завершена!")
@@ -18,7 +18,7 @@ def demo_notification():
     latest_articles = monitor.get_latest_articles(1)
     
     if latest_articles:
-        title, url, author, date_posted, created_at = latest_articles[0]
+        title, url, author, date_posted, created_at = latest_articles[0][:5]
         
         print("📰 Последняя статья в базе данных:")
         print(f"   Заголовок: {title}")
@@ -69,7 +69,7 @@ def demo_notification():
         print(f"\n💾 Уведомление сохранено в файл: {filename}")
         
         # Статистика
-        cursor = monitor.conn.cursor()
+        cursor = monitor.db.reader().cursor()
         cursor.execute("SELECT COUNT(*) FROM articles")
         total_articles = cursor.fetchone()[0]
         
@@ -95,7 +95,7 @@ def demo_notification():
     else:
         print("❌ Статьи в базе данных не найдены")
     
-    monitor.conn.close()
+    monitor.db.close()
     
     print(f"\n✅ Демонстрация завершена!")
 
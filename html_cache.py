@@ -0,0 +1,222 @@
+"""
+Локальный кэш исходного HTML статей: сжатые файлы с адресацией по содержимому,
+ограничение размера (LRU) и правила свежести
+"""
+
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import bot_config
+
+# Параметры запроса, не влияющие на содержимое страницы
+TRACKING_PARAMS = ('utm_', 'fbclid', 'gclid', 'mc_cid', 'mc_eid')
+
+CacheEntry = namedtuple('CacheEntry', 'content etag last_modified fresh')
+
+
+def canonical_url(url):
+    """Канонический вид URL: схема и хост в нижнем регистре, без фрагмента и трекинговых параметров"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or 'https'
+    host = (parts.hostname or '').lower()
+    if parts.port and not ((scheme == 'http' and parts.port == 80) or (scheme == 'https' and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PARAMS)
+    ))
+    return urlunsplit((scheme, host, parts.path or '/', query, ''))
+
+
+class HtmlCache:
+    """Кэш HTML страниц на диске"""
+
+    def __init__(self, directory=None, max_bytes=None, ttl_seconds=None):
+        """
+        Args:
+            directory: Каталог кэша
+            max_bytes: Максимальный суммарный размер сжатых файлов
+            ttl_seconds: Время, в течение которого запись считается свежей (без обращения к сети)
+        """
+        self.directory = directory or bot_config.HTML_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else bot_config.HTML_CACHE_MAX_BYTES
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else bot_config.HTML_CACHE_TTL_SECONDS
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(self.directory, 'index.db'), check_same_thread=False)
+        self.setup_database()
+
+    def setup_database(self):
+        """Индекс: URL -> хэш содержимого, валидаторы и время последнего обращения"""
+        with self.lock:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS entries (
+                    url TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            ''')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS blobs (
+                    content_hash TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL
+                )
+            ''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed_at)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_entries_hash ON entries(content_hash)')
+            self.conn.commit()
+
+    def blob_path(self, content_hash):
+        return os.path.join(self.directory, content_hash[:2], f"{content_hash}.html.gz")
+
+    def lookup(self, url):
+        """
+        Поиск страницы в кэше
+
+        Returns:
+            CacheEntry или None, если страницы нет в кэше
+        """
+        key = canonical_url(url)
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT content_hash, etag, last_modified, fetched_at FROM entries WHERE url = ?', (key,)
+            ).fetchone()
+            if not row:
+                return None
+            content_hash, etag, last_modified, fetched_at = row
+            try:
+                with open(self.blob_path(content_hash), 'rb') as f:
+                    content = gzip.decompress(f.read())
+            except (OSError, EOFError):
+                # Файл потерян или поврежден - запись недействительна
+                self.conn.execute('DELETE FROM entries WHERE url = ?', (key,))
+                self.conn.commit()
+                return None
+            self.conn.execute('UPDATE entries SET accessed_at = ? WHERE url = ?', (time.time(), key))
+            self.conn.commit()
+        fresh = time.time() - fetched_at < self.ttl_seconds
+        return CacheEntry(content, etag, last_modified, fresh)
+
+    def store(self, url, content, etag=None, last_modified=None):
+        """Сохранение страницы; одинаковое содержимое хранится в одном файле"""
+        key = canonical_url(url)
+        content_hash = hashlib.sha256(content).hexdigest()
+        path = self.blob_path(content_hash)
+        now = time.time()
+        with self.lock:
+            if not self.conn.execute('SELECT 1 FROM blobs WHERE content_hash = ?', (content_hash,)).fetchone():
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(gzip.compress(content, compresslevel=6))
+                os.replace(tmp_path, path)
+                self.conn.execute('INSERT INTO blobs (content_hash, size) VALUES (?, ?)',
+                                  (content_hash, os.path.getsize(path)))
+            previous = self.conn.execute('SELECT content_hash FROM entries WHERE url = ?', (key,)).fetchone()
+            self.conn.execute('''
+                INSERT OR REPLACE INTO entries (url, content_hash, etag, last_modified, fetched_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (key, content_hash, etag, last_modified, now, now))
+            if previous and previous[0] != content_hash:
+                self._drop_orphan_blob(previous[0])
+            self._evict()
+            self.conn.commit()
+
+    def touch(self, url):
+        """Отметка успешной ревалидации (ответ 304): запись снова свежая"""
+        with self.lock:
+            now = time.time()
+            self.conn.execute('UPDATE entries SET fetched_at = ?, accessed_at = ? WHERE url = ?',
+                              (now, now, canonical_url(url)))
+            self.conn.commit()
+
+    def conditional_headers(self, entry):
+        """Заголовки условного запроса для устаревшей записи"""
+        headers = {}
+        if entry and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def fetch(self, session, url, revalidate=False):
+        """
+        Получение страницы через кэш
+
+        Свежая запись возвращается без обращения к сети; устаревшая
+        ревалидируется условным запросом.
+
+        Args:
+            session: HTTP-сессия для загрузки
+            url: URL страницы
+            revalidate: Проверить страницу на сервере даже для свежей записи
+
+        Returns:
+            Байты HTML страницы
+
+        Raises:
+            requests.RequestException: при сетевой или HTTP ошибке
+        """
+        entry = self.lookup(url)
+        if entry and entry.fresh and not revalidate:
+            return entry.content
+
+        response = session.get(url, headers=self.conditional_headers(entry))
+        if entry and response.status_code == 304:
+            self.touch(url)
+            return entry.content
+        response.raise_for_status()
+        self.store(url, response.content, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return response.content
+
+    def _drop_orphan_blob(self, content_hash):
+        """Удаление файла, на который больше не ссылается ни одна запись"""
+        if self.conn.execute('SELECT 1 FROM entries WHERE content_hash = ? LIMIT 1', (content_hash,)).fetchone():
+            return
+        self.conn.execute('DELETE FROM blobs WHERE content_hash = ?', (content_hash,))
+        try:
+            os.remove(self.blob_path(content_hash))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """Вытеснение давно не использованных записей при превышении размера"""
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM blobs').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, content_hash in self.conn.execute(
+                'SELECT url, content_hash FROM entries ORDER BY accessed_at').fetchall():
+            size = self.conn.execute('SELECT size FROM blobs WHERE content_hash = ?', (content_hash,)).fetchone()
+            self.conn.execute('DELETE FROM entries WHERE url = ?', (url,))
+            self._drop_orphan_blob(content_hash)
+            if size and not self.conn.execute('SELECT 1 FROM blobs WHERE content_hash = ?', (content_hash,)).fetchone():
+                total -= size[0]
+            if total <= self.max_bytes:
+                break
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_cache():
+    """Общий экземпляр кэша для процесса"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = HtmlCache()
+        return _default_cache
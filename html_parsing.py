@@ -0,0 +1,46 @@
+"""
+Общая настройка разбора HTML: выбор парсера BeautifulSoup для всех модулей
+"""
+
+import logging
+
+from bs4 import BeautifulSoup, FeatureNotFound
+
+import bot_config
+
+# Парсер, используемый, если настроенный недоступен (входит в стандартную библиотеку)
+FALLBACK_PARSER = 'html.parser'
+
+_unavailable = set()
+
+
+def make_soup(markup, parser=None):
+    """
+    Разбор HTML выбранным парсером
+
+    Args:
+        markup: HTML в байтах (предпочтительно - кодировку определяет парсер) или строкой
+        parser: Имя парсера BeautifulSoup; по умолчанию bot_config.HTML_PARSER
+
+    Returns:
+        Объект BeautifulSoup
+    """
+    parser = parser or bot_config.HTML_PARSER
+    if parser not in _unavailable:
+        try:
+            return BeautifulSoup(markup, parser)
+        except FeatureNotFound:
+            _unavailable.add(parser)
+            logging.getLogger(__name__).warning(
+                f"Парсер {parser} не установлен, используется {FALLBACK_PARSER}"
+            )
+    return BeautifulSoup(markup, FALLBACK_PARSER)
+
+
+def fragment_root(soup):
+    """
+    Корень фрагмента HTML
+
+    lxml и html5lib оборачивают фрагмент в <html><body>, html.parser - нет.
+    """
+    return soup.body or soup
@@ -0,0 +1,202 @@
+"""
+Общий HTTP-транспорт: пул соединений по хостам, сжатие, таймауты по умолчанию,
+повторы и ограничение частоты запросов к каждому хосту
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import brotli  # noqa: F401 - urllib3 распаковывает br только при наличии brotli
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+DEFAULT_HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept-Encoding': ACCEPT_ENCODING,
+}
+
+# (таймаут соединения, таймаут чтения), секунды
+DEFAULT_TIMEOUT = (10, 30)
+
+# Число пулов (хостов) и соединений в пуле одного хоста
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 32
+
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+# Ограничение частоты по хостам: (запросов в секунду, размер всплеска)
+DEFAULT_RATE_LIMIT = (5.0, 10)
+HOST_RATE_LIMITS = {
+    'api.telegra.ph': (2.0, 5),
+    'telegra.ph': (2.0, 5),
+    'www.nakedcapitalism.com': (2.0, 4),
+}
+
+
+def backoff_delay(attempt):
+    """Задержка перед повтором номер attempt (начиная с 0): full jitter"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def parse_retry_after(value):
+    """Значение заголовка Retry-After (секунды или HTTP-дата) в секундах; None, если не распознано"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """Корзина токенов одного хоста с возможностью паузы (FLOOD_WAIT, Retry-After)"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Ожидание и получение одного токена"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Приостановка выдачи токенов на seconds секунд; после паузы - без всплеска"""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+            self.updated = self.paused_until
+
+
+class RateLimiter:
+    """Набор корзин токенов по хостам, общий для всех исходящих запросов"""
+
+    def __init__(self, host_limits=None, default_limit=DEFAULT_RATE_LIMIT):
+        self.host_limits = dict(HOST_RATE_LIMITS if host_limits is None else host_limits)
+        self.default_limit = default_limit
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, url):
+        """Корзина хоста из URL"""
+        host = (urlsplit(url).hostname or '').lower()
+        with self.lock:
+            if host not in self.buckets:
+                rate, capacity = self.host_limits.get(host, self.default_limit)
+                self.buckets[host] = TokenBucket(rate, capacity)
+            return self.buckets[host]
+
+    def acquire(self, url):
+        self.bucket(url).acquire()
+
+    def pause(self, url, seconds):
+        """Пауза только для хоста из URL"""
+        self.bucket(url).pause(seconds)
+
+
+class HttpTransport(requests.Session):
+    """
+    Сессия requests с общими настройками для всех клиентов бота
+
+    Повторяет идемпотентные запросы при сетевых ошибках и ответах 429/5xx
+    с экспоненциальной задержкой и случайным разбросом (full jitter).
+    Перед каждой попыткой берет токен из корзины хоста; Retry-After
+    приостанавливает корзину этого хоста, а не весь транспорт.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_retries=MAX_RETRIES,
+                 pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                 limiter=None):
+        super().__init__()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.limiter = limiter or RateLimiter()
+        self.headers.update(DEFAULT_HEADERS)
+
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+
+    def backoff(self, attempt):
+        """Задержка перед повтором номер attempt (начиная с 0)"""
+        return backoff_delay(attempt)
+
+    def request(self, method, url, **kwargs):
+        """Выполнение запроса с таймаутом по умолчанию и повторами"""
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        retryable = method.upper() in IDEMPOTENT_METHODS
+
+        attempt = 0
+        while True:
+            self.limiter.acquire(url)
+            delay = self.backoff(attempt)
+            try:
+                response = super().request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if not retryable or attempt >= self.max_retries:
+                    raise
+            else:
+                status = response.status_code
+                # 429 означает, что запрос отклонен без обработки - его можно повторить для любого метода
+                if (status not in RETRY_STATUSES or (not retryable and status != 429)
+                        or attempt >= self.max_retries):
+                    return response
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if retry_after is not None:
+                    # Ожидание переносится в корзину хоста: ждут только запросы к нему
+                    self.limiter.pause(url, retry_after)
+                    delay = 0
+                response.close()
+
+            time.sleep(delay)
+            attempt += 1
+
+
+_default_transport = None
+_default_lock = threading.Lock()
+
+
+def get_transport():
+    """Общий экземпляр транспорта для всех клиентов процесса"""
+    global _default_transport
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = HttpTransport()
+        return _default_transport
@@ -0,0 +1,248 @@
+"""
+Изображения статей в Telegraph: параллельная загрузка с сайта, дедупликация
+по хэшу содержимого и однократная выгрузка каждого уникального изображения
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+import requests
+
+import bot_config
+import http_transport
+
+# Форматы, которые принимает Telegraph, по сигнатуре файла
+IMAGE_SIGNATURES = [
+    (b'\xff\xd8\xff', 'image/jpeg', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png', 'png'),
+    (b'GIF87a', 'image/gif', 'gif'),
+    (b'GIF89a', 'image/gif', 'gif'),
+]
+DOWNLOAD_CHUNK_SIZE = 65536
+
+
+def detect_image_type(data):
+    """(MIME-тип, расширение) изображения или None, если формат не поддерживается Telegraph"""
+    for signature, mime, extension in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return mime, extension
+    return None
+
+
+def collect_images(nodes):
+    """Узлы img списка Telegraph Node, сгруппированные по src (в порядке документа)"""
+    images = {}
+    stack = list(reversed(nodes))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            continue
+        if node.get('tag') == 'img':
+            src = (node.get('attrs') or {}).get('src')
+            if src and src.startswith(('http://', 'https://')):
+                images.setdefault(src, []).append(node)
+        stack.extend(reversed(node.get('children', ())))
+    return images
+
+
+class ImageStore:
+    """
+    Хранилище выгруженных в Telegraph изображений
+
+    Индекс в SQLite: URL источника -> хэш содержимого -> адрес в Telegraph.
+    Известный URL не загружается повторно, а одинаковое содержимое под разными
+    адресами (графики, повторяющиеся в ежедневных записях) выгружается один раз.
+    """
+
+    def __init__(self, directory=None, transport=None, upload_url=None, concurrency=None, max_bytes=None):
+        """
+        Args:
+            directory: Каталог индекса
+            transport: HTTP-транспорт для загрузки и выгрузки (по умолчанию общий)
+            upload_url: Адрес выгрузки файлов (по умолчанию bot_config.TELEGRAPH_UPLOAD_URL)
+            concurrency: Число параллельных загрузок
+            max_bytes: Максимальный размер изображения (больше - остается ссылка на сайт)
+        """
+        self.directory = directory or bot_config.IMAGE_STORE_DIR
+        self.session = transport or http_transport.get_transport()
+        self.upload_url = upload_url or bot_config.TELEGRAPH_UPLOAD_URL
+        self.concurrency = concurrency or bot_config.IMAGE_DOWNLOAD_CONCURRENCY
+        self.max_bytes = max_bytes if max_bytes is not None else bot_config.MAX_IMAGE_BYTES
+        self.logger = logging.getLogger(__name__)
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(self.directory, 'index.db'), check_same_thread=False)
+        self.setup_database()
+
+    def setup_database(self):
+        """Индекс: источники и уникальные изображения"""
+        with self.lock:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS sources (
+                    url TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                )
+            ''')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS images (
+                    content_hash TEXT PRIMARY KEY,
+                    telegraph_url TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    uploaded_at REAL NOT NULL
+                )
+            ''')
+            self.conn.commit()
+
+    def lookup(self, src):
+        """Адрес изображения в Telegraph по URL источника или None"""
+        with self.lock:
+            row = self.conn.execute('''
+                SELECT images.telegraph_url FROM sources
+                JOIN images ON images.content_hash = sources.content_hash
+                WHERE sources.url = ?
+            ''', (src,)).fetchone()
+        return row[0] if row else None
+
+    def lookup_hash(self, content_hash):
+        """Адрес изображения в Telegraph по хэшу содержимого или None"""
+        with self.lock:
+            row = self.conn.execute('SELECT telegraph_url FROM images WHERE content_hash = ?',
+                                    (content_hash,)).fetchone()
+        return row[0] if row else None
+
+    def remember(self, src, content_hash, telegraph_url=None, size=0):
+        """Сохранение источника и (если выгружено) адреса изображения"""
+        now = time.time()
+        with self.lock:
+            if telegraph_url:
+                self.conn.execute('''
+                    INSERT OR IGNORE INTO images (content_hash, telegraph_url, size, uploaded_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (content_hash, telegraph_url, size, now))
+            self.conn.execute('INSERT OR REPLACE INTO sources (url, content_hash, fetched_at) VALUES (?, ?, ?)',
+                              (src, content_hash, now))
+            self.conn.commit()
+
+    def download(self, src):
+        """
+        Загрузка изображения с сайта
+
+        Returns:
+            Байты изображения или None (ошибка, неподдерживаемый формат или больше max_bytes)
+        """
+        try:
+            with self.session.get(src, stream=True) as response:
+                response.raise_for_status()
+                chunks, size = [], 0
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        self.logger.info(f"Изображение {src} больше {self.max_bytes // 1024} КБ, остается ссылка на сайт")
+                        return None
+                    chunks.append(chunk)
+        except requests.RequestException as e:
+            self.logger.error(f"Ошибка при загрузке изображения {src}: {e}")
+            return None
+        data = b''.join(chunks)
+        if not detect_image_type(data):
+            self.logger.info(f"Формат изображения {src} не поддерживается Telegraph, остается ссылка на сайт")
+            return None
+        return data
+
+    def upload(self, data):
+        """
+        Выгрузка изображения в Telegraph
+
+        Returns:
+            Полный адрес изображения или None при ошибке
+        """
+        mime, extension = detect_image_type(data)
+        try:
+            response = self.session.post(self.upload_url, files={'file': (f'image.{extension}', data, mime)})
+            response.raise_for_status()
+            result = response.json()
+        except (requests.RequestException, ValueError) as e:
+            self.logger.error(f"Ошибка при выгрузке изображения: {e}")
+            return None
+        # Ответ: [{"src": "/file/....jpg"}] или {"error": "..."}
+        if isinstance(result, list) and result and result[0].get('src'):
+            return urljoin(self.upload_url, result[0]['src'])
+        self.logger.error(f"Ошибка при выгрузке изображения: {result}")
+        return None
+
+    def rehost_images(self, nodes):
+        """
+        Замена адресов изображений в узлах на адреса в Telegraph (узлы изменяются на месте)
+
+        Уже известные источники заменяются по индексу; остальные загружаются
+        параллельно, и каждое новое содержимое выгружается один раз. Изображения,
+        которые не удалось загрузить или выгрузить, остаются ссылками на сайт.
+
+        Returns:
+            Число изображений, выгруженных в этом вызове
+        """
+        images = collect_images(nodes)
+        hosted = {}
+        missing = []
+        for src in images:
+            telegraph_url = self.lookup(src)
+            if telegraph_url:
+                hosted[src] = telegraph_url
+            else:
+                missing.append(src)
+
+        uploaded = 0
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(missing))) as executor:
+                downloaded = dict(zip(missing, executor.map(self.download, missing)))
+
+            # Одинаковое содержимое под разными адресами выгружается один раз
+            by_hash = {}
+            for src, data in downloaded.items():
+                if data is not None:
+                    by_hash.setdefault(hashlib.sha256(data).hexdigest(), []).append(src)
+            new_hashes = [h for h in by_hash if not self.lookup_hash(h)]
+            with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(new_hashes)))) as executor:
+                uploads = dict(zip(new_hashes, executor.map(
+                    lambda content_hash: self.upload(downloaded[by_hash[content_hash][0]]), new_hashes)))
+
+            for content_hash, sources in by_hash.items():
+                telegraph_url = uploads.get(content_hash) or self.lookup_hash(content_hash)
+                if content_hash in uploads and telegraph_url:
+                    uploaded += 1
+                for src in sources:
+                    if telegraph_url:
+                        self.remember(src, content_hash, telegraph_url, len(downloaded[src]))
+                        hosted[src] = telegraph_url
+
+        for src, telegraph_url in hosted.items():
+            for node in images[src]:
+                node['attrs']['src'] = telegraph_url
+        if images:
+            self.logger.info(f"Изображений: {len(images)}, в Telegraph: {len(hosted)}, выгружено новых: {uploaded}")
+        return uploaded
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_image_store():
+    """Общий экземпляр хранилища изображений для процесса"""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = ImageStore()
+        return _default_store
@@ -7,7 +7,11 @@ import logging
 from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, ContextTypes, CallbackQueryHandler
+from telegram.helpers import escape_markdown
 from article_monitor import NakedCapitalismMonitor
+import async_http
+import bot_config
+from summarizer import summary_preview
 from telegraph_article_converter import TelegraphArticleConverter
 
 # Настройка логирования
@@ -38,12 +42,14 @@ class IntegratedNakedCapBot:
         self.application.add_handler(CommandHandler("latest", self.latest_articles))
         self.application.add_handler(CommandHandler("stats", self.stats))
         self.application.add_handler(CommandHandler("monitor", self.toggle_monitoring))
+        self.application.add_handler(CommandHandler("links", self.articles_linking_to))
         
         # Telegraph команды
         self.application.add_handler(CommandHandler("publish", self.publish_to_telegraph))
         self.application.add_handler(CommandHandler("publish_all", self.publish_all_unpublished))
         self.application.add_handler(CommandHandler("telegraph_stats", self.telegraph_stats))
         self.application.add_handler(CommandHandler("telegraph_latest", self.telegraph_latest))
+        self.application.add_handler(CommandHandler("refresh", self.refresh_published))
         
         # Inline кнопки
         self.application.add_handler(CallbackQueryHandler(self.button_callback))
@@ -86,11 +92,13 @@ class IntegratedNakedCapBot:
             "• `/check` - Проверить новые статьи\n"
             "• `/latest` - Последние статьи\n"
             "• `/stats` - Статистика\n"
-            "• `/monitor` - Управление мониторингом\n\n"
+            "• `/monitor` - Управление мониторингом\n"
+            "• `/links <домен> [дней]` - Статьи со ссылками на домен\n\n"
             "📚 **Всего статей:** {}\n\n"
             "📝 **Telegraph команды:**\n"
             "• `/publish [id]` - Опубликовать статью в Telegraph\n"
-            "• `/publish_all` - Опубликовать все неопубликованные статьи"
+            "• `/publish_all` - Опубликовать все неопубликованные статьи\n"
+            "• `/refresh [дней]` - Обновить страницы Telegraph измененных статей"
         ).format(
                 self.get_total_articles_count()
             )
@@ -118,7 +126,7 @@ class IntegratedNakedCapBot:
         query = ' '.join(context.args).lower()
         
         # Поиск в обычных статьях
-        cursor = self.monitor.conn.cursor()
+        cursor = self.monitor.db.reader().cursor()
         cursor.execute('''
             SELECT title, url, author, date_posted
             FROM articles 
@@ -156,13 +164,27 @@ class IntegratedNakedCapBot:
             return
         
         try:
-            new_articles = self.monitor.check_for_new_articles()
+            new_articles = await self.monitor.check_for_new_articles_async()
             
             if new_articles:
+                # Текст новых статей загружается один раз: краткое содержание и индекс ссылок
+                summaries = {}
+                try:
+                    summaries = await asyncio.to_thread(
+                        self.telegraph_converter.processor.ingest_articles,
+                        [article['url'] for article in new_articles]
+                    )
+                except Exception as e:
+                    logger.error(f"Ошибка при обработке текста новых статей: {e}")
+                
                 response = f"✅ **Найдено {len(new_articles)} новых статей!**\n\n"
                 for i, article in enumerate(new_articles[:5], 1):
                     response += f"**{i}.** {article['title'][:50]}...\n"
-                    response += f"   👤 {article['author']} | 📅 {article['date_posted']}\n\n"
+                    response += f"   👤 {article['author']} | 📅 {article['date_posted']}\n"
+                    summary = summaries.get(article['url'])
+                    if summary:
+                        response += f"   💬 {escape_markdown(summary_preview(summary, 300))}\n"
+                    response += "\n"
                 
                 if len(new_articles) > 5:
                     response += f"... и еще {len(new_articles) - 5} статей\n\n"
@@ -184,7 +206,7 @@ class IntegratedNakedCapBot:
                     )
                     # Получаем ID новых статей и публикуем
                     try:
-                        cursor = self.monitor.conn.cursor()
+                        cursor = self.monitor.db.reader().cursor()
                         article_ids = []
                         for article in new_articles:
                             cursor.execute("SELECT id FROM articles WHERE url = ?", (article['url'],))
@@ -193,7 +215,10 @@ class IntegratedNakedCapBot:
                                 article_ids.append(result[0])
                         
                         if article_ids:
-                            results = self.telegraph_converter.publish_multiple_articles(article_ids=article_ids)
+                            # Публикация использует блокирующий HTTP - выполняем вне event loop
+                            results = await asyncio.to_thread(
+                                self.telegraph_converter.publish_multiple_articles, article_ids=article_ids
+                            )
                             successful = sum(1 for r in results if r['success'])
                             response += f"\n\n✅ Автоматически опубликовано в Telegraph: {successful}/{len(results)}"
                             await message.edit_text(
@@ -237,12 +262,7 @@ class IntegratedNakedCapBot:
                 start_num = offset + 1
                 for i, article in enumerate(latest):
                     article_num = start_num + i
-                    # Обработка случая с telegraph_url (может быть или не быть)
-                    if len(article) >= 6:
-                        title, url, author, date_posted, created_at, telegraph_url = article
-                    else:
-                        title, url, author, date_posted, created_at = article
-                        telegraph_url = None
+                    title, url, author, date_posted, created_at, telegraph_url, summary = article
                     
                     response += f"**{article_num}.** [{title}]({url})\n"
                     response += f"   👤 {author} | 📅 {date_posted}"
@@ -251,6 +271,10 @@ class IntegratedNakedCapBot:
                     if telegraph_url and telegraph_url.strip():
                         response += f" | [📝 Telegraph]({telegraph_url})"
                     
+                    # Сохраненное краткое содержание (без загрузки статьи)
+                    if summary:
+                        response += f"\n   💬 {escape_markdown(summary_preview(summary, 120))}"
+                    
                     response += "\n\n"
                 
                 # Создаем кнопки навигации
@@ -306,7 +330,7 @@ class IntegratedNakedCapBot:
     async def stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Статистика"""
         try:
-            cursor = self.monitor.conn.cursor()
+            cursor = self.monitor.db.reader().cursor()
             cursor.execute("SELECT COUNT(*) FROM articles")
             total_articles = cursor.fetchone()[0]
             
@@ -354,7 +378,7 @@ class IntegratedNakedCapBot:
             article_id = int(context.args[0])
             message = await update.message.reply_text(f"📤 Публикация статьи {article_id} в Telegraph...")
             
-            result = self.telegraph_converter.publish_article_to_telegraph(article_id)
+            result = await asyncio.to_thread(self.telegraph_converter.publish_article_to_telegraph, article_id)
             
             if result:
                 response = (
@@ -385,7 +409,7 @@ class IntegratedNakedCapBot:
         message = await update.message.reply_text(f"📤 Публикация до {limit} неопубликованных статей в Telegraph...")
         
         try:
-            results = self.telegraph_converter.publish_multiple_articles(limit=limit)
+            results = await asyncio.to_thread(self.telegraph_converter.publish_multiple_articles, limit=limit)
             
             successful = sum(1 for r in results if r['success'])
             failed = len(results) - successful
@@ -408,6 +432,74 @@ class IntegratedNakedCapBot:
             logger.error(f"Ошибка при массовой публикации: {e}")
             await message.edit_text(f"❌ Произошла ошибка: {str(e)}")
     
+    async def refresh_published(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Обновление страниц Telegraph для статей, измененных на сайте"""
+        days = bot_config.REFRESH_WINDOW_DAYS
+        if context.args:
+            try:
+                days = int(context.args[0])
+            except ValueError:
+                pass
+        
+        message = await update.message.reply_text(f"🔄 Проверка статей, опубликованных за {days} дн...")
+        
+        try:
+            stats = await asyncio.to_thread(self.telegraph_converter.refresh_published_articles, days)
+            response = (
+                f"🔄 **Обновление статей:**\n\n"
+                f"🔍 Проверено: {stats['checked']}\n"
+                f"✏️ Обновлено: {stats['edited']}\n"
+                f"✅ Без изменений: {stats['unchanged']}\n"
+                f"❌ Ошибок: {stats['failed']}"
+            )
+            await message.edit_text(response, parse_mode='Markdown')
+            
+        except Exception as e:
+            logger.error(f"Ошибка при обновлении статей: {e}")
+            await message.edit_text(f"❌ Произошла ошибка: {str(e)}")
+    
+    async def articles_linking_to(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Статьи со ссылками на домен за последние дни (по индексу article_links)"""
+        if not context.args:
+            await update.message.reply_text(
+                "🔗 Укажите домен: `/links ft.com` или `/links ft.com 7`",
+                parse_mode='Markdown'
+            )
+            return
+        
+        domain = context.args[0]
+        days = bot_config.LINKS_WINDOW_DAYS
+        if len(context.args) > 1:
+            try:
+                days = int(context.args[1])
+            except ValueError:
+                pass
+        
+        try:
+            articles = self.telegraph_converter.processor.find_articles_linking_to(domain, days)
+            if articles:
+                response = f"🔗 **Статьи со ссылками на {escape_markdown(domain)} за {days} дн:**\n\n"
+                for i, (title, url, created_at, count) in enumerate(articles, 1):
+                    response += f"**{i}.** [{title}]({url})\n"
+                    response += f"   📅 {created_at[:10]} | 🔗 Ссылок: {count}\n\n"
+            else:
+                response = f"📝 За {days} дн статей со ссылками на {escape_markdown(domain)} не найдено"
+            
+            await update.message.reply_text(response, parse_mode='Markdown', disable_web_page_preview=True)
+            
+        except Exception as e:
+            logger.error(f"Ошибка при поиске ссылок на {domain}: {e}")
+            await update.message.reply_text("❌ Произошла ошибка при поиске")
+    
+    async def refresh_loop(self):
+        """Периодическое обновление страниц Telegraph измененных статей"""
+        while True:
+            await asyncio.sleep(bot_config.REFRESH_INTERVAL_HOURS * 3600)
+            try:
+                await asyncio.to_thread(self.telegraph_converter.refresh_published_articles)
+            except Exception as e:
+                logger.error(f"Ошибка при обновлении статей: {e}")
+    
     async def telegraph_stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Статистика публикаций в Telegraph"""
         try:
@@ -518,7 +610,7 @@ class IntegratedNakedCapBot:
     def get_total_articles_count(self):
         """Получение общего количества статей в базе"""
         try:
-            cursor = self.monitor.conn.cursor()
+            cursor = self.monitor.db.reader().cursor()
             cursor.execute("SELECT COUNT(*) FROM articles")
             return cursor.fetchone()[0]
         except:
@@ -531,15 +623,22 @@ class IntegratedNakedCapBot:
         await self.application.start()
         await self.application.updater.start_polling(allowed_updates=Update.ALL_TYPES)
         
+        refresh_task = None
+        if bot_config.REFRESH_INTERVAL_HOURS:
+            refresh_task = asyncio.create_task(self.refresh_loop())
+        
         # Ожидание завершения
         try:
             await asyncio.Event().wait()
         except KeyboardInterrupt:
             pass
         finally:
+            if refresh_task:
+                refresh_task.cancel()
             await self.application.updater.stop()
             await self.application.stop()
             await self.application.shutdown()
+            await async_http.close_session()
 
 def main():
     """Основная функция"""
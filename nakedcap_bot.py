@@ -9,7 +9,12 @@ import time
 from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, ContextTypes, CallbackQueryHandler
+from telegram.helpers import escape_markdown
 from article_monitor import NakedCapitalismMonitor
+from article_processor import ArticleProcessor
+from adaptive_schedule import AdaptivePollScheduler, schedule_adaptive
+from summarizer import summary_preview
+import async_http
 
 # Настройка логирования
 logging.basicConfig(
@@ -22,6 +27,10 @@ class NakedCapBot:
     def __init__(self, bot_token):
         self.bot_token = bot_token
         self.monitor = NakedCapitalismMonitor()
+        self.processor = ArticleProcessor()
+        # Фоновые задачи обработки текста (ссылки держатся до завершения задачи)
+        self.background_tasks = set()
+        self.loop = None
         self.application = Application.builder().token(bot_token).build()
         self.setup_handlers()
         self.setup_scheduler()
@@ -40,10 +49,15 @@ class NakedCapBot:
         self.application.add_error_handler(self.error_handler)
     
     def setup_scheduler(self):
-        """Настройка планировщика для автоматической проверки"""
-        schedule.every().hour.do(self.scheduled_check)
+        """Настройка планировщика для автоматической проверки (адаптивный интервал)"""
+        schedule_adaptive(AdaptivePollScheduler(), self.run_scheduled_check)
         self.monitoring_active = True
     
+    def run_scheduled_check(self):
+        """Запуск scheduled_check в event loop бота из потока планировщика"""
+        if self.loop:
+            asyncio.run_coroutine_threadsafe(self.scheduled_check(), self.loop)
+    
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Обработчик команды /start"""
         user = update.effective_user
@@ -58,7 +72,7 @@ class NakedCapBot:
         welcome_message = (
             f"Привет, {user.first_name}! 👋\n\n"
             f"🤖 Я бот для мониторинга статей с сайта [Naked Capitalism](https://www.nakedcapitalism.com/)\n\n"
-            f"📰 Каждый час я проверяю новые статьи и уведомляю вас\n"
+            f"📰 Я проверяю новые статьи чаще в часы, когда они обычно выходят, и уведомляю вас\n"
             f"🔔 Используйте кнопки ниже или команды для управления\n\n"
             f"📋 Доступные команды:\n"
             f"/check - Проверить новые статьи сейчас\n"
@@ -83,7 +97,7 @@ class NakedCapBot:
             "📊 /stats - Статистика мониторинга\n"
             "⚙️ /monitor - Включить/выключить автоматический мониторинг\n"
             "❓ /help - Показать это сообщение\n\n"
-            "🤖 Бот автоматически проверяет новые статьи каждый час\n"
+            "🤖 Бот автоматически проверяет новые статьи по адаптивному расписанию\n"
             "📰 Уведомления приходят при обнаружении новых статей"
         )
         await update.message.reply_text(help_text)
@@ -93,7 +107,7 @@ class NakedCapBot:
         message = await update.message.reply_text("🔍 Проверяю новые статьи...")
         
         try:
-            new_articles = self.monitor.check_for_new_articles()
+            new_articles = await self.monitor.check_for_new_articles_async()
             
             if new_articles:
                 response = f"✅ Найдено {len(new_articles)} новых статей!\n\n"
@@ -110,6 +124,8 @@ class NakedCapBot:
                     parse_mode='Markdown',
                     disable_web_page_preview=True
                 )
+                # Текст статей загружается после ответа: пользователь не ждет загрузки всех статей
+                self.ingest_in_background(new_articles)
             else:
                 await message.edit_text("📝 Новых статей не найдено")
                 
@@ -125,9 +141,12 @@ class NakedCapBot:
             if latest:
                 response = "📚 Последние статьи:\n\n"
                 for i, article in enumerate(latest, 1):
-                    title, url, author, date_posted, created_at = article
+                    title, url, author, date_posted, created_at, telegraph_url, summary = article
                     response += f"{i}. 📰 [{title}]({url})\n"
-                    response += f"   👤 {author} | 📅 {date_posted}\n\n"
+                    response += f"   👤 {author} | 📅 {date_posted}\n"
+                    if summary:
+                        response += f"   💬 {escape_markdown(summary_preview(summary, 120))}\n"
+                    response += "\n"
                 
                 await update.message.reply_text(
                     response,
@@ -144,7 +163,7 @@ class NakedCapBot:
     async def stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Статистика мониторинга"""
         try:
-            cursor = self.monitor.conn.cursor()
+            cursor = self.monitor.db.reader().cursor()
             cursor.execute("SELECT COUNT(*) FROM articles")
             total_articles = cursor.fetchone()[0]
             
@@ -199,15 +218,29 @@ class NakedCapBot:
             return
         
         try:
-            new_articles = self.monitor.check_for_new_articles()
+            new_articles = await self.monitor.check_for_new_articles_async()
             
             if new_articles:
                 # Отправка уведомлений всем пользователям
                 await self.notify_users_about_new_articles(new_articles)
+                await self.ingest_new_articles(new_articles)
                 
         except Exception as e:
             logger.error(f"Ошибка в планируемой проверке: {e}")
     
+    async def ingest_new_articles(self, articles):
+        """Загрузка текста новых статей: краткое содержание и индекс ссылок сохраняются в базе"""
+        try:
+            await asyncio.to_thread(self.processor.ingest_articles, [article['url'] for article in articles])
+        except Exception as e:
+            logger.error(f"Ошибка при обработке текста новых статей: {e}")
+    
+    def ingest_in_background(self, articles):
+        """Запуск ingest_new_articles фоновой задачей"""
+        task = asyncio.create_task(self.ingest_new_articles(articles))
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+    
     async def notify_users_about_new_articles(self, articles):
         """Уведомление пользователей о новых статьях"""
         # Здесь можно добавить логику для отправки уведомлений
@@ -226,6 +259,8 @@ class NakedCapBot:
     
     async def run(self):
         """Запуск бота"""
+        self.loop = asyncio.get_running_loop()
+        
         # Запуск планировщика в фоновом режиме
         import threading
         scheduler_thread = threading.Thread(target=self.run_scheduler, daemon=True)
@@ -245,6 +280,7 @@ class NakedCapBot:
             await self.application.updater.stop()
             await self.application.stop()
             await self.application.shutdown()
+            await async_http.close_session()
 
 def main():
     """Основная функция"""
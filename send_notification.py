@@ -68,7 +68,7 @@ async def send_article_notification():
             
             print("✅ Отправлено сообщение о отсутствии новых статей")
         
-        monitor.conn.close()
+        monitor.db.close()
         
     except Exception as e:
         print(f"❌ Ошибка при отправке уведомления: {e}")
@@ -91,7 +91,7 @@ async def send_single_article_notification():
         latest_articles = monitor.get_latest_articles(1)
         
         if latest_articles:
-            title, url, author, date_posted, created_at = latest_articles[0]
+            title, url, author, date_posted, created_at = latest_articles[0][:5]
             
             message = (
                 f"📰 **Новая статья с Naked Capitalism**\n\n"
@@ -112,7 +112,7 @@ async def send_single_article_notification():
         else:
             print("❌ Статьи не найдены")
         
-        monitor.conn.close()
+        monitor.db.close()
         
     except Exception as e:
         print(f"❌ Ошибка: {e}")
@@ -149,7 +149,7 @@ def main():
         else:
             print("📝 Новых статей не найдено")
         
-        monitor.conn.close()
+        monitor.db.close()
     else:
         print("❌ Неверный выбор")
 
@@ -2,10 +2,10 @@
 Отправка уведомления о новой статье через Telegram API
 """
 
-import requests
 import json
 from datetime import datetime
 from article_monitor import NakedCapitalismMonitor
+from http_transport import get_transport
 
 def send_telegram_notification():
     """Отправка уведомления через Telegram API"""
@@ -36,7 +36,7 @@ def send_telegram_notification():
             print("❌ Статьи не найдены")
             return False
         
-        title, url, author, date_posted, created_at = latest_articles[0]
+        title, url, author, date_posted, created_at = latest_articles[0][:5]
         
         # Формирование сообщения
         message = (
@@ -64,7 +64,7 @@ def send_telegram_notification():
         print(f"   Статья: {title}")
         
         # Отправка запроса
-        response = requests.post(url_api, json=data, timeout=30)
+        response = get_transport().post(url_api, json=data)
         
         if response.status_code == 200:
             result = response.json()
@@ -104,7 +104,7 @@ def send_telegram_notification():
         print(f"❌ Ошибка при отправке: {e}")
         return False
     finally:
-        monitor.conn.close()
+        monitor.db.close()
 
 def get_chat_id():
     """Получение Chat ID через getUpdates API"""
@@ -113,7 +113,7 @@ def get_chat_id():
     
     try:
         url = f"https://api.telegram.org/bot{BOT_TOKEN}/getUpdates"
-        response = requests.get(url, timeout=30)
+        response = get_transport().get(url)
         
         if response.status_code == 200:
             data = response.json()
@@ -197,7 +197,7 @@ def main():
         else:
             print("📝 Новых статей не найдено")
         
-        monitor.conn.close()
+        monitor.db.close()
     
     else:
         print("❌ Неверный выбор")
@@ -0,0 +1,123 @@
+"""
+Отпечатки SimHash текста статей для поиска перепубликаций
+
+Отпечаток строится по шинглам (тройкам слов) текста, поэтому у почти одинаковых
+текстов он отличается в немногих битах. 64 бита делятся на 4 полосы по 16 бит:
+если расстояние Хэмминга не больше 3, хотя бы одна полоса совпадает точно, и
+кандидаты находятся по индексам полос без перебора всей таблицы.
+"""
+
+import hashlib
+import re
+
+BITS = 64
+BANDS = 4
+BAND_BITS = BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+# Максимальное расстояние Хэмминга для почти дубликата (должно быть меньше BANDS)
+MAX_DISTANCE = 3
+
+SHINGLE_SIZE = 3
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def shingles(text):
+    """Тройки соседних слов текста (для короткого текста - весь текст)"""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= SHINGLE_SIZE:
+        return [' '.join(words)] if words else []
+    return [' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+
+
+def simhash(text):
+    """
+    SimHash текста
+
+    Returns:
+        64-битный отпечаток (беззнаковое целое) или None для текста без слов
+    """
+    features = shingles(text or '')
+    if not features:
+        return None
+    # Хеши всех признаков подряд одной строкой из '0' и '1': бит i каждого хеша -
+    # срез с шагом BITS, и единицы по столбцам считаются в C, без цикла по признакам
+    digests = b''.join(hashlib.blake2b(feature.encode(), digest_size=BITS // 8).digest()
+                       for feature in features)
+    bits = format(int.from_bytes(digests, 'big'), f'0{len(digests) * 8}b')
+    half = len(features) / 2
+    fingerprint = 0
+    for index in range(BITS):
+        fingerprint = (fingerprint << 1) | (bits[index::BITS].count('1') > half)
+    return fingerprint
+
+
+def hamming_distance(a, b):
+    """Число различающихся битов двух отпечатков"""
+    return bin((a ^ b) & ((1 << BITS) - 1)).count('1')
+
+
+def bands(fingerprint):
+    """Полосы отпечатка (по BAND_BITS бит)"""
+    return [(fingerprint >> (BAND_BITS * index)) & BAND_MASK for index in range(BANDS)]
+
+
+def to_signed(fingerprint):
+    """Отпечаток как знаковое 64-битное целое (тип INTEGER в SQLite)"""
+    return fingerprint - (1 << BITS) if fingerprint >= 1 << (BITS - 1) else fingerprint
+
+
+class SimHashIndex:
+    """Отпечатки текста статей в таблице articles с поиском почти дубликатов"""
+
+    def __init__(self, database):
+        """
+        Args:
+            database: База статей (db.Database)
+        """
+        self.db = database
+        self.setup_database()
+
+    def setup_database(self):
+        """Колонки отпечатка и полос с индексами"""
+        with self.db.write() as conn:
+            columns = [column[1] for column in conn.execute("PRAGMA table_info(articles)")]
+            if 'body_simhash' not in columns:
+                conn.execute('ALTER TABLE articles ADD COLUMN body_simhash INTEGER')
+                for index in range(BANDS):
+                    conn.execute(f'ALTER TABLE articles ADD COLUMN simhash_band{index} INTEGER')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_articles_simhash ON articles(body_simhash)')
+            for index in range(BANDS):
+                conn.execute(f'CREATE INDEX IF NOT EXISTS idx_articles_simhash_band{index} '
+                             f'ON articles(simhash_band{index})')
+
+    def store(self, article_id, fingerprint):
+        """Сохранение отпечатка статьи (внутри блока db.write - в его транзакции)"""
+        assignments = ', '.join(f'simhash_band{index} = ?' for index in range(BANDS))
+        with self.db.write() as conn:
+            conn.execute(f'UPDATE articles SET body_simhash = ?, {assignments} WHERE id = ?',
+                         (to_signed(fingerprint), *bands(fingerprint), article_id))
+
+    def find_near_duplicates(self, fingerprint, max_distance=MAX_DISTANCE, exclude_id=None):
+        """
+        Статьи с отпечатком на расстоянии не больше max_distance
+
+        Args:
+            fingerprint: Отпечаток искомого текста
+            max_distance: Допустимое расстояние Хэмминга (не больше MAX_DISTANCE)
+            exclude_id: ID статьи, которую не нужно возвращать (обычно сама статья)
+
+        Returns:
+            Список (id статьи, расстояние), ближайшие первыми
+        """
+        max_distance = min(max_distance, MAX_DISTANCE)
+        conditions = ' OR '.join(f'simhash_band{index} = ?' for index in range(BANDS))
+        cursor = self.db.reader().execute(
+            f'SELECT id, body_simhash FROM articles WHERE ({conditions}) AND id != ?',
+            (*bands(fingerprint), -1 if exclude_id is None else exclude_id))
+        matches = []
+        for article_id, other in cursor.fetchall():
+            distance = hamming_distance(fingerprint, other)
+            if distance <= max_distance:
+                matches.append((article_id, distance))
+        matches.sort(key=lambda match: (match[1], match[0]))
+        return matches
@@ -10,6 +10,8 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
 
 from article_monitor import NakedCapitalismMonitor
+from article_processor import ArticleProcessor
+import async_http
 
 # Настройка логирования
 logging.basicConfig(
@@ -27,12 +29,15 @@ BOT_TOKEN = "8114291381:AAFo7jRmm3vD_7o4Cthq8Q9pD31x3_qZWMU"
 class SimplifiedNakedCapBot:
     def __init__(self):
         self.monitor = NakedCapitalismMonitor()
+        self.processor = ArticleProcessor()
+        # Фоновые задачи обработки текста (ссылки держатся до завершения задачи)
+        self.background_tasks = set()
         self.application = None
         
     def get_total_articles_count(self):
         """Получить общее количество статей"""
         try:
-            cursor = self.monitor.conn.cursor()
+            cursor = self.monitor.db.reader().cursor()
             cursor.execute('SELECT COUNT(*) FROM articles')
             return cursor.fetchone()[0]
         except Exception as e:
@@ -102,7 +107,7 @@ class SimplifiedNakedCapBot:
     async def check_articles(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Проверка новых статей"""
         try:
-            new_articles = self.monitor.check_for_new_articles()
+            new_articles = await self.monitor.check_for_new_articles_async()
             
             if new_articles:
                 response = f"🆕 **Найдено новых статей:** {len(new_articles)}\n\n"
@@ -126,6 +131,12 @@ class SimplifiedNakedCapBot:
             else:
                 await update.message.reply_text(response, parse_mode='Markdown', reply_markup=reply_markup)
             
+            # Текст статей загружается после ответа: пользователь не ждет загрузки всех статей
+            if new_articles:
+                task = asyncio.create_task(asyncio.to_thread(self.ingest_new_articles, new_articles))
+                self.background_tasks.add(task)
+                task.add_done_callback(self.background_tasks.discard)
+            
         except Exception as e:
             logger.error(f"Ошибка при проверке статей: {e}")
             error_msg = "❌ Произошла ошибка при проверке статей"
@@ -134,10 +145,17 @@ class SimplifiedNakedCapBot:
             else:
                 await update.message.reply_text(error_msg)
 
+    def ingest_new_articles(self, articles):
+        """Загрузка текста новых статей: краткое содержание и индекс ссылок сохраняются в базе"""
+        try:
+            self.processor.ingest_articles([article['url'] for article in articles])
+        except Exception as e:
+            logger.error(f"Ошибка при обработке текста новых статей: {e}")
+
     async def latest_articles(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Показать последние статьи"""
         try:
-            cursor = self.monitor.conn.cursor()
+            cursor = self.monitor.db.reader().cursor()
             cursor.execute('''
                 SELECT title, url, author, date_posted
                 FROM articles 
@@ -199,7 +217,7 @@ class SimplifiedNakedCapBot:
         
         try:
             # Поиск в статьях
-            cursor = self.monitor.conn.cursor()
+            cursor = self.monitor.db.reader().cursor()
             cursor.execute('''
                 SELECT title, url, author, date_posted
                 FROM articles 
@@ -244,7 +262,7 @@ class SimplifiedNakedCapBot:
     async def stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Показать статистику"""
         try:
-            cursor = self.monitor.conn.cursor()
+            cursor = self.monitor.db.reader().cursor()
             
             # Общая статистика
             cursor.execute('SELECT COUNT(*) FROM articles')
@@ -339,21 +357,25 @@ class SimplifiedNakedCapBot:
         import schedule
         import time
         
+        # Поток планировщика пишет в базу через общий db.Database монитора:
+        # запись сериализуется блокировкой, чтение идет через соединение этого потока
         def check_articles_job():
             try:
                 logger.info("🔄 Автоматическая проверка новых статей...")
                 new_articles = self.monitor.check_for_new_articles()
                 if new_articles:
                     logger.info(f"✅ Найдено {len(new_articles)} новых статей")
+                    self.ingest_new_articles(new_articles)
                 else:
                     logger.info("ℹ️ Новых статей не найдено")
             except Exception as e:
                 logger.error(f"Ошибка при автоматической проверке: {e}")
         
-        # Планируем проверку каждый час
-        schedule.every().hour.do(check_articles_job)
+        # Интервал проверки подстраивается под обычное время публикаций
+        from adaptive_schedule import AdaptivePollScheduler, schedule_adaptive
+        schedule_adaptive(AdaptivePollScheduler(), check_articles_job)
         
-        logger.info("📅 Планировщик запущен - проверка каждый час")
+        logger.info("📅 Планировщик запущен - адаптивное расписание проверок")
         
         while True:
             schedule.run_pending()
@@ -406,6 +428,7 @@ class SimplifiedNakedCapBot:
             await self.application.updater.stop()
             await self.application.stop()
             await self.application.shutdown()
+            await async_http.close_session()
 
 def main():
     """Основная функция"""
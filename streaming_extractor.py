@@ -0,0 +1,174 @@
+"""
+Потоковое извлечение текста статьи: HTML разбирается по мере получения
+фрагментов ответа, без построения дерева документа
+"""
+
+import codecs
+import re
+from html.parser import HTMLParser
+
+# Поддеревья, которые пропускаются целиком
+SKIP_TAGS = {'script', 'style', 'nav', 'footer', 'header', 'aside', 'noscript', 'form'}
+SKIP_CLASS_PATTERN = re.compile(r'ads|advertisement|sponsor|promo')
+
+# Контейнеры основного контента в порядке приоритета (как в ArticleProcessor.extract_article_content)
+CONTENT_CLASSES = ['entry-content', 'post-content', 'article-content', 'content']
+CONTENT_TAGS = ['article', 'main']
+
+# Теги, закрывающие текущий текстовый блок
+BLOCK_TAGS = {
+    'p', 'div', 'li', 'ul', 'ol', 'blockquote', 'pre', 'br', 'hr', 'tr', 'td', 'th',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'section', 'article', 'main', 'figure', 'figcaption', 'table',
+}
+
+# Элементы без закрывающего тега
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+
+MIN_LINE_LENGTH = 10  # Как в content_extractor.MIN_BLOCK_LENGTH: короткие строки пропускаются
+
+
+class StreamingTextExtractor(HTMLParser):
+    """
+    Инкрементальный разбор HTML с выдачей очищенных текстовых блоков
+
+    Пропускаемые поддеревья (скрипты, навигация, реклама) отбрасываются по мере
+    прохождения. В памяти хранятся только стек открытых контейнеров и уже
+    извлеченный текст, поэтому пиковое потребление не зависит от размера разметки.
+    """
+
+    def __init__(self, encoding=None):
+        super().__init__(convert_charrefs=True)
+        self.decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+        self.skip_tag = None      # Тег пропускаемого поддерева
+        self.skip_depth = 0       # Вложенность одноименных тегов внутри него
+        self.stack = []           # Открытые теги (вне пропускаемых поддеревьев)
+        self.open_containers = []  # (позиция в стеке, приоритет) открытых контейнеров контента
+        self.buffer = []
+        self.blocks = []          # (текст, битовая маска открытых контейнеров)
+        self.best_bit = 0         # Бит лучшего контейнера, в котором уже есть текст
+        self.bytes_fed = 0
+
+    @staticmethod
+    def container_priority(tag, classes):
+        """Приоритет контейнера контента (меньше - лучше) или None"""
+        for index, name in enumerate(CONTENT_CLASSES):
+            if name in classes:
+                return index
+        if tag in CONTENT_TAGS:
+            return len(CONTENT_CLASSES) + CONTENT_TAGS.index(tag)
+        return None
+
+    def feed_bytes(self, chunk):
+        """Обработка очередного фрагмента ответа"""
+        self.bytes_fed += len(chunk)
+        self.feed(self.decoder.decode(chunk))
+
+    def handle_starttag(self, tag, attrs):
+        if self.skip_tag is not None:
+            if tag == self.skip_tag:
+                self.skip_depth += 1
+            return
+        attrs = dict(attrs)
+        classes = (attrs.get('class') or '').split()
+        if tag in SKIP_TAGS or any(SKIP_CLASS_PATTERN.search(name) for name in classes):
+            if tag not in VOID_TAGS:
+                self.flush()
+                self.skip_tag = tag
+                self.skip_depth = 1
+            return
+        if tag in BLOCK_TAGS:
+            self.flush()
+        if tag in VOID_TAGS:
+            return
+        self.stack.append(tag)
+        priority = self.container_priority(tag, classes)
+        if priority is not None:
+            self.open_containers.append((len(self.stack) - 1, priority))
+
+    def handle_startendtag(self, tag, attrs):
+        if self.skip_tag is None and tag in BLOCK_TAGS:
+            self.flush()
+
+    def handle_endtag(self, tag):
+        if self.skip_tag is not None:
+            if tag == self.skip_tag:
+                self.skip_depth -= 1
+                if self.skip_depth == 0:
+                    self.skip_tag = None
+            return
+        if tag in BLOCK_TAGS:
+            self.flush()
+        # Закрытие тега вместе с незакрытыми вложенными (<p>, <li> без закрывающих тегов)
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index] == tag:
+                if self.open_containers and self.open_containers[-1][0] >= index:
+                    # Текст закрываемого контейнера (в том числе строчного, например span)
+                    # завершается, пока контейнер еще открыт
+                    self.flush()
+                del self.stack[index:]
+                while self.open_containers and self.open_containers[-1][0] >= index:
+                    self.open_containers.pop()
+                break
+
+    def handle_data(self, data):
+        if self.skip_tag is None and self.open_containers:
+            self.buffer.append(data)
+
+    def flush(self):
+        """Завершение текущего текстового блока"""
+        if not self.buffer:
+            return
+        text = ' '.join(''.join(self.buffer).split())
+        self.buffer = []
+        if len(text) <= MIN_LINE_LENGTH:
+            return
+        mask = 0
+        for _, priority in self.open_containers:
+            mask |= 1 << priority
+        if not mask:
+            return  # Текст вне контейнеров контента не собирается
+        block_bit = mask & -mask  # Лучший из открытых контейнеров
+        if self.best_bit and block_bit > self.best_bit:
+            return  # Текст вне лучшего контейнера (например, комментарии внутри main)
+        if block_bit != self.best_bit:
+            # Найден контейнер лучше прежнего - текст худших больше не нужен
+            self.best_bit = block_bit
+            self.blocks = [block for block in self.blocks if block[1] & block_bit]
+        self.blocks.append((text, mask))
+
+    def finish(self):
+        """
+        Завершение разбора
+
+        Returns:
+            Текст лучшего найденного контейнера (блоки через перевод строки) или None
+        """
+        self.feed(self.decoder.decode(b'', final=True))
+        self.close()
+        self.flush()
+        if not self.blocks:
+            return None
+        return '\n'.join(text for text, _ in self.blocks)
+
+
+def extract_text_streaming(chunks, encoding=None, max_bytes=None):
+    """
+    Извлечение текста статьи из потока фрагментов HTML
+
+    Args:
+        chunks: Итератор фрагментов ответа (байты)
+        encoding: Кодировка ответа (по умолчанию UTF-8)
+        max_bytes: Максимальный размер тела; остальное не читается
+
+    Returns:
+        Кортеж (текст или None, было ли тело обрезано по max_bytes)
+    """
+    extractor = StreamingTextExtractor(encoding)
+    truncated = False
+    for chunk in chunks:
+        if max_bytes is not None and extractor.bytes_fed + len(chunk) > max_bytes:
+            extractor.feed_bytes(chunk[:max_bytes - extractor.bytes_fed])
+            truncated = True
+            break
+        extractor.feed_bytes(chunk)
+    return extractor.finish(), truncated
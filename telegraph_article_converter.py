@@ -2,28 +2,83 @@
 Модуль для конвертации статей Naked Capitalism в Telegraph статьи
 """
 
-import sqlite3
+import hashlib
+import json
 import logging
-from typing import Optional, Dict, List, Tuple
-from article_processor import ArticleProcessor
-from telegraph_publisher import TelegraphPublisher
+from typing import Optional, Dict, List, Tuple, Union
+import bot_config
+import db
+from article_processor import ArticleProcessor, extract_article_element
+from telegraph_publisher import (TelegraphPublisher, CONTENT_SIZE_LIMIT, element_to_nodes,
+                                 nodes_hash, nodes_links, nodes_plain_text, nodes_text,
+                                 nodes_text_length, paginate_nodes)
+from simhash import SimHashIndex, simhash
+from http_transport import HttpTransport
+from html_cache import HtmlCache
+from image_store import ImageStore, get_image_store
+
+
+def parse_article_nodes(html, url: Optional[str] = None) -> Optional[List]:
+    """
+    Telegraph Node основного текста статьи из HTML страницы (url - для относительных ссылок)
+    
+    Функция уровня модуля: используется и для разбора в пуле процессов.
+    """
+    extracted = extract_article_element(html)
+    if not extracted:
+        return None
+    return element_to_nodes(extracted.element, base_url=url)
+
+
+class PartialPublishError(Exception):
+    """
+    Публикация частей статьи прервана ошибкой
+    
+    pages - известные страницы частей в порядке частей (None - часть не опубликована):
+    их нужно сохранить в telegraph_parts, чтобы повторная публикация не создала их заново.
+    """
+    
+    def __init__(self, pages: List[Optional[Dict]], error: Exception):
+        super().__init__(str(error))
+        self.pages = pages
 
 
 class TelegraphArticleConverter:
     """Класс для конвертации статей из базы данных в Telegraph"""
     
-    def __init__(self, db_path='articles.db', telegraph_token: Optional[str] = None):
+    # Размер части многостраничной статьи: запас под ссылку на следующую часть
+    PART_SIZE_BUDGET = CONTENT_SIZE_LIMIT - 2 * 1024
+    # Ограничение Telegraph на длину заголовка
+    MAX_TITLE_LENGTH = 256
+    
+    def __init__(self, db_path=None, telegraph_token: Optional[str] = None,
+                 fetch_concurrency: int = 8, transport: Optional[HttpTransport] = None,
+                 cache: Optional[HtmlCache] = None, parse_workers: Optional[int] = None,
+                 images: Optional[ImageStore] = None):
         """
         Инициализация конвертера
         
         Args:
-            db_path: Путь к базе данных статей
+            db_path: Путь к базе данных статей (по умолчанию bot_config.DB_PATH)
             telegraph_token: Токен Telegraph (если нет, будет создан новый аккаунт)
+            fetch_concurrency: Число параллельных загрузок статей при массовой публикации
+            transport: HTTP-транспорт для загрузки статей и Telegraph API (по умолчанию общий)
+            cache: Кэш исходного HTML статей (по умолчанию общий)
+            parse_workers: Число процессов разбора при массовой публикации
+                           (по умолчанию bot_config.PARSE_WORKERS)
+            images: Хранилище изображений, выгруженных в Telegraph (по умолчанию общее,
+                    если включено bot_config.REHOST_IMAGES)
         """
-        self.db_path = db_path
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
-        self.processor = ArticleProcessor(db_path)
-        self.publisher = TelegraphPublisher(access_token=telegraph_token)
+        self.db_path = db_path or bot_config.DB_PATH
+        self.fetch_concurrency = fetch_concurrency
+        # Общие с монитором и процессором соединения: чтение не ждет записи публикации
+        self.db = db.get_database(self.db_path)
+        self.processor = ArticleProcessor(db_path, transport=transport, cache=cache,
+                                          parse_workers=parse_workers)
+        self.publisher = TelegraphPublisher(access_token=telegraph_token, transport=transport)
+        if images is None and bot_config.REHOST_IMAGES:
+            images = get_image_store()
+        self.images = images
         
         # Настройка логирования
         logging.basicConfig(level=logging.INFO)
@@ -31,21 +86,33 @@ class TelegraphArticleConverter:
         
         # Инициализация базы данных
         self.setup_database()
+        self.fingerprints = SimHashIndex(self.db)
     
     def setup_database(self):
         """Обновление базы данных: добавление поля для Telegraph URL"""
-        cursor = self.conn.cursor()
-        
-        # Проверяем, существует ли колонка telegraph_url
-        cursor.execute("PRAGMA table_info(articles)")
-        columns = [column[1] for column in cursor.fetchall()]
-        
-        if 'telegraph_url' not in columns:
-            cursor.execute('ALTER TABLE articles ADD COLUMN telegraph_url TEXT')
-            cursor.execute('ALTER TABLE articles ADD COLUMN telegraph_path TEXT')
-            cursor.execute('ALTER TABLE articles ADD COLUMN telegraph_published_at TIMESTAMP')
-            self.conn.commit()
-            self.logger.info("База данных обновлена: добавлены поля для Telegraph")
+        with self.db.write() as conn:
+            # Проверяем, существует ли колонка telegraph_url
+            columns = [column[1] for column in conn.execute("PRAGMA table_info(articles)")]
+            
+            if 'telegraph_url' not in columns:
+                conn.execute('ALTER TABLE articles ADD COLUMN telegraph_url TEXT')
+                conn.execute('ALTER TABLE articles ADD COLUMN telegraph_path TEXT')
+                conn.execute('ALTER TABLE articles ADD COLUMN telegraph_published_at TIMESTAMP')
+                self.logger.info("База данных обновлена: добавлены поля для Telegraph")
+            
+            if 'telegraph_parts' not in columns:
+                # JSON-список частей [{"url": ..., "path": ...}] для статей длиннее одной страницы
+                conn.execute('ALTER TABLE articles ADD COLUMN telegraph_parts TEXT')
+            
+            if 'duplicate_of' not in columns:
+                # ID опубликованной статьи с тем же текстом (перепубликация под другим заголовком или URL)
+                conn.execute('ALTER TABLE articles ADD COLUMN duplicate_of INTEGER')
+            
+            if 'telegraph_content_hash' not in columns:
+                # Хэши опубликованной версии: дерева узлов и исходного HTML (для обновления измененных статей)
+                conn.execute('ALTER TABLE articles ADD COLUMN telegraph_content_hash TEXT')
+                conn.execute('ALTER TABLE articles ADD COLUMN telegraph_source_hash TEXT')
+                conn.execute('ALTER TABLE articles ADD COLUMN telegraph_edited_at TIMESTAMP')
     
     def ensure_telegraph_account(self):
         """Проверка и создание аккаунта Telegraph при необходимости"""
@@ -63,8 +130,7 @@ class TelegraphArticleConverter:
     
     def get_article_by_id(self, article_id: int) -> Optional[Tuple]:
         """Получение статьи по ID"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
+        cursor = self.db.reader().execute('''
             SELECT id, title, url, author, date_posted, telegraph_url
             FROM articles
             WHERE id = ?
@@ -73,7 +139,6 @@ class TelegraphArticleConverter:
     
     def get_unpublished_articles(self, limit: Optional[int] = None) -> List[Tuple]:
         """Получение статей, которые еще не опубликованы в Telegraph"""
-        cursor = self.conn.cursor()
         query = '''
             SELECT id, title, url, author, date_posted
             FROM articles
@@ -82,12 +147,10 @@ class TelegraphArticleConverter:
         '''
         if limit:
             query += f' LIMIT {limit}'
-        cursor.execute(query)
-        return cursor.fetchall()
+        return self.db.reader().execute(query).fetchall()
     
     def get_published_articles(self, limit: Optional[int] = None) -> List[Tuple]:
         """Получение статей, которые уже опубликованы в Telegraph"""
-        cursor = self.conn.cursor()
         query = '''
             SELECT id, title, url, author, date_posted, telegraph_url
             FROM articles
@@ -96,33 +159,54 @@ class TelegraphArticleConverter:
         '''
         if limit:
             query += f' LIMIT {limit}'
-        cursor.execute(query)
-        return cursor.fetchall()
+        return self.db.reader().execute(query).fetchall()
     
     def fetch_article_full_content(self, url: str) -> Optional[str]:
         """Получение полного контента статьи"""
         try:
             # Используем ArticleProcessor для получения контента
             content = self.processor.fetch_article_content(url)
-            
-            if content:
-                # Добавляем информацию об источнике в конец статьи
-                source_note = f"\n\n---\n\nИсточник: {url}"
-                return content + source_note
-            
+            return self.add_source_note(content, url)
+        except Exception as e:
+            self.logger.error(f"Ошибка при получении контента статьи {url}: {e}")
             return None
+    
+    def fetch_article_nodes(self, url: str) -> Optional[List]:
+        """
+        Получение статьи сразу в виде Telegraph Node
+        
+        Узлы строятся из дерева основного текста за один проход, без
+        промежуточного текста: ссылки, цитаты, списки и изображения сохраняются.
+        """
+        try:
+            html = self.processor.cache.fetch(self.processor.session, url)
+            return self.html_to_article_nodes(html, url)
         except Exception as e:
             self.logger.error(f"Ошибка при получении контента статьи {url}: {e}")
             return None
     
-    def format_article_for_telegraph(self, title: str, content: str, author: str, 
+    def html_to_article_nodes(self, html, url: Optional[str] = None) -> Optional[List]:
+        """Telegraph Node основного текста статьи из HTML страницы (см. parse_article_nodes)"""
+        return parse_article_nodes(html, url)
+    
+    def add_source_note(self, content, url: str):
+        """Добавление информации об источнике в конец статьи (текст или список узлов)"""
+        if not content:
+            return None
+        if isinstance(content, list):
+            return content + [{"tag": "p", "children": [
+                "Источник: ", {"tag": "a", "attrs": {"href": url}, "children": [url]}
+            ]}]
+        return content + f"\n\n---\n\nИсточник: {url}"
+    
+    def format_article_for_telegraph(self, title: str, content: Union[str, List, None], author: str,
                                      original_url: str) -> List[Dict]:
         """
         Форматирование статьи для публикации в Telegraph
         
         Args:
             title: Заголовок статьи
-            content: Контент статьи
+            content: Контент статьи - текст или готовый список Telegraph Node
             author: Автор статьи
             original_url: Оригинальная ссылка
         
@@ -152,8 +236,11 @@ class TelegraphArticleConverter:
         # Разделитель
         nodes.append({"tag": "hr"})
         
-        # Контент статьи (разбиваем на параграфы)
-        if content:
+        # Контент статьи: готовые узлы из дерева документа
+        if isinstance(content, list) and content:
+            nodes.extend(content)
+        # Текстовый контент (разбиваем на параграфы)
+        elif content:
             paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()]
             
             for paragraph in paragraphs:
@@ -204,12 +291,14 @@ class TelegraphArticleConverter:
         
         return nodes
     
-    def publish_article_to_telegraph(self, article_id: int) -> Optional[Dict]:
+    def publish_article_to_telegraph(self, article_id: int,
+                                     prefetched_content: Optional[List] = None) -> Optional[Dict]:
         """
         Публикация статьи в Telegraph
         
         Args:
             article_id: ID статьи в базе данных
+            prefetched_content: Уже загруженные Telegraph Node статьи (если None, будут загружены)
         
         Returns:
             Словарь с информацией о созданной странице Telegraph или None при ошибке
@@ -231,46 +320,326 @@ class TelegraphArticleConverter:
         # Убеждаемся, что есть аккаунт Telegraph
         self.ensure_telegraph_account()
         
+        # Части, созданные прерванной публикацией, изменяются, а не создаются заново
+        telegraph_parts = self.db.reader().execute(
+            'SELECT telegraph_parts FROM articles WHERE id = ?', (article_id,)).fetchone()[0]
+        
         # Получаем контент статьи
-        self.logger.info(f"Получение контента статьи: {title}")
-        content = self.fetch_article_full_content(url)
+        if prefetched_content is None:
+            self.logger.info(f"Получение контента статьи: {title}")
+            prefetched_content = self.fetch_article_nodes(url)
+        content = self.add_source_note(prefetched_content, url)
         
-        if not content or len(content.strip()) < 50:
+        if not content or nodes_text_length(content) < 50:
             self.logger.error(f"Не удалось получить контент статьи {url} или контент слишком короткий")
             return None
         
-        # Форматируем для Telegraph
+        # Краткое содержание и индекс внешних ссылок - один раз, когда текст статьи загружен впервые
+        self.processor.record_article_text(url, nodes_plain_text(prefetched_content),
+                                           nodes_links(prefetched_content))
+        
+        # Отпечаток текста (без ссылки на источник): перепубликация не тратит запрос к Telegraph
+        fingerprint = simhash(nodes_text(prefetched_content))
+        if fingerprint is not None:
+            self.fingerprints.store(article_id, fingerprint)
+            duplicate = self.link_to_published_duplicate(article_id, fingerprint)
+            if duplicate:
+                return duplicate
+        
+        # Форматируем для Telegraph; хэш - до замены адресов изображений, которые
+        # меняются без правки статьи (например, выгрузка, не удавшаяся при публикации)
         telegraph_content = self.format_article_for_telegraph(title, content, author, url)
+        content_hash = nodes_hash(telegraph_content)
+        
+        # Изображения - из Telegraph, а не ссылками на сайт (узлы content входят в telegraph_content)
+        if self.images:
+            self.images.rehost_images(content)
+        
+        # Делим на части по ограничению размера страницы
+        parts = paginate_nodes(telegraph_content, self.PART_SIZE_BUDGET)
         
         # Публикуем в Telegraph
         try:
-            self.logger.info(f"Публикация статьи в Telegraph: {title}")
-            page = self.publisher.create_page(
-                title=title,
-                content=telegraph_content,
+            self.logger.info(f"Публикация статьи в Telegraph: {title}"
+                             + (f" ({len(parts)} части)" if len(parts) > 1 else ""))
+            pages = self.create_linked_pages(
+                title, parts,
                 author_name=author if author and author != "Unknown" else "Naked Capitalism",
                 author_url=url,
-                return_content=False
+                existing=json.loads(telegraph_parts) if telegraph_parts else None
             )
+            page = pages[0]
             
-            # Сохраняем ссылку в базу данных
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                UPDATE articles
-                SET telegraph_url = ?,
-                    telegraph_path = ?,
-                    telegraph_published_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            ''', (page.get('url'), page.get('path'), article_id))
-            self.conn.commit()
+            # Сохраняем ссылку на первую часть и список всех частей в базу данных
+            with self.db.write() as conn:
+                conn.execute('''
+                    UPDATE articles
+                    SET telegraph_url = ?,
+                        telegraph_path = ?,
+                        telegraph_parts = ?,
+                        telegraph_content_hash = ?,
+                        telegraph_source_hash = ?,
+                        telegraph_published_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (page.get('url'), page.get('path'), self.parts_json(pages),
+                      content_hash, self.cached_source_hash(url), article_id))
             
             self.logger.info(f"✓ Статья опубликована: {page.get('url')}")
             return page
             
+        except PartialPublishError as e:
+            # telegraph_url остается пустым: статья публикуется повторно, созданные части переиспользуются
+            self.save_partial_parts(article_id, e.pages)
+            self.logger.error(f"Ошибка при публикации статьи в Telegraph: {e}")
+            return None
         except Exception as e:
             self.logger.error(f"Ошибка при публикации статьи в Telegraph: {e}")
             return None
     
+    def cached_source_hash(self, url: str) -> Optional[str]:
+        """
+        Хэш исходного HTML статьи из кэша (как в refresh_published_articles)
+        
+        Записывается при публикации, чтобы первое обновление не разбирало неизмененную страницу.
+        """
+        entry = self.processor.cache.lookup(url)
+        return hashlib.sha256(entry.content).hexdigest() if entry else None
+    
+    def link_to_published_duplicate(self, article_id: int, fingerprint: int) -> Optional[Dict]:
+        """
+        Поиск уже опубликованной статьи с почти тем же текстом
+        
+        Если она найдена, статье присваиваются ее страницы Telegraph.
+        
+        Returns:
+            Словарь с url, path и duplicate_of или None, если дубликата нет
+        """
+        reader = self.db.reader()
+        for other_id, distance in self.fingerprints.find_near_duplicates(fingerprint, exclude_id=article_id):
+            row = reader.execute('''
+                SELECT telegraph_url, telegraph_path, telegraph_parts
+                FROM articles
+                WHERE id = ? AND telegraph_url IS NOT NULL
+            ''', (other_id,)).fetchone()
+            if not row:
+                continue
+            with self.db.write() as conn:
+                conn.execute('''
+                    UPDATE articles
+                    SET telegraph_url = ?,
+                        telegraph_path = ?,
+                        telegraph_parts = ?,
+                        duplicate_of = ?,
+                        telegraph_published_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (*row, other_id, article_id))
+            self.logger.info(f"Статья {article_id} повторяет опубликованную статью {other_id} "
+                             f"(отличается {distance} бит отпечатка): {row[0]}")
+            return {"url": row[0], "path": row[1], "duplicate_of": other_id}
+        return None
+    
+    @staticmethod
+    def parts_json(pages: List[Optional[Dict]]) -> str:
+        """Список частей статьи для колонки telegraph_parts (None - часть еще не опубликована)"""
+        return json.dumps([{'url': page.get('url'), 'path': page.get('path')} if page else None
+                           for page in pages])
+    
+    def save_partial_parts(self, article_id: int, pages: List[Optional[Dict]]):
+        """Сохранение частей прерванной публикации или правки (см. PartialPublishError)"""
+        with self.db.write() as conn:
+            conn.execute('UPDATE articles SET telegraph_parts = ? WHERE id = ?',
+                         (self.parts_json(pages), article_id))
+    
+    def create_linked_pages(self, title: str, parts: List[List], author_name: str,
+                            author_url: str, existing: Optional[List[Optional[Dict]]] = None) -> List[Dict]:
+        """
+        Публикация частей статьи, каждая со ссылкой на следующую
+        
+        Части создаются с конца: к моменту создания части уже известен адрес следующей.
+        
+        Args:
+            existing: Уже опубликованные части ({"url", "path"} или None) - они изменяются
+                      через editPage, недостающие создаются, лишние ведут на первую часть
+        
+        Returns:
+            Созданные страницы в порядке частей
+        
+        Raises:
+            PartialPublishError: запрос к Telegraph не удался; в исключении - части,
+                                 опубликованные до ошибки, и прежние части
+        """
+        existing = existing or []
+        pages = []
+        try:
+            for number in range(len(parts), 0, -1):
+                content = parts[number - 1]
+                part_title = title
+                if len(parts) > 1:
+                    suffix = f" ({number}/{len(parts)})"
+                    part_title = title[:self.MAX_TITLE_LENGTH - len(suffix)] + suffix
+                if pages:
+                    content = content + [{"tag": "p", "children": [{
+                        "tag": "a",
+                        "attrs": {"href": pages[-1].get('url')},
+                        "children": [f"Продолжение: часть {number + 1} из {len(parts)} →"]
+                    }]}]
+                if number <= len(existing) and existing[number - 1]:
+                    pages.append(self.publisher.edit_page(
+                        existing[number - 1]['path'],
+                        title=part_title,
+                        content=content,
+                        author_name=author_name,
+                        author_url=author_url
+                    ))
+                else:
+                    pages.append(self.publisher.create_page(
+                        title=part_title,
+                        content=content,
+                        author_name=author_name,
+                        author_url=author_url,
+                        return_content=False
+                    ))
+        except Exception as e:
+            # Части создаются с конца: pages - последние части, остальные - прежние или None
+            done = len(parts) - len(pages)
+            known = [existing[i] if i < len(existing) else None for i in range(done)]
+            raise PartialPublishError(known + pages[::-1] + existing[len(parts):], e) from e
+        pages.reverse()
+        
+        # Статья стала короче: лишние части прежней версии ведут на ее начало
+        try:
+            for page in existing[len(parts):]:
+                if not page:
+                    continue
+                self.publisher.edit_page(page['path'], title=title, content=[{"tag": "p", "children": [
+                    "Статья обновлена. ",
+                    {"tag": "a", "attrs": {"href": pages[0].get('url')}, "children": ["Читать с начала"]}
+                ]}], author_name=author_name, author_url=author_url)
+        except Exception as e:
+            raise PartialPublishError(pages + existing[len(parts):], e) from e
+        return pages
+    
+    def get_articles_to_refresh(self, days: int) -> List[Tuple]:
+        """Статьи, опубликованные в Telegraph за последние days дней (без перепубликаций)"""
+        cursor = self.db.reader().execute('''
+            SELECT id, title, url, author, telegraph_url, telegraph_path, telegraph_parts,
+                   telegraph_content_hash, telegraph_source_hash
+            FROM articles
+            WHERE telegraph_path IS NOT NULL
+              AND duplicate_of IS NULL
+              AND telegraph_published_at >= datetime('now', ?)
+            ORDER BY telegraph_published_at DESC
+        ''', (f'-{int(days)} days',))
+        return cursor.fetchall()
+    
+    def refresh_published_articles(self, days: Optional[int] = None) -> Dict:
+        """
+        Обновление страниц Telegraph для статей, измененных на сайте
+        
+        Страница запрашивается условным запросом (ETag / Last-Modified), и дальше
+        работа выполняется, только если что-то изменилось: неизмененный HTML не
+        разбирается, а editPage вызывается, только если изменилось дерево узлов
+        (а не, например, счетчик комментариев на странице). У статей, опубликованных
+        до появления хэшей (NULL), хэши только записываются - страница не изменяется.
+        
+        Args:
+            days: Проверять статьи, опубликованные за последние days дней
+                  (по умолчанию bot_config.REFRESH_WINDOW_DAYS)
+        
+        Returns:
+            Словарь со счетчиками: checked, unchanged, edited, failed
+        """
+        days = bot_config.REFRESH_WINDOW_DAYS if days is None else days
+        stats = {"checked": 0, "unchanged": 0, "edited": 0, "failed": 0}
+        articles = self.get_articles_to_refresh(days)
+        if articles:
+            self.ensure_telegraph_account()
+        
+        for (article_id, title, url, author, telegraph_url, telegraph_path, telegraph_parts,
+             content_hash, source_hash) in articles:
+            stats["checked"] += 1
+            try:
+                html = self.processor.cache.fetch(self.processor.session, url, revalidate=True)
+                new_source_hash = hashlib.sha256(html).hexdigest()
+                if new_source_hash == source_hash:
+                    stats["unchanged"] += 1
+                    continue
+                
+                nodes = parse_article_nodes(html, url)
+                content = self.add_source_note(nodes, url)
+                if not content or nodes_text_length(content) < 50:
+                    # Не затираем опубликованную версию пустой страницей
+                    self.logger.warning(f"Обновление статьи {article_id}: контент не найден, страница не изменена")
+                    stats["failed"] += 1
+                    continue
+                telegraph_content = self.format_article_for_telegraph(title, content, author, url)
+                # Хэш - до замены адресов изображений, как при публикации
+                new_content_hash = nodes_hash(telegraph_content)
+                
+                pages = None
+                if content_hash is None:
+                    self.logger.info(f"Статья {article_id}: записаны хэши опубликованной версии")
+                elif new_content_hash != content_hash:
+                    # Изображения выгружаются, только если страница действительно изменяется
+                    if self.images:
+                        self.images.rehost_images(content)
+                    existing = json.loads(telegraph_parts) if telegraph_parts else [
+                        {'url': telegraph_url, 'path': telegraph_path}
+                    ]
+                    pages = self.create_linked_pages(
+                        title, paginate_nodes(telegraph_content, self.PART_SIZE_BUDGET),
+                        author_name=author if author and author != "Unknown" else "Naked Capitalism",
+                        author_url=url,
+                        existing=existing
+                    )
+                
+                if pages:
+                    # Текст изменился - отпечаток, краткое содержание (TextRank) и ссылки
+                    # вычисляются до транзакции, чтобы не держать блокировку записи
+                    fingerprint = simhash(nodes_text(nodes))
+                    summary = self.processor.extract_summary(nodes_plain_text(nodes))
+                    links = nodes_links(nodes)
+                
+                # Все изменения статьи - одной транзакцией, после запросов к Telegraph
+                with self.db.write() as conn:
+                    if pages:
+                        conn.execute('''
+                            UPDATE articles
+                            SET telegraph_url = ?,
+                                telegraph_path = ?,
+                                telegraph_parts = ?,
+                                telegraph_edited_at = CURRENT_TIMESTAMP
+                            WHERE id = ?
+                        ''', (pages[0].get('url'), pages[0].get('path'), self.parts_json(pages), article_id))
+                        if fingerprint is not None:
+                            self.fingerprints.store(article_id, fingerprint)
+                        self.processor.store_summary(url, summary)
+                        self.processor.store_links(url, links, replace=True)
+                    conn.execute('''
+                        UPDATE articles
+                        SET telegraph_content_hash = ?,
+                            telegraph_source_hash = ?
+                        WHERE id = ?
+                    ''', (new_content_hash, new_source_hash, article_id))
+                
+                if pages:
+                    stats["edited"] += 1
+                    self.logger.info(f"✓ Статья {article_id} изменилась, страница Telegraph обновлена: {pages[0].get('url')}")
+                else:
+                    stats["unchanged"] += 1
+            except PartialPublishError as e:
+                # Хэши не обновлены - правка повторится и изменит уже созданные части
+                self.save_partial_parts(article_id, e.pages)
+                self.logger.error(f"Ошибка при обновлении статьи {article_id}: {e}")
+                stats["failed"] += 1
+            except Exception as e:
+                self.logger.error(f"Ошибка при обновлении статьи {article_id}: {e}")
+                stats["failed"] += 1
+        
+        self.logger.info(f"Обновление статей: проверено {stats['checked']}, изменено {stats['edited']}, "
+                         f"ошибок {stats['failed']}")
+        return stats
+    
     def publish_multiple_articles(self, article_ids: Optional[List[int]] = None, 
                                   limit: int = 10) -> List[Dict]:
         """
@@ -295,43 +664,56 @@ class TelegraphArticleConverter:
         
         self.logger.info(f"Начало публикации {len(articles_to_publish)} статей в Telegraph")
         
+        # Параллельная загрузка контента статей; публикация идет по мере готовности
+        urls = {}
         for article_id in articles_to_publish:
-            try:
-                result = self.publish_article_to_telegraph(article_id)
-                if result:
-                    results.append({
-                        "article_id": article_id,
-                        "success": True,
-                        "telegraph_url": result.get('url')
-                    })
-                else:
-                    results.append({
-                        "article_id": article_id,
-                        "success": False,
-                        "error": "Ошибка публикации"
-                    })
-            except Exception as e:
-                self.logger.error(f"Ошибка при публикации статьи {article_id}: {e}")
-                results.append({
-                    "article_id": article_id,
-                    "success": False,
-                    "error": str(e)
-                })
+            article = self.get_article_by_id(article_id)
+            if article and not article[5]:
+                urls.setdefault(article[2], []).append(article_id)
+            else:
+                # Не найдена или уже опубликована - обрабатывается без загрузки
+                results.append(self._publish_result(article_id))
+        
+        for url, content in self.processor.fetch_many(list(urls), concurrency=self.fetch_concurrency,
+                                                      parse=parse_article_nodes):
+            for article_id in urls[url]:
+                results.append(self._publish_result(article_id, content or []))
         
         self.logger.info(f"Публикация завершена: {sum(1 for r in results if r['success'])}/{len(results)} успешно")
         return results
     
+    def _publish_result(self, article_id: int, prefetched_content: Optional[List] = None) -> Dict:
+        """Публикация одной статьи с формированием записи результата"""
+        try:
+            result = self.publish_article_to_telegraph(article_id, prefetched_content)
+            if result:
+                return {
+                    "article_id": article_id,
+                    "success": True,
+                    "telegraph_url": result.get('url')
+                }
+            return {
+                "article_id": article_id,
+                "success": False,
+                "error": "Ошибка публикации"
+            }
+        except Exception as e:
+            self.logger.error(f"Ошибка при публикации статьи {article_id}: {e}")
+            return {
+                "article_id": article_id,
+                "success": False,
+                "error": str(e)
+            }
+    
     def get_statistics(self) -> Dict:
         """Получение статистики по публикациям"""
-        cursor = self.conn.cursor()
+        reader = self.db.reader()
         
         # Всего статей
-        cursor.execute("SELECT COUNT(*) FROM articles")
-        total = cursor.fetchone()[0]
+        total = reader.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
         
         # Опубликовано в Telegraph
-        cursor.execute("SELECT COUNT(*) FROM articles WHERE telegraph_url IS NOT NULL")
-        published = cursor.fetchone()[0]
+        published = reader.execute("SELECT COUNT(*) FROM articles WHERE telegraph_url IS NOT NULL").fetchone()[0]
         
         # Не опубликовано
         unpublished = total - published
@@ -344,11 +726,10 @@ class TelegraphArticleConverter:
         }
     
     def close(self):
-        """Закрытие соединений"""
-        if self.conn:
-            self.conn.close()
+        """Закрытие процессора и освобождение общей базы (см. db.get_database)"""
         if self.processor:
             self.processor.close()
+        self.db.close()
 
 
 def main():
@@ -3,28 +3,316 @@ Telegraph Publisher - программа для создания статей в
 Использует официальный Telegraph API: https://telegra.ph/api
 """
 
+import hashlib
 import requests
 import json
+import re
 from typing import Optional, List, Dict, Union, Any
+from urllib.parse import urljoin
+
+from bs4.element import PreformattedString
+
+import html_parsing
+import http_transport
+
+# Поддерживаемые теги Telegraph (остальные теги разворачиваются в содержимое)
+SUPPORTED_TAGS = {
+    'p': 'p',
+    'h1': 'h3',  # h1 преобразуется в h3
+    'h2': 'h3',  # h2 преобразуется в h3
+    'h3': 'h3',
+    'h4': 'h4',
+    'h5': 'h4',
+    'h6': 'h4',
+    'b': 'b',
+    'strong': 'strong',
+    'em': 'em',
+    'i': 'i',
+    'u': 'u',
+    's': 's',
+    'a': 'a',
+    'br': 'br',
+    'hr': 'hr',
+    'ul': 'ul',
+    'ol': 'ol',
+    'li': 'li',
+    'blockquote': 'blockquote',
+    'code': 'code',
+    'pre': 'pre',
+    'img': 'img',
+    'figure': 'figure',
+    'figcaption': 'figcaption',
+}
+# Теги без содержимого
+EMPTY_TAGS = {'br', 'hr', 'img'}
+# Теги, которые пропускаются вместе с содержимым
+SKIPPED_TAGS = {'script', 'style', 'noscript', 'template', 'iframe', 'form', 'button', 'input', 'select'}
+# Неподдерживаемые строчные теги: их текст объединяется с соседним
+INLINE_TAGS = {
+    'span', 'font', 'small', 'big', 'sub', 'sup', 'abbr', 'acronym', 'cite', 'mark',
+    'time', 'q', 'del', 'ins', 'strike', 'tt', 'kbd', 'samp', 'var', 'dfn', 'label',
+}
+# Строчные теги Telegraph (остальные узлы - отдельные блоки текста)
+TEXT_TAGS = {'a', 'b', 'strong', 'em', 'i', 'u', 's', 'code'}
+# Максимальная вложенность узлов: глубже теги разворачиваются в содержимое
+MAX_NODE_DEPTH = 32
+
+# Ограничение Telegraph на размер content (JSON) одной страницы
+CONTENT_SIZE_LIMIT = 64 * 1024
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def nodes_text_length(nodes) -> int:
+    """Длина текста в списке Telegraph Node (без пробелов по краям строк)"""
+    length = 0
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            length += len(node.strip())
+        else:
+            stack.extend(node.get('children', ()))
+    return length
+
+
+def nodes_text(nodes) -> str:
+    """Текст списка Telegraph Node в порядке документа (строки через пробел)"""
+    parts = []
+    stack = list(reversed(nodes))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            parts.append(node)
+        else:
+            stack.extend(reversed(node.get('children', ())))
+    return ' '.join(parts)
+
+
+def nodes_plain_text(nodes) -> str:
+    """Текст списка Telegraph Node: блоки (абзацы, заголовки, пункты списков) - отдельными строками"""
+    parts = []
+    stack = list(reversed(nodes))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            parts.append(node)
+        elif node.get('tag') in TEXT_TAGS:
+            stack.extend(reversed(node.get('children', ())))
+        else:
+            # Перевод строки до и после содержимого блока
+            stack.append('\n')
+            stack.extend(reversed(node.get('children', ())))
+            parts.append('\n')
+    lines = (' '.join(line.split()) for line in ''.join(parts).split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+def nodes_links(nodes) -> List[tuple]:
+    """Ссылки списка Telegraph Node: [(href, текст ссылки)] в порядке документа"""
+    links = []
+    stack = list(reversed(nodes))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            continue
+        href = (node.get('attrs') or {}).get('href') if node.get('tag') == 'a' else None
+        if href:
+            links.append((href, ' '.join(nodes_text(node.get('children', ())).split())))
+        else:
+            stack.extend(reversed(node.get('children', ())))
+    return links
+
+
+def nodes_hash(nodes) -> str:
+    """Хэш списка Telegraph Node (SHA-256 компактного JSON) для сравнения версий страницы"""
+    return hashlib.sha256(json.dumps(nodes, ensure_ascii=False, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+
+def nodes_size(nodes) -> int:
+    """Размер узла или списка узлов в JSON, как он передается в Telegraph (байты UTF-8)"""
+    return len(json.dumps(nodes, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def split_text(text: str, budget: int) -> List[str]:
+    """Разбиение строки по словам на части не больше budget байт в JSON"""
+    pieces, words, size = [], [], 2  # Кавычки
+    for word in text.split(' '):
+        word_size = nodes_size(word) - 1  # Без кавычек, но с пробелом
+        if words and size + word_size > budget:
+            pieces.append(' '.join(words))
+            words, size = [], 2
+        words.append(word)
+        size += word_size
+    if words:
+        pieces.append(' '.join(words))
+    return pieces
+
+
+def split_node(node, budget: int) -> List[Union[str, Dict[str, Any]]]:
+    """Разбиение узла больше budget байт на несколько узлов того же тега"""
+    if isinstance(node, str):
+        return split_text(node, budget)
+    children = node.get('children')
+    shell = {key: value for key, value in node.items() if key != 'children'}
+    overhead = nodes_size(dict(shell, children=[]))
+    if not children or overhead >= budget:
+        return [node]
+    return [dict(shell, children=part) for part in paginate_nodes(children, budget - overhead)]
+
+
+def paginate_nodes(nodes, budget: int = CONTENT_SIZE_LIMIT) -> List[List[Union[str, Dict[str, Any]]]]:
+    """
+    Разбиение списка узлов на части, каждая из которых не больше budget байт в JSON
+    
+    Узлы верхнего уровня переносятся в следующую часть целиком; слишком большой
+    узел (длинный список, цитата) делится на несколько узлов того же тега.
+    
+    Returns:
+        Список частей (списков узлов); для небольшой статьи - одна часть
+    """
+    parts, current, size = [], [], 2  # Скобки массива
+    for node in nodes:
+        node_size = nodes_size(node) + 1  # С запятой
+        pieces = split_node(node, budget - 2) if node_size > budget - 2 else [node]
+        for piece in pieces:
+            if piece is not node:
+                node_size = nodes_size(piece) + 1
+            if current and size + node_size > budget:
+                parts.append(current)
+                current, size = [], 2
+            current.append(piece)
+            size += node_size
+    if current:
+        parts.append(current)
+    return parts
+
+
+def element_to_nodes(root, base_url: Optional[str] = None) -> List[Union[str, Dict[str, Any]]]:
+    """
+    Преобразование дочерних элементов уже разобранного элемента в Telegraph Node
+
+    Используется для публикации прямо из дерева документа, без промежуточного
+    текста: ссылки, цитаты и списки сохраняются.
+
+    Args:
+        root: Элемент BeautifulSoup (например, основной текст статьи)
+        base_url: URL страницы для относительных ссылок и изображений
+
+    Returns:
+        Список Node объектов для Telegraph
+    """
+    nodes = []
+    # Стек обхода вместо рекурсии: (дочерние элементы, список результата, узел Telegraph
+    # или None для развернутого тега, список родителя, глубина узлов, строчный ли тег)
+    stack = [(iter(root.children), nodes, None, None, 0, False)]
+    can_merge = False  # Можно ли дописать текст к последней строке списка результата
+    while stack:
+        children, output, node, parent_output, depth, inline = stack[-1]
+        elem = next(children, None)
+        if elem is None:
+            stack.pop()
+            if node is not None:
+                # Пустые абзацы, ссылки и т.п. не нужны
+                if output:
+                    node['children'] = output
+                    parent_output.append(node)
+                elif node['tag'] in EMPTY_TAGS:
+                    parent_output.append(node)
+            # После блочного тега текст с последующим не объединяется
+            can_merge = can_merge and inline
+            continue
+
+        if elem.name is None:  # Текстовый узел
+            if isinstance(elem, PreformattedString):  # Комментарии, CDATA, doctype
+                continue
+            text = str(elem)
+            if not text.strip():
+                continue
+            text = WHITESPACE_PATTERN.sub(' ', text)
+            # Соседние строки (например, разделенные <span>) объединяются в одну
+            if can_merge and output and isinstance(output[-1], str):
+                output[-1] += text
+            else:
+                output.append(text)
+            can_merge = True
+            continue
+
+        tag_name = elem.name.lower()
+        if tag_name in SKIPPED_TAGS:
+            continue
+
+        if tag_name not in SUPPORTED_TAGS or depth >= MAX_NODE_DEPTH:
+            # Неподдерживаемый тег разворачивается в содержимое; блочный разделяет текст
+            inline = tag_name in INLINE_TAGS
+            can_merge = can_merge and inline
+            stack.append((iter(elem.children), output, None, None, depth, inline))
+            continue
+
+        new_node = {'tag': SUPPORTED_TAGS[tag_name]}
+        # Обработка атрибутов для ссылок и изображений
+        if tag_name == 'a' and elem.get('href'):
+            href = elem.get('href')
+            new_node['attrs'] = {'href': urljoin(base_url, href) if base_url else href}
+        elif tag_name == 'img':
+            if not elem.get('src'):
+                continue
+            src = elem.get('src')
+            new_node['attrs'] = {'src': urljoin(base_url, src) if base_url else src}
+        stack.append((iter(elem.children), [], new_node, output, depth + 1, False))
+        can_merge = False
+
+    # Простой текст между элементами верхнего уровня
+    nodes = [{'tag': 'p', 'children': [node.strip()]} if isinstance(node, str) else node
+             for node in nodes]
+    return nodes if nodes else [{'tag': 'p', 'children': ['']}]
 
 
 class TelegraphPublisher:
     """Класс для работы с Telegraph API"""
     
     BASE_URL = "https://api.telegra.ph"
+    # Сколько раз повторять запрос после ответа FLOOD_WAIT_x
+    FLOOD_WAIT_RETRIES = 5
     
-    def __init__(self, access_token: Optional[str] = None):
+    def __init__(self, access_token: Optional[str] = None,
+                 transport: Optional[http_transport.HttpTransport] = None):
         """
         Инициализация издателя Telegraph
         
         Args:
             access_token: Токен доступа Telegraph (опционально, можно создать позже)
+            transport: HTTP-транспорт (по умолчанию общий для всего процесса)
         """
         self.access_token = access_token
-        self.session = requests.Session()
-        self.session.headers.update({
-            'Content-Type': 'application/json'
-        })
+        self.session = transport or http_transport.get_transport()
+    
+    def api_request(self, url: str, params: Dict[str, Any], method: str = 'GET') -> Dict[str, Any]:
+        """
+        Запрос к Telegraph API с обработкой FLOOD_WAIT
+        
+        При ответе FLOOD_WAIT_x приостанавливает корзину хоста Telegraph в общем
+        ограничителе частоты на x секунд и повторяет запрос.
+        
+        Args:
+            method: 'GET' или 'POST' (параметры в теле запроса - для больших страниц,
+                    которые не помещаются в URL)
+        
+        Returns:
+            Разобранный JSON ответа
+        """
+        for attempt in range(self.FLOOD_WAIT_RETRIES + 1):
+            if method == 'POST':
+                response = self.session.post(url, data=params)
+            else:
+                response = self.session.get(url, params=params)
+            response.raise_for_status()
+            data = response.json()
+            
+            match = re.fullmatch(r'FLOOD_WAIT_(\d+)', str(data.get('error', '')))
+            if data.get('ok') or not match or attempt == self.FLOOD_WAIT_RETRIES:
+                return data
+            self.session.limiter.pause(url, int(match.group(1)))
     
     def create_account(self, short_name: str, author_name: Optional[str] = None, 
                       author_url: Optional[str] = None) -> Dict[str, Any]:
@@ -48,9 +336,7 @@ class TelegraphPublisher:
             params['author_url'] = author_url
         
         try:
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            data = self.api_request(url, params)
             
             if data.get('ok'):
                 account = data.get('result', {})
@@ -100,86 +386,21 @@ class TelegraphPublisher:
         Returns:
             Список Node объектов для Telegraph
         """
-        from bs4 import BeautifulSoup
-        
-        soup = BeautifulSoup(html_content, 'html.parser')
-        nodes = []
-        
-        # Рекурсивная функция для преобразования элементов
-        def element_to_node(elem):
-            if elem.name is None:  # Текстовый узел
-                text = str(elem).strip()
-                return text if text else None
-            
-            # Поддерживаемые теги Telegraph
-            supported_tags = {
-                'p': 'p',
-                'h1': 'h3',  # h1 преобразуется в h3
-                'h2': 'h3',  # h2 преобразуется в h3
-                'h3': 'h3',
-                'h4': 'h4',
-                'b': 'b',
-                'strong': 'strong',
-                'em': 'em',
-                'i': 'i',
-                'a': 'a',
-                'br': 'br',
-                'ul': 'ul',
-                'ol': 'ol',
-                'li': 'li',
-                'blockquote': 'blockquote',
-                'code': 'code',
-                'pre': 'pre',
-                'img': 'img',
-            }
-            
-            tag_name = elem.name.lower()
-            if tag_name not in supported_tags:
-                # Если тег не поддерживается, просто извлекаем текст
-                return elem.get_text(strip=True) if elem.get_text(strip=True) else None
-            
-            node = {'tag': supported_tags[tag_name]}
-            
-            # Обработка атрибутов для ссылок и изображений
-            if tag_name == 'a' and elem.get('href'):
-                node['attrs'] = {'href': elem.get('href')}
-            elif tag_name == 'img' and elem.get('src'):
-                node['attrs'] = {'src': elem.get('src')}
-            
-            # Обработка дочерних элементов
-            children = []
-            for child in elem.children:
-                child_node = element_to_node(child)
-                if child_node is not None:
-                    if isinstance(child_node, str):
-                        children.append(child_node)
-                    elif isinstance(child_node, dict):
-                        children.append(child_node)
-            
-            if children:
-                node['children'] = children
-            elif tag_name == 'br':
-                # br не требует children
-                pass
-            else:
-                # Если нет дочерних элементов, добавляем пустой текст
-                text = elem.get_text(strip=True)
-                if text:
-                    node['children'] = [text]
-            
-            return node
-        
-        # Обрабатываем все элементы
-        for elem in soup.children:
-            if hasattr(elem, 'name') and elem.name:
-                node = element_to_node(elem)
-                if node and isinstance(node, dict):
-                    nodes.append(node)
-            elif isinstance(elem, str) and elem.strip():
-                # Простой текст между элементами
-                nodes.append({'tag': 'p', 'children': [elem.strip()]})
-        
-        return nodes if nodes else [{'tag': 'p', 'children': ['']}]
+        soup = html_parsing.make_soup(html_content)
+        return self.element_to_nodes(html_parsing.fragment_root(soup))
+    
+    def element_to_nodes(self, root, base_url: Optional[str] = None) -> List[Union[str, Dict[str, Any]]]:
+        """Преобразование дочерних элементов разобранного элемента в Telegraph Node (см. element_to_nodes)"""
+        return element_to_nodes(root, base_url)
+    
+    def content_to_nodes(self, content: Union[str, List[Union[str, Dict[str, Any]]]]) -> List[Union[str, Dict[str, Any]]]:
+        """Контент страницы в виде Node объектов: строка (текст или HTML) преобразуется, список - как есть"""
+        if isinstance(content, str):
+            # Определяем, HTML это или простой текст
+            if '<' in content and '>' in content:
+                return self.html_to_nodes(content)
+            return self.text_to_nodes(content)
+        return content
     
     def create_page(self, title: str, content: Union[str, List[Union[str, Dict[str, Any]]]], 
                     author_name: Optional[str] = None, author_url: Optional[str] = None,
@@ -204,21 +425,11 @@ class TelegraphPublisher:
         
         url = f"{self.BASE_URL}/createPage"
         
-        # Преобразование контента
-        if isinstance(content, str):
-            # Определяем, HTML это или простой текст
-            if '<' in content and '>' in content:
-                nodes = self.html_to_nodes(content)
-            else:
-                nodes = self.text_to_nodes(content)
-        else:
-            nodes = content
-        
         # Подготовка параметров
         params = {
             'access_token': self.access_token,
             'title': title,
-            'content': json.dumps(nodes, ensure_ascii=False)
+            'content': json.dumps(self.content_to_nodes(content), ensure_ascii=False, separators=(',', ':'))
         }
         
         if author_name:
@@ -229,9 +440,7 @@ class TelegraphPublisher:
             params['return_content'] = 'true'
         
         try:
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            data = self.api_request(url, params, method='POST')
             
             if data.get('ok'):
                 return data.get('result', {})
@@ -241,6 +450,52 @@ class TelegraphPublisher:
         except requests.exceptions.RequestException as e:
             raise Exception(f"Ошибка запроса к API: {e}")
     
+    def edit_page(self, path: str, title: str, content: Union[str, List[Union[str, Dict[str, Any]]]],
+                  author_name: Optional[str] = None, author_url: Optional[str] = None,
+                  return_content: bool = False) -> Dict[str, Any]:
+        """
+        Изменение существующей страницы Telegraph (адрес страницы сохраняется)
+        
+        Args:
+            path: Путь к странице (например, "Sample-Page-12-15")
+            title: Заголовок страницы (1-256 символов)
+            content: Контент страницы - строка или список Node объектов, как в create_page
+            author_name: Имя автора (0-128 символов)
+            author_url: URL профиля автора (0-512 символов)
+            return_content: Вернуть контент в ответе
+        
+        Returns:
+            Словарь с информацией об измененной странице
+        """
+        if not self.access_token:
+            raise Exception("Требуется access_token. Создайте аккаунт с помощью create_account()")
+        
+        url = f"{self.BASE_URL}/editPage/{path}"
+        
+        params = {
+            'access_token': self.access_token,
+            'title': title,
+            'content': json.dumps(self.content_to_nodes(content), ensure_ascii=False, separators=(',', ':'))
+        }
+        
+        if author_name:
+            params['author_name'] = author_name
+        if author_url:
+            params['author_url'] = author_url
+        if return_content:
+            params['return_content'] = 'true'
+        
+        try:
+            data = self.api_request(url, params, method='POST')
+            
+            if data.get('ok'):
+                return data.get('result', {})
+            else:
+                raise Exception(f"Ошибка изменения страницы: {data.get('error')}")
+        
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Ошибка запроса к API: {e}")
+    
     def get_page(self, path: str, return_content: bool = False) -> Dict[str, Any]:
         """
         Получение информации о странице Telegraph
@@ -259,9 +514,7 @@ class TelegraphPublisher:
             params['return_content'] = 'true'
         
         try:
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            data = self.api_request(url, params)
             
             if data.get('ok'):
                 return data.get('result', {})
@@ -291,9 +544,7 @@ class TelegraphPublisher:
             params['fields'] = json.dumps(fields)
         
         try:
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            data = self.api_request(url, params)
             
             if data.get('ok'):
                 return data.get('result', {})
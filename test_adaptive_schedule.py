@@ -0,0 +1,87 @@
+"""
+Тест адаптивного расписания опросов: распределение бюджета по часам недели и интервалы
+"""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from adaptive_schedule import HOURS_PER_WEEK, AdaptivePollScheduler
+from article_monitor import NakedCapitalismMonitor
+from db import Database
+
+# Все публикации истории - по вторникам с 14:00 до 15:00 UTC
+PEAK_WEEKDAY, PEAK_HOUR = 1, 14
+
+
+def last_peak_hour(now):
+    """Начало пикового часа (вторник 14:00) не позже now"""
+    days_back = (now.weekday() - PEAK_WEEKDAY) % 7
+    moment = (now - timedelta(days=days_back)).replace(hour=PEAK_HOUR, minute=0, second=0, microsecond=0)
+    return moment if moment <= now else moment - timedelta(days=7)
+
+
+def make_scheduler(db_path, polls_per_week):
+    return AdaptivePollScheduler(db_path, polls_per_week=polls_per_week, min_interval_minutes=10,
+                                 max_interval_hours=6)
+
+
+def test_budget_goes_to_peak_hours_within_limits():
+    """Пиковый час получает больше опросов, сумма в пределах бюджета, интервалы ограничены"""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        db_path = os.path.join(tmp, 'articles.db')
+        monitor = NakedCapitalismMonitor(database=Database(db_path))
+        try:
+            peak = last_peak_hour(datetime.utcnow())
+            # По 8 публикаций в пиковый час каждой из 6 последних недель
+            posted = [peak - timedelta(weeks=week) + timedelta(minutes=5 * n) for week in range(6) for n in range(8)]
+            monitor.save_articles_bulk([
+                {'title': f'Post {i}', 'url': f'https://example.com/{i}.html', 'author': 'Yves Smith',
+                 'date_posted': moment.strftime('%Y-%m-%d %H:%M:%S'), 'content_hash': ''}
+                for i, moment in enumerate(posted)
+            ])
+
+            scheduler = make_scheduler(db_path, polls_per_week=100)
+            scheduler.learn()
+            rates = scheduler.rates
+            peak_rate = rates[scheduler.hour_of_week(peak)]
+            quiet_rate = rates[scheduler.hour_of_week(peak - timedelta(hours=12))]
+            assert abs(sum(rates) - 100) < 1e-6
+            assert peak_rate > quiet_rate
+            # Корень из вероятности: час с 49 публикациями (со сглаживанием) получает
+            # опросы сверх минимальной частоты в 7 раз чаще, чем час без публикаций
+            floor = 1 / 6
+            assert abs((peak_rate - floor) / (quiet_rate - floor) - 7) < 1e-6
+            assert all(floor - 1e-9 <= rate <= 6 for rate in rates)
+
+            # В пиковый час - короче интервал, чем в тихий
+            quiet = peak + timedelta(hours=12)
+            assert scheduler.seconds_until_next_poll(peak) < scheduler.seconds_until_next_poll(quiet)
+
+            # Интеграция через границу часа: 10 минут тихого часа, остаток опроса - по частоте пикового
+            before = peak - timedelta(minutes=10)
+            before_rate = rates[scheduler.hour_of_week(before)]
+            expected = 600 + (1 - before_rate / 6) / peak_rate * 3600
+            assert abs(scheduler.seconds_until_next_poll(before) - expected) < 1e-3
+
+            # Большой бюджет упирается в min_interval, маленький - в max_interval
+            generous = make_scheduler(db_path, polls_per_week=5000)
+            generous.learn()
+            assert max(generous.rates) == 6
+            assert sum(generous.rates) <= 5000
+            assert generous.seconds_until_next_poll(peak) == 600
+            stingy = make_scheduler(db_path, polls_per_week=10)
+            stingy.learn()
+            assert all(rate == 1 / 6 for rate in stingy.rates)
+            assert stingy.seconds_until_next_poll(peak + timedelta(minutes=30)) == 6 * 3600
+            assert len(stingy.rates) == HOURS_PER_WEEK
+        finally:
+            monitor.db.close()
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    test_budget_goes_to_peak_hours_within_limits()
+    print("✅ Тест адаптивного расписания пройден")
@@ -0,0 +1,96 @@
+"""
+Тест загрузки архива на локальном сервере: курсор возобновления после ошибки страницы
+"""
+
+import os
+import tempfile
+
+from archive_backfill import ArchiveBackfill
+from article_monitor import NakedCapitalismMonitor
+from db import Database
+from testing_support import QuietHandler, fast_transport, local_server
+
+PAGES = 4
+POSTS_PER_PAGE = 3
+
+
+def post_html(page, n):
+    """Запись архива; у последней записи страницы только дата без времени"""
+    day = 28 - (page - 1) * POSTS_PER_PAGE - n
+    if n == POSTS_PER_PAGE - 1:
+        posted = f'<time>2020-01-{day:02d}</time>'
+    else:
+        posted = f'<time datetime="2020-01-{day:02d}T10:00:00+00:00">January {day}, 2020</time>'
+    return f'''
+<article class="post type-post hentry">
+<h2 class="entry-title"><a href="https://www.nakedcapitalism.com/2020/01/post-{page}-{n}.html">Post {page}.{n}</a></h2>
+<span class="author">Yves Smith</span> {posted}
+</article>'''
+
+
+class ArchiveHandler(QuietHandler):
+    """Главная страница и /page/N/ с записями; за последней страницей - 404, failing - 403"""
+    requested = []
+    failing = set()
+
+    def do_GET(self):
+        page = 1 if self.path == '/' else int(self.path.strip('/').split('/')[-1])
+        self.requested.append(page)
+        if page in self.failing or page > PAGES:
+            self.send_response(403 if page in self.failing else 404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = ('<html><body><main>' + ''.join(post_html(page, n) for n in range(POSTS_PER_PAGE))
+                + '</main></body></html>').encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def test_backfill_resumes_after_failed_page():
+    """Страницы после неудачной не сохраняются; повторный запуск продолжает с нее и доходит до конца"""
+    cwd = os.getcwd()
+    ArchiveHandler.requested = []
+    ArchiveHandler.failing = {3}
+    with local_server(ArchiveHandler) as site, tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        monitor = NakedCapitalismMonitor(discovery_backend='html', transport=fast_transport(),
+                                         database=Database(os.path.join(tmp, 'articles.db')))
+        monitor.base_url = f"{site}/"
+        reader = monitor.db.reader()
+
+        def count():
+            return reader.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+
+        try:
+            backfill = ArchiveBackfill(monitor, workers=2, min_interval=0, retries=1)
+            inserted = backfill.run()
+            # Сохранен только непрерывный префикс: страницы 1-2, курсор - на неудачной странице
+            assert inserted == count() == 2 * POSTS_PER_PAGE
+            assert backfill.load_cursor() == (3, False)
+
+            ArchiveHandler.failing = set()
+            ArchiveHandler.requested = []
+            assert backfill.run() == 2 * POSTS_PER_PAGE
+            assert count() == PAGES * POSTS_PER_PAGE
+            assert backfill.load_cursor() == (PAGES + 1, True)
+            # Сохраненные страницы повторно не загружаются
+            assert min(ArchiveHandler.requested) == 3
+            assert backfill.run() == 0
+
+            # created_at - время публикации; для даты без времени - полночь, а не момент загрузки
+            created = dict(reader.execute('SELECT url, created_at FROM articles'))
+            assert created['https://www.nakedcapitalism.com/2020/01/post-1-0.html'] == '2020-01-28 10:00:00'
+            assert created['https://www.nakedcapitalism.com/2020/01/post-1-2.html'] == '2020-01-26 00:00:00'
+            assert all(value.startswith('2020-01-') for value in created.values())
+        finally:
+            monitor.db.close()
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    test_backfill_resumes_after_failed_page()
+    print("✅ Тест загрузки архива пройден")
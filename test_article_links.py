@@ -0,0 +1,94 @@
+"""
+Тест индекса внешних ссылок статей на сохраненной подборке Links (fixtures/links.html)
+"""
+
+import os
+import sqlite3
+import tempfile
+
+import pytest
+
+from article_processor import ArticleProcessor, parse_article_body
+from benchmark_suite import load_corpus
+from html_cache import HtmlCache
+from telegraph_article_converter import parse_article_nodes
+from telegraph_publisher import nodes_links
+from testing_support import create_articles
+
+LINKS_URL = "https://www.nakedcapitalism.com/2026/10/links-10-16-2026.html"
+
+
+def test_links_index_answers_domain_queries():
+    """Внешние ссылки сохраняются без ссылок на сам сайт, поиск по домену идет по индексу"""
+    _, pages = load_corpus()
+    html = pages['links.html']
+    text, links = parse_article_body(html, LINKS_URL)
+    assert text
+    # Ссылки из дерева страницы и из узлов Telegraph (путь публикации) совпадают
+    assert nodes_links(parse_article_nodes(html, LINKS_URL)) == links
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'articles.db')
+        create_articles(db_path, [
+            {'title': 'Links 10/16/2026', 'url': LINKS_URL},
+            {'title': 'Old links', 'url': "https://www.nakedcapitalism.com/2020/01/links-1-1-2020.html",
+             'created_at': '2020-01-01 00:00:00'},
+        ])
+
+        processor = ArticleProcessor(db_path, cache=HtmlCache(os.path.join(tmp, 'cache')))
+        try:
+            inserted = processor.store_links(LINKS_URL, links)
+            domains = dict(processor.db.reader().execute('SELECT domain, COUNT(*) FROM article_links GROUP BY domain'))
+            assert 'nakedcapitalism.com' not in domains
+            assert inserted == sum(domains.values()) > 300
+            # Повторное сохранение не дублирует ссылки, replace заменяет набор
+            assert processor.store_links(LINKS_URL, links) == 0
+            assert processor.store_links(LINKS_URL, links[:5], replace=True) <= 5
+            processor.store_links(LINKS_URL, links, replace=True)
+            processor.store_links("https://www.nakedcapitalism.com/2020/01/links-1-1-2020.html", links)
+            # Статья вне базы не индексируется
+            assert processor.store_links("https://www.nakedcapitalism.com/unknown.html", links) == 0
+
+            domain, count = max(domains.items(), key=lambda item: item[1])
+            assert processor.find_articles_linking_to(domain) == [
+                ('Links 10/16/2026', LINKS_URL, processor.db.reader().execute(
+                    'SELECT created_at FROM articles WHERE id = 1').fetchone()[0], count)
+            ]
+            # Домен можно указать с www. или ссылкой; старая статья находится за больший период
+            assert processor.find_articles_linking_to(f"https://www.{domain}/any")[0][1] == LINKS_URL
+            assert len(processor.find_articles_linking_to(domain, days=100000)) == 2
+            assert processor.find_articles_linking_to('unknown.example') == []
+
+            # Поддомены находятся по родительскому домену, похожие домены - нет
+            processor.store_links("https://www.nakedcapitalism.com/2020/01/links-1-1-2020.html", [
+                ('https://markets.ft.com/data', 'Markets'),
+                ('https://on.ft.com/abc', 'Short link'),
+                ('https://notft.com/x', 'Lookalike'),
+                ('https://ft.com.evil.example/x', 'Lookalike'),
+            ])
+            assert [row[1:] for row in processor.find_articles_linking_to('ft.com', days=100000)] == [
+                ("https://www.nakedcapitalism.com/2020/01/links-1-1-2020.html", '2020-01-01 00:00:00', 2)
+            ]
+            assert processor.find_articles_linking_to('markets.ft.com', days=100000)[0][3] == 1
+
+            plan = ' '.join(row[3] for row in processor.db.reader().execute(
+                'EXPLAIN QUERY PLAN SELECT article_id FROM article_links '
+                'WHERE reversed_domain = ? OR (reversed_domain > ? AND reversed_domain < ?)',
+                ('com.ft', 'com.ft.', 'com.ft/')))
+            assert 'idx_article_links_reversed_domain' in plan
+            assert 'SCAN article_links' not in plan
+        finally:
+            processor.close()
+
+
+def test_processor_requires_articles_table():
+    """Процессор, созданный до таблицы статей, сообщает об ошибке, а не пропускает колонку summary"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with pytest.raises(sqlite3.OperationalError, match='no such table: articles'):
+            ArticleProcessor(os.path.join(tmp, 'articles.db'), cache=HtmlCache(os.path.join(tmp, 'cache')))
+
+
+if __name__ == "__main__":
+    test_links_index_answers_domain_queries()
+    test_processor_requires_articles_table()
+    print("✅ Тест индекса ссылок пройден")
@@ -0,0 +1,67 @@
+"""
+Тест поиска основного текста страницы по оценке блоков
+"""
+
+from bs4 import BeautifulSoup
+
+import html_parsing
+from content_extractor import extract_main_content
+
+PARAGRAPH = "The central bank kept rates unchanged, citing inflation, wages, and weak demand. "
+
+PAGE = f'''<html><body>
+<div id="sidebar" class="widget-area">
+  <p>{PARAGRAPH}</p>
+  <ul><li><a href="/a">Recent post with a long title number one</a></li>
+      <li><a href="/b">Recent post with a long title number two</a></li></ul>
+</div>
+<div class="post">
+  <div class="entry-content">
+    <p>{PARAGRAPH * 3}</p>
+    <p>{PARAGRAPH * 2}</p>
+    <script>var tracking = "should not be extracted";</script>
+    <p>{PARAGRAPH}</p>
+  </div>
+  <div id="comments" class="comments-area">
+    <div class="comment-body"><p>{PARAGRAPH}</p></div>
+    <div class="comment-body"><p>{PARAGRAPH}</p></div>
+  </div>
+</div>
+<div class="related-links"><a href="/c">{PARAGRAPH}</a> <a href="/d">{PARAGRAPH}</a></div>
+</body></html>'''
+
+
+def test_body_wins_over_sidebar_and_comments():
+    """Тело статьи набирает больше очков, чем боковая колонка, комментарии и блок ссылок"""
+    result = extract_main_content(html_parsing.make_soup(PAGE))
+    assert result.element.get('class') == ['entry-content']
+    assert len(result.blocks) == 3
+    assert result.blocks[0] == ' '.join((PARAGRAPH * 3).split())
+    # Служебные поддеревья удалены из найденного элемента
+    assert result.element.find('script') is None
+
+
+def test_deeply_nested_page_does_not_recurse():
+    """Обход без рекурсии: тысячи вложенных элементов не вызывают RecursionError"""
+    page = '<html><body>' + '<div>' * 3000 + f'<p>{PARAGRAPH}</p>' + '</div>' * 3000 + '</body></html>'
+    result = extract_main_content(BeautifulSoup(page, 'html.parser'))
+    assert result.blocks == [PARAGRAPH.strip()]
+
+
+def test_page_without_body_returns_none():
+    """Если ни один блок не набрал оценки основного текста, страница целиком не возвращается"""
+    chrome = '''<div class="menu"><a href="/">Home page of the site</a> <a href="/about">About the authors</a></div>
+    <div class="site-info">Copyright notice for the whole site</div>'''
+    # Нет абзацев - нет кандидатов
+    assert extract_main_content(html_parsing.make_soup(f'<html><body>{chrome}</body></html>')) is None
+    # Единственный абзац в боковой колонке: очки <body> от него ниже MIN_CONTENT_SCORE
+    page = f'<html><body>{chrome}<div id="sidebar"><p>{PARAGRAPH}</p></div></body></html>'
+    assert extract_main_content(html_parsing.make_soup(page)) is None
+    assert extract_main_content(html_parsing.make_soup('<html><body></body></html>')) is None
+
+
+if __name__ == "__main__":
+    test_body_wins_over_sidebar_and_comments()
+    test_deeply_nested_page_does_not_recurse()
+    test_page_without_body_returns_none()
+    print("✅ Тест поиска основного текста пройден")
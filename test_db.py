@@ -0,0 +1,135 @@
+"""
+Тест доступа к базе статей: чтение во время записи, вложенные транзакции и закрытие общей базы
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+
+import pytest
+
+from db import Database, get_database
+
+
+def test_reader_not_blocked_by_open_write():
+    """Пока транзакция записи открыта, другой поток читает последнюю зафиксированную версию"""
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Database(os.path.join(tmp, 'articles.db'))
+        try:
+            with database.write() as conn:
+                conn.execute('CREATE TABLE articles (id INTEGER PRIMARY KEY, title TEXT)')
+                conn.execute("INSERT INTO articles (title) VALUES ('first')")
+            assert database.reader().execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+            results = []
+
+            def read_titles():
+                rows = database.reader().execute('SELECT title FROM articles ORDER BY id').fetchall()
+                results.append([title for title, in rows])
+
+            with database.write() as conn:
+                conn.execute("INSERT INTO articles (title) VALUES ('second')")
+                reader = threading.Thread(target=read_titles)
+                reader.start()
+                reader.join(timeout=5)
+                assert not reader.is_alive()
+                # Незафиксированная строка не видна читателю
+                assert results == [['first']]
+
+            read_titles()
+            assert results[-1] == ['first', 'second']
+        finally:
+            database.close()
+
+
+def test_nested_write_commits_once_and_rolls_back():
+    """Вложенный write входит во внешнюю транзакцию и откатывается вместе с ней"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'articles.db')
+        database = get_database(path)
+        # Один экземпляр на файл, в том числе по относительному пути
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            assert get_database('articles.db') is database
+        finally:
+            os.chdir(cwd)
+        # Второй владелец освобождает экземпляр сразу
+        database.close()
+
+        try:
+            with database.write() as conn:
+                conn.execute('CREATE TABLE articles (id INTEGER PRIMARY KEY, title TEXT)')
+
+            with pytest.raises(RuntimeError):
+                with database.write() as conn:
+                    conn.execute("INSERT INTO articles (title) VALUES ('outer')")
+                    with database.write() as inner:
+                        inner.execute("INSERT INTO articles (title) VALUES ('inner')")
+                    # Вложенный блок не зафиксировал изменения
+                    assert database.reader().execute('SELECT COUNT(*) FROM articles').fetchone()[0] == 0
+                    raise RuntimeError('abort')
+            assert database.reader().execute('SELECT COUNT(*) FROM articles').fetchone()[0] == 0
+
+            with database.write() as conn:
+                with database.write() as inner:
+                    inner.execute("INSERT INTO articles (title) VALUES ('inner')")
+                conn.execute("INSERT INTO articles (title) VALUES ('outer')")
+            assert database.reader().execute('SELECT COUNT(*) FROM articles').fetchone()[0] == 2
+        finally:
+            database.close()
+        assert get_database(path) is not database
+        get_database(path).close()
+
+
+def test_close_by_one_owner_keeps_database_open():
+    """Закрытие в одном компоненте не закрывает общую базу; последний владелец закрывает читателей всех потоков"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'articles.db')
+        monitor_db = get_database(path)
+        script_db = get_database(path)
+        assert script_db is monitor_db
+        with monitor_db.write() as conn:
+            conn.execute('CREATE TABLE articles (id INTEGER PRIMARY KEY, title TEXT)')
+
+        readers = []
+
+        def read_count():
+            readers.append(monitor_db.reader())
+            readers[-1].execute('SELECT COUNT(*) FROM articles').fetchone()
+
+        # Читатель другого потока, который еще работает, и читатель текущего потока
+        started, finish = threading.Event(), threading.Event()
+        worker = threading.Thread(target=lambda: (read_count(), started.set(), finish.wait(5)))
+        worker.start()
+        started.wait(5)
+        read_count()
+
+        # Скрипт закрывает свою ссылку (например, в finally): база открыта для остальных
+        script_db.close()
+        with monitor_db.write() as conn:
+            conn.execute("INSERT INTO articles (title) VALUES ('still open')")
+        assert monitor_db.reader().execute('SELECT COUNT(*) FROM articles').fetchone()[0] == 1
+        # Экземпляр остается в реестре; владелец, полученный проверкой, сразу освобождается
+        assert get_database(path) is monitor_db
+        monitor_db.close()
+
+        # Последний владелец закрывает писателя и читателей всех потоков
+        monitor_db.close()
+        for conn in readers:
+            with pytest.raises(sqlite3.ProgrammingError):
+                conn.execute('SELECT 1')
+        # Повторное закрытие ничего не делает
+        monitor_db.close()
+        finish.set()
+        worker.join(timeout=5)
+        assert get_database(path) is not monitor_db
+        get_database(path).close()
+
+
+if __name__ == "__main__":
+    test_reader_not_blocked_by_open_write()
+    test_nested_write_commits_once_and_rolls_back()
+    test_close_by_one_owner_keeps_database_open()
+    print("✅ Тест доступа к базе пройден")
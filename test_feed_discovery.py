@@ -0,0 +1,81 @@
+"""
+Тест обнаружения статей по RSS-ленте на локальном сервере: условный запрос и закрытие потокового ответа
+"""
+
+import os
+import tempfile
+
+from article_monitor import NakedCapitalismMonitor
+from db import Database
+from testing_support import QuietHandler, fast_transport, local_server
+
+FEED = b'''<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/">
+<channel>
+<title>Naked Capitalism</title>
+<item>
+<title>Links 1/2/2020</title>
+<link>https://www.nakedcapitalism.com/2020/01/links-1-2-2020.html</link>
+<dc:creator>Lambert Strether</dc:creator>
+<pubDate>Thu, 02 Jan 2020 06:55:00 +0000</pubDate>
+<guid>https://www.nakedcapitalism.com/?p=2</guid>
+</item>
+<item>
+<title>Links 1/1/2020</title>
+<link>https://www.nakedcapitalism.com/2020/01/links-1-1-2020.html</link>
+<dc:creator>Lambert Strether</dc:creator>
+<pubDate>Wed, 01 Jan 2020 06:55:00 +0000</pubDate>
+<guid>https://www.nakedcapitalism.com/?p=1</guid>
+</item>
+</channel>
+</rss>'''
+
+
+class FeedHandler(QuietHandler):
+    """Лента с ETag; If-None-Match с тем же ETag - 304"""
+
+    def do_GET(self):
+        if self.headers.get('If-None-Match') == '"feed-1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/rss+xml; charset=UTF-8')
+        self.send_header('Content-Length', str(len(FEED)))
+        self.send_header('ETag', '"feed-1"')
+        self.end_headers()
+        self.wfile.write(FEED)
+
+
+def test_feed_responses_are_closed():
+    """Новые статьи из ленты, повторный опрос - 304; потоковый ответ закрыт в обоих случаях"""
+    cwd = os.getcwd()
+    with local_server(FeedHandler) as site, tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        monitor = NakedCapitalismMonitor(discovery_backend='feed', transport=fast_transport(),
+                                         database=Database(os.path.join(tmp, 'articles.db')))
+        monitor.feed_url = f"{site}/feed/"
+        responses = []
+        get_page_if_modified = monitor.get_page_if_modified
+
+        def recording_get(url, stream=False):
+            response = get_page_if_modified(url, stream=stream)
+            responses.append(response)
+            return response
+
+        monitor.get_page_if_modified = recording_get
+        try:
+            new_articles = monitor.check_for_new_articles()
+            assert [article['title'] for article in new_articles] == ['Links 1/2/2020', 'Links 1/1/2020']
+            assert monitor.check_for_new_articles() == []
+            assert [response.status_code for response in responses] == [200, 304]
+            # Закрытый потоковый ответ возвращает соединение в пул
+            assert all(response.raw.closed and response.raw.connection is None for response in responses)
+        finally:
+            monitor.db.close()
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    test_feed_responses_are_closed()
+    print("✅ Тест обнаружения статей по ленте пройден")
@@ -0,0 +1,74 @@
+"""
+Тест параллельной загрузки статей: одинаковый результат в потоках и в пуле процессов разбора
+"""
+
+import os
+import tempfile
+
+from article_processor import ArticleProcessor, parse_article_body, parse_article_text
+from benchmark_suite import load_corpus
+from html_cache import HtmlCache
+from testing_support import create_articles, fast_transport, fixtures_server
+
+
+def test_fetch_many_same_result_in_threads_and_processes():
+    """Одна функция разбора дает одинаковый результат при любом PARSE_WORKERS"""
+    transport = fast_transport()
+    with fixtures_server() as site, tempfile.TemporaryDirectory() as tmp:
+        base = site + '/'
+        urls = [base + 'article.html', base + 'links.html', base + 'missing.html']
+        create_articles(os.path.join(tmp, 'articles.db'), [{'title': 'Test', 'url': url} for url in urls])
+        results = {}
+        for workers in (0, 2):
+            processor = ArticleProcessor(os.path.join(tmp, 'articles.db'), transport=transport,
+                                         cache=HtmlCache(os.path.join(tmp, f'cache-{workers}')),
+                                         streaming=False, parse_workers=workers)
+            try:
+                results[workers] = (dict(processor.fetch_many(urls, parse=parse_article_body)),
+                                    dict(processor.fetch_many(urls)))
+            finally:
+                processor.close()
+
+        bodies, texts = results[0]
+        assert results[2] == results[0]
+        assert bodies[base + 'missing.html'] is None and texts[base + 'missing.html'] is None
+        text, links = bodies[base + 'links.html']
+        assert len(links) > 300
+        _, pages = load_corpus()
+        assert texts[base + 'links.html'] == text == parse_article_text(pages['links.html'])
+
+
+def test_fetch_paths_store_summary_once():
+    """Любой путь загрузки текста сохраняет краткое содержание; повторная загрузка его не пересчитывает"""
+    transport = fast_transport()
+    with fixtures_server() as site, tempfile.TemporaryDirectory() as tmp:
+        urls = [site + '/article.html', site + '/links.html']
+        db_path = os.path.join(tmp, 'articles.db')
+        create_articles(db_path, [{'title': 'Test', 'url': url} for url in urls])
+        for streaming in (True, False):
+            processor = ArticleProcessor(db_path, transport=transport,
+                                         cache=HtmlCache(os.path.join(tmp, f'cache-{streaming}')),
+                                         streaming=streaming, parse_workers=0)
+            calls = []
+            extract_summary = processor.extract_summary
+            processor.extract_summary = lambda content: calls.append(content) or extract_summary(content)
+            try:
+                if streaming:
+                    texts = dict(processor.fetch_many(urls))
+                    assert len(calls) == len(urls)
+                    assert all(processor.get_summary(url) for url in urls)
+                    assert processor.fetch_article_content(urls[0]) == texts[urls[0]]
+                else:
+                    summary = processor.get_summary(urls[0])
+                    # Текст другой функции разбора сохраняет вызывающий код
+                    dict(processor.fetch_many(urls, parse=parse_article_body))
+                    assert processor.ingest_articles(urls)[urls[0]] == summary
+                assert len(calls) == (len(urls) if streaming else 0)
+            finally:
+                processor.close()
+
+
+if __name__ == "__main__":
+    test_fetch_many_same_result_in_threads_and_processes()
+    test_fetch_paths_store_summary_once()
+    print("✅ Тест параллельной загрузки пройден")
@@ -0,0 +1,51 @@
+"""
+Тесты набора сохраненных страниц (fixtures/) и сравнения результатов замеров
+"""
+
+from article_monitor import NakedCapitalismMonitor
+from benchmark_suite import compare, load_corpus, run_suite
+
+
+def test_corpus_matches_manifest():
+    """Страницы совпадают с контрольными суммами, главная разбирается в ожидаемое число статей"""
+    manifest, pages = load_corpus()
+    assert set(pages) == {fixture['name'] for fixture in manifest['fixtures']}
+
+    monitor = NakedCapitalismMonitor.__new__(NakedCapitalismMonitor)
+    monitor.base_url = "https://www.nakedcapitalism.com/"
+    for fixture in manifest['fixtures']:
+        if fixture['kind'] == 'homepage':
+            articles = monitor.parse_articles(pages[fixture['name']])
+            assert len(articles) == fixture['expected_articles']
+            assert len({a['url'] for a in articles}) == len(articles)
+
+
+def test_suite_runs_every_function():
+    """Каждая замеряемая функция выполняется на каждой подходящей странице"""
+    manifest, results = run_suite(repeat=1)
+    functions = {key.split(':')[0] for key in results}
+    assert functions == {'parse_articles', 'extract_main_content', 'extract_summary',
+                         'format_article_for_telegraph', 'html_to_nodes', 'html_to_article_nodes'}
+    for stats in results.values():
+        assert stats['p50_ms'] <= stats['p99_ms']
+        assert stats['peak_kb'] > 0
+
+
+def test_compare_reports_regressions_past_threshold():
+    baseline = {'results': {'f:page.html': {'p50_ms': 10.0, 'p99_ms': 20.0, 'peak_kb': 100.0}}}
+    within = {'f:page.html': {'p50_ms': 12.0, 'p99_ms': 25.0, 'peak_kb': 120.0}}
+    slower = {'f:page.html': {'p50_ms': 13.0, 'p99_ms': 25.0, 'peak_kb': 100.0}}
+    heavier = {'f:page.html': {'p50_ms': 10.0, 'p99_ms': 20.0, 'peak_kb': 200.0}}
+
+    assert compare(within, baseline, 0.25) == []
+    assert [r.split()[1] for r in compare(slower, baseline, 0.25)] == ['p50_ms:']
+    assert [r.split()[1] for r in compare(heavier, baseline, 0.25)] == ['peak_kb:']
+    # Функции, которых нет в baseline, не сравниваются
+    assert compare({'g:page.html': within['f:page.html']}, baseline, 0.25) == []
+
+
+if __name__ == "__main__":
+    test_corpus_matches_manifest()
+    test_suite_runs_every_function()
+    test_compare_reports_regressions_past_threshold()
+    print("✅ Тесты набора страниц пройдены")
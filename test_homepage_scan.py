@@ -0,0 +1,81 @@
+"""
+Тест потокового чтения главной страницы до известных статей (fixtures/homepage.html)
+"""
+
+import os
+import tempfile
+
+from article_monitor import KNOWN_HEADINGS_TO_STOP, STREAM_CHUNK_SIZE, NakedCapitalismMonitor
+from benchmark_suite import load_corpus
+from db import Database
+
+STICKY_URL = "https://www.nakedcapitalism.com/2020/01/fundraiser-sticky.html"
+STICKY_POST = f'''
+<article id="post-1" class="post-1 post type-post sticky hentry">
+<header class="entry-header">
+<h2 class="entry-title"><a href="{STICKY_URL}" rel="bookmark">Our Annual Fundraiser Is Under Way</a></h2>
+</header>
+<div class="entry-content"><p>Please donate.</p></div>
+</article>
+'''
+
+
+def make_homepage(monitor, html):
+    """Главная страница с закрепленной записью и ссылкой на старую запись в анонсе второй"""
+    urls = [article['url'] for article in monitor.parse_articles(html)]
+    main_start = html.index('>', html.index('<main')) + 1
+    html = html[:main_start] + STICKY_POST + html[main_start:]
+    # Ссылка в тексте анонса второй записи на запись ниже по странице
+    second = html.index('<div class="entry-content">', html.index(urls[1]))
+    cross_link = f'<p>See also <a href="{urls[20]}">our earlier post on the same subject</a>.</p>'
+    second += len('<div class="entry-content">')
+    return html[:second] + cross_link + html[second:], urls
+
+
+def scan(monitor, page):
+    chunks = [page[i:i + STREAM_CHUNK_SIZE] for i in range(0, len(page), STREAM_CHUNK_SIZE)]
+    return monitor.read_until_known_article(chunks)
+
+
+def remember(monitor, urls):
+    monitor.save_articles([{'title': url, 'url': url, 'author': 'Unknown', 'date_posted': '',
+                            'content_hash': ''} for url in urls])
+
+
+def test_scan_stops_only_on_known_post_headings():
+    """Закрепленная запись, известная первая запись и ссылки в анонсах не останавливают чтение"""
+    _, pages = load_corpus()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        monitor = NakedCapitalismMonitor(database=Database(os.path.join(tmp, 'articles.db')))
+        try:
+            html, urls = make_homepage(monitor, pages['homepage.html'].decode('utf-8'))
+            page = html.encode('utf-8')
+            assert len(urls) == 25
+
+            remember(monitor, [STICKY_URL, urls[0], urls[20]])
+            content, stopped = scan(monitor, page)
+            assert not stopped and content == page
+            assert [a['url'] for a in monitor.parse_articles(content)] == [STICKY_URL] + urls
+
+            # Одна известная запись посреди новых тоже не останавливает чтение
+            remember(monitor, [urls[10]])
+            assert scan(monitor, page) == (page, False)
+
+            # Известны все записи начиная с шестой: чтение останавливается после нескольких подряд
+            remember(monitor, urls[5:])
+            content, stopped = scan(monitor, page)
+            assert stopped and len(content) < len(page) // 2
+            # Чтение идет фрагментами, поэтому после остановки могут остаться еще записи из того же фрагмента
+            parsed = [a['url'] for a in monitor.parse_articles(content)]
+            assert parsed == ([STICKY_URL] + urls)[:len(parsed)]
+            assert 6 + KNOWN_HEADINGS_TO_STOP <= len(parsed) < 26
+        finally:
+            monitor.db.close()
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    test_scan_stops_only_on_known_post_headings()
+    print("✅ Тест чтения главной страницы пройден")
@@ -0,0 +1,77 @@
+"""
+Тест кэша HTML статей на локальном сервере: попадание, промах, ревалидация и вытеснение LRU
+"""
+
+import os
+import tempfile
+from collections import Counter
+
+from html_cache import HtmlCache
+from testing_support import QuietHandler, fast_transport, local_server
+
+# Несжимаемое содержимое: размер файла в кэше близок к размеру страницы
+PAGES = {f'/page-{n}.html': os.urandom(1000) for n in range(1, 4)}
+
+
+class PageHandler(QuietHandler):
+    """Страницы с ETag; If-None-Match с тем же ETag - 304"""
+    hits = Counter()
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        self.hits[path] += 1
+        etag = f'"{path}"'
+        if path not in PAGES:
+            self.send_response(404)
+            self.end_headers()
+            return
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(PAGES[path])))
+        self.end_headers()
+        self.wfile.write(PAGES[path])
+
+
+def test_cache_hit_miss_revalidation_and_lru_eviction():
+    transport = fast_transport()
+    with local_server(PageHandler) as base:
+        with tempfile.TemporaryDirectory() as tmp:
+            # Промах загружает страницу, повторное обращение (в том числе с utm-параметрами) - из кэша
+            cache = HtmlCache(os.path.join(tmp, 'fresh'), max_bytes=10 ** 6, ttl_seconds=3600)
+            assert cache.lookup(base + '/page-1.html') is None
+            assert cache.fetch(transport, base + '/page-1.html') == PAGES['/page-1.html']
+            assert cache.fetch(transport, base + '/page-1.html?utm_source=tg#comments') == PAGES['/page-1.html']
+            assert PageHandler.hits['/page-1.html'] == 1
+            cache.close()
+
+            # Устаревшая запись ревалидируется условным запросом (304 без тела)
+            cache = HtmlCache(os.path.join(tmp, 'stale'), max_bytes=10 ** 6, ttl_seconds=0)
+            cache.fetch(transport, base + '/page-2.html')
+            entry = cache.lookup(base + '/page-2.html')
+            assert entry.etag == '"/page-2.html"' and not entry.fresh
+            assert cache.fetch(transport, base + '/page-2.html') == PAGES['/page-2.html']
+            assert PageHandler.hits['/page-2.html'] == 2
+            cache.close()
+
+            # В кэш помещаются две страницы: вытесняется та, к которой дольше не обращались
+            cache = HtmlCache(os.path.join(tmp, 'lru'), max_bytes=2500, ttl_seconds=3600)
+            cache.fetch(transport, base + '/page-1.html')
+            cache.fetch(transport, base + '/page-2.html')
+            assert cache.lookup(base + '/page-1.html') is not None
+            cache.fetch(transport, base + '/page-3.html')
+            assert cache.lookup(base + '/page-2.html') is None
+            assert cache.lookup(base + '/page-1.html').content == PAGES['/page-1.html']
+            assert cache.lookup(base + '/page-3.html').content == PAGES['/page-3.html']
+            blobs = [name for _, _, files in os.walk(os.path.join(tmp, 'lru')) for name in files
+                     if name.endswith('.html.gz')]
+            assert len(blobs) == 2
+            cache.close()
+
+
+if __name__ == "__main__":
+    test_cache_hit_miss_revalidation_and_lru_eviction()
+    print("✅ Тест кэша HTML пройден")
@@ -0,0 +1,100 @@
+"""
+Тест ограничения частоты и повторов HTTP-запросов на локальном сервере (синхронный и async клиенты)
+"""
+
+import asyncio
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import async_http
+from http_transport import HttpTransport, RateLimiter
+from testing_support import QuietHandler, local_server
+
+
+class FlakyHandler(QuietHandler):
+    """/limited - сначала 429 с Retry-After, /flaky - сначала 503, затем 200"""
+    hits = Counter()
+
+    def do_GET(self):
+        self.hits[self.path] += 1
+        if self.path == '/limited' and self.hits[self.path] == 1:
+            self.send_response(429)
+            self.send_header('Retry-After', '1')
+        elif self.path == '/flaky' and self.hits[self.path] == 1:
+            self.send_response(503)
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+
+@contextmanager
+def flaky_server():
+    FlakyHandler.hits.clear()
+    with local_server(FlakyHandler) as site:
+        # Один сервер под двумя именами - для ограничителя это два разных хоста
+        yield site, site.replace('127.0.0.1', 'localhost')
+
+
+def run_async(coroutine):
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await async_http.close_session()
+    return asyncio.run(main())
+
+
+def test_retry_after_pauses_only_its_host():
+    """Retry-After приостанавливает корзину хоста, запрос повторяется после паузы"""
+    with flaky_server() as (first_host, second_host):
+        limiter = RateLimiter(default_limit=(100.0, 100))
+        transport = HttpTransport(limiter=limiter)
+        started = time.monotonic()
+        response = transport.get(first_host + '/limited')
+        assert response.status_code == 200
+        assert time.monotonic() - started >= 0.9
+        assert FlakyHandler.hits['/limited'] == 2
+
+        assert limiter.bucket(first_host).paused_until > 0
+        assert limiter.bucket(second_host).paused_until == 0
+
+
+def test_async_requests_share_limiter_and_retry_policy():
+    """Асинхронные запросы расходуют ту же корзину, что и синхронный транспорт, и повторяются при 503/429"""
+    with flaky_server() as (first_host, _):
+        # Без всплеска: 10 запросов при 10 в секунду занимают не меньше 0.9 с
+        limiter = RateLimiter(default_limit=(10.0, 1))
+        transport = HttpTransport(limiter=limiter)
+
+        async def fetch(path):
+            async with async_http.get(first_host + path, limiter=limiter) as response:
+                return response.status, await response.read()
+
+        async def mixed():
+            sync_requests = asyncio.gather(*(asyncio.to_thread(transport.get, first_host + '/ok')
+                                             for _ in range(5)))
+            results = await asyncio.gather(*(fetch('/ok') for _ in range(5)))
+            await sync_requests
+            return results
+
+        started = time.monotonic()
+        assert run_async(mixed()) == [(200, b'ok')] * 5
+        assert time.monotonic() - started >= 0.8
+        assert FlakyHandler.hits['/ok'] == 10
+
+        limiter = RateLimiter(default_limit=(100.0, 100))
+        assert run_async(fetch('/flaky')) == (200, b'ok')
+        assert FlakyHandler.hits['/flaky'] == 2
+        started = time.monotonic()
+        assert run_async(fetch('/limited')) == (200, b'ok')
+        assert time.monotonic() - started >= 0.9
+        assert limiter.bucket(first_host).paused_until > 0
+
+
+if __name__ == "__main__":
+    test_retry_after_pauses_only_its_host()
+    test_async_requests_share_limiter_and_retry_policy()
+    print("✅ Тест HTTP-транспорта пройден")
@@ -0,0 +1,114 @@
+"""
+Тест выгрузки изображений в Telegraph на локальном сервере (сайт и имитация /upload)
+"""
+
+import json
+import tempfile
+
+from image_store import ImageStore
+from testing_support import QuietHandler, fast_transport, local_server
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'chart' * 100
+JPEG = b'\xff\xd8\xff\xe0' + b'photo' * 100
+IMAGES = {
+    '/img/chart.png': PNG,
+    '/img/chart-copy.png': PNG,          # Тот же график под другим адресом
+    '/img/photo.jpg': JPEG,
+    '/img/big.png': PNG + b'0' * 4096,   # Больше max_bytes
+    '/img/logo.svg': b'<svg xmlns="http://www.w3.org/2000/svg"></svg>',
+}
+
+
+class ImageSiteHandler(QuietHandler):
+    """Изображения сайта и имитация https://telegra.ph/upload"""
+    requests_log = []
+    uploads = []
+    fail_uploads = False
+
+    def do_GET(self):
+        self.requests_log.append(self.path)
+        data = IMAGES.get(self.path)
+        if data is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        if self.fail_uploads:
+            result = {"error": "Unknown error"}
+        else:
+            self.uploads.append(body)
+            result = [{"src": f"/file/{len(self.uploads)}.png"}]
+        data = json.dumps(result).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def img(src):
+    return {'tag': 'img', 'attrs': {'src': src}}
+
+
+def test_rehost_images_uploads_each_image_once():
+    """Каждое уникальное изображение выгружается один раз, известные источники не загружаются"""
+    transport = fast_transport()
+    with local_server(ImageSiteHandler) as site, tempfile.TemporaryDirectory() as tmp:
+        store = ImageStore(tmp, transport=transport, upload_url=f"{site}/upload", max_bytes=1024)
+        try:
+            # Выгрузка не удалась - изображения остаются ссылками на сайт и не запоминаются
+            ImageSiteHandler.fail_uploads = True
+            nodes = [img(f"{site}/img/chart.png")]
+            assert store.rehost_images(nodes) == 0
+            assert nodes[0]['attrs']['src'] == f"{site}/img/chart.png"
+            ImageSiteHandler.fail_uploads = False
+
+            nodes = [
+                {'tag': 'p', 'children': ['Chart of the day', img(f"{site}/img/chart.png")]},
+                {'tag': 'figure', 'children': [img(f"{site}/img/chart-copy.png"), {'tag': 'figcaption', 'children': ['Copy']}]},
+                img(f"{site}/img/photo.jpg"),
+                img(f"{site}/img/big.png"),
+                img(f"{site}/img/logo.svg"),
+                img(f"{site}/img/chart.png"),
+            ]
+            ImageSiteHandler.requests_log.clear()
+            assert store.rehost_images(nodes) == 2
+            assert len(ImageSiteHandler.uploads) == 2
+            # Каждый источник загружен один раз, хотя chart.png встречается дважды
+            assert sorted(ImageSiteHandler.requests_log) == sorted(IMAGES)
+
+            chart = nodes[0]['children'][1]['attrs']['src']
+            assert chart.startswith(f"{site}/file/")
+            assert nodes[1]['children'][0]['attrs']['src'] == chart
+            assert nodes[5]['attrs']['src'] == chart
+            assert nodes[2]['attrs']['src'].startswith(f"{site}/file/") and nodes[2]['attrs']['src'] != chart
+            # Слишком большое и неподдерживаемое изображения остаются ссылками на сайт
+            assert nodes[3]['attrs']['src'] == f"{site}/img/big.png"
+            assert nodes[4]['attrs']['src'] == f"{site}/img/logo.svg"
+
+            # Следующая статья: известный источник берется из индекса без загрузки,
+            # тот же график под новым адресом загружается, но не выгружается
+            IMAGES['/img/chart-2026-10-16.png'] = PNG
+            ImageSiteHandler.requests_log.clear()
+            nodes = [img(f"{site}/img/chart-copy.png"), img(f"{site}/img/chart-2026-10-16.png")]
+            assert store.rehost_images(nodes) == 0
+            assert len(ImageSiteHandler.uploads) == 2
+            assert ImageSiteHandler.requests_log == ['/img/chart-2026-10-16.png']
+            assert [node['attrs']['src'] for node in nodes] == [chart, chart]
+        finally:
+            IMAGES.pop('/img/chart-2026-10-16.png', None)
+            ImageSiteHandler.fail_uploads = False
+            store.close()
+
+
+if __name__ == "__main__":
+    test_rehost_images_uploads_each_image_once()
+    print("✅ Тест выгрузки изображений пройден")
@@ -60,7 +60,7 @@ def test_monitor():
     print(f"🆕 Найдено новых статей: {len(new_articles)}")
     
     # Закрытие соединения с БД
-    monitor.conn.close()
+    monitor.db.close()
     
     print("\n✅ Тестирование завершено!")
 
@@ -79,7 +79,7 @@ def test_single_check():
     else:
         print("📝 Новых статей не найдено")
     
-    monitor.conn.close()
+    monitor.db.close()
 
 if __name__ == "__main__":
     import sys
@@ -0,0 +1,51 @@
+"""
+Тест разбиения больших статей на страницы Telegraph не больше 64 КБ
+"""
+
+from benchmark_suite import load_corpus
+from telegraph_article_converter import parse_article_nodes
+from telegraph_publisher import CONTENT_SIZE_LIMIT, nodes_size, nodes_text, paginate_nodes
+
+LINKS_URL = "https://www.nakedcapitalism.com/2026/10/links-10-16-2026.html"
+
+
+def test_large_article_parts_fit_limit():
+    """Подборка Links больше ограничения делится на части без потери текста"""
+    _, pages = load_corpus()
+    nodes = parse_article_nodes(pages['links.html'], LINKS_URL)
+    assert nodes_size(nodes) > CONTENT_SIZE_LIMIT
+
+    parts = paginate_nodes(nodes)
+    assert len(parts) > 1
+    assert all(nodes_size(part) <= CONTENT_SIZE_LIMIT for part in parts)
+    # Узлы верхнего уровня переносятся целиком и в исходном порядке
+    assert [node for part in parts for node in part] == nodes
+    assert paginate_nodes(nodes[:3]) == [nodes[:3]]
+
+
+def test_oversized_node_is_split_by_tag():
+    """Узел больше ограничения (длинная цитата) делится на несколько узлов того же тега"""
+    paragraph = ' '.join(f"word{i}" for i in range(20000))
+    quote = {'tag': 'blockquote', 'children': [paragraph, {'tag': 'a', 'attrs': {'href': 'https://example.com/'},
+                                                           'children': ['source']}]}
+    nodes = [{'tag': 'p', 'children': ['Intro paragraph.']}, quote]
+    assert nodes_size(quote) > CONTENT_SIZE_LIMIT
+
+    parts = paginate_nodes(nodes)
+    assert len(parts) > 1
+    assert all(nodes_size(part) <= CONTENT_SIZE_LIMIT for part in parts)
+    pieces = [node for part in parts for node in part][1:]
+    assert len(pieces) > 1 and all(piece['tag'] == 'blockquote' for piece in pieces)
+    # Текст цитаты сохраняется целиком, слова не разрываются
+    assert nodes_text(pieces).split() == nodes_text([quote]).split()
+
+    # Меньший бюджет - больше частей, каждая в пределах бюджета
+    small = paginate_nodes(nodes, budget=4096)
+    assert len(small) > len(parts)
+    assert all(nodes_size(part) <= 4096 for part in small)
+
+
+if __name__ == "__main__":
+    test_large_article_parts_fit_limit()
+    test_oversized_node_is_split_by_tag()
+    print("✅ Тест разбиения на страницы пройден")
@@ -0,0 +1,200 @@
+"""
+Тест обновления страниц Telegraph для измененных статей (локальный сайт и имитация Telegraph API)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from urllib.parse import parse_qs
+
+from benchmark_suite import load_corpus
+from html_cache import HtmlCache
+from image_store import ImageStore
+from telegraph_article_converter import TelegraphArticleConverter
+from testing_support import QuietHandler, create_articles, fast_transport, local_server
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'photo' * 100
+
+
+class SiteAndTelegraphHandler(QuietHandler):
+    """
+    GET /article.html - страница статьи, GET /photo.png - изображение,
+    POST /createPage и /editPage/<path> - Telegraph API, POST /upload - выгрузка изображений
+    """
+    page = b''
+    api_calls = []
+    uploads = []
+    upload_fails = False
+    failing_call = None  # Номер запроса к Telegraph API, который завершится ошибкой
+
+    def do_GET(self):
+        if self.path.endswith('.png'):
+            data, content_type = PNG, 'image/png'
+        else:
+            data, content_type = self.page, 'text/html; charset=utf-8'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        method = self.path.strip('/').split('/')[0]
+        if method == 'upload':
+            self.uploads.append(self.path)
+            result = {"error": "upload failed"} if self.upload_fails else [{"src": "/file/photo.png"}]
+            data = json.dumps(result).encode()
+        else:
+            params = parse_qs(body.decode())
+            self.api_calls.append(method)
+            path = self.path.split('/')[-1] if method == 'editPage' else f"Page-{len(self.api_calls)}"
+            result = {"path": path, "url": f"https://telegra.ph/{path}", "title": params['title'][0]}
+            if len(self.api_calls) == self.failing_call:
+                data = json.dumps({"ok": False, "error": "PAGE_SAVE_FAILED"}).encode()
+            else:
+                data = json.dumps({"ok": True, "result": result}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@contextmanager
+def published_site(page):
+    """Конвертер статьи id=1 со страницей page на локальном сайте и имитацией Telegraph API"""
+    SiteAndTelegraphHandler.page = page
+    SiteAndTelegraphHandler.api_calls = []
+    SiteAndTelegraphHandler.uploads = []
+    SiteAndTelegraphHandler.failing_call = None
+    transport = fast_transport()
+    with local_server(SiteAndTelegraphHandler) as site, tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'articles.db')
+        create_articles(db_path, [{'title': 'Refresh test', 'url': f"{site}/article.html", 'author': 'Yves Smith'}])
+        images = ImageStore(os.path.join(tmp, 'images'), transport=transport, upload_url=f"{site}/upload")
+        converter = TelegraphArticleConverter(db_path, telegraph_token='token', transport=transport,
+                                              cache=HtmlCache(os.path.join(tmp, 'cache'), ttl_seconds=0),
+                                              images=images)
+        converter.publisher.BASE_URL = site
+        try:
+            yield converter
+        finally:
+            converter.close()
+            images.close()
+
+
+def test_refresh_edits_only_changed_articles():
+    """Неизмененная страница не разбирается, изменение вне текста не вызывает editPage, правка текста - вызывает"""
+    _, pages = load_corpus()
+    original = pages['article.html']
+    with published_site(original) as converter:
+        def hashes():
+            return converter.db.reader().execute(
+                'SELECT telegraph_content_hash, telegraph_source_hash FROM articles WHERE id = 1').fetchone()
+
+        assert converter.publish_article_to_telegraph(1)['path'] == 'Page-1'
+        assert SiteAndTelegraphHandler.api_calls == ['createPage']
+        # Хэш исходного HTML записывается при публикации
+        content_hash, source_hash = hashes()
+        assert content_hash and source_hash == hashlib.sha256(original).hexdigest()
+
+        # Страница не изменилась: разбор и editPage не нужны
+        stats = converter.refresh_published_articles()
+        assert stats == {"checked": 1, "unchanged": 1, "edited": 0, "failed": 0}
+
+        # Изменился только счетчик комментариев (вне текста статьи): хэш узлов тот же
+        SiteAndTelegraphHandler.page = original.replace(b'</body>', b'<p>136 comments</p></body>')
+        assert converter.refresh_published_articles()["unchanged"] == 1
+        assert SiteAndTelegraphHandler.api_calls == ['createPage']
+        assert hashes() == (content_hash, hashlib.sha256(SiteAndTelegraphHandler.page).hexdigest())
+
+        # Статья до появления хэшей (NULL): хэши записываются без editPage
+        with converter.db.write() as conn:
+            conn.execute('UPDATE articles SET telegraph_content_hash = NULL, telegraph_source_hash = NULL')
+        assert converter.refresh_published_articles()["unchanged"] == 1
+        assert SiteAndTelegraphHandler.api_calls == ['createPage']
+        assert hashes() == (content_hash, hashlib.sha256(SiteAndTelegraphHandler.page).hexdigest())
+
+        # Правка текста статьи: страница изменяется по тому же адресу
+        body_start = original.index(b'<div class="entry-content">')
+        paragraph = original.index(b'<p>', body_start) + len(b'<p>')
+        SiteAndTelegraphHandler.page = original[:paragraph] + b'Update: corrected figures. ' + original[paragraph:]
+        stats = converter.refresh_published_articles()
+        assert stats["edited"] == 1
+        assert SiteAndTelegraphHandler.api_calls == ['createPage', 'editPage']
+        assert hashes()[0] != content_hash
+
+
+def test_image_rehosting_does_not_trigger_edit():
+    """Изображение, выгруженное только при обновлении, не меняет хэш и не вызывает editPage"""
+    _, pages = load_corpus()
+    original = pages['article.html']
+    body_start = original.index(b'<div class="entry-content">')
+    paragraph = original.index(b'<p>', body_start)
+    page = original[:paragraph] + b'<p><img src="/photo.png" alt="Chart"></p>' + original[paragraph:]
+    with published_site(page) as converter:
+        try:
+            # Выгрузка не удалась: страница ссылается на изображение на сайте
+            SiteAndTelegraphHandler.upload_fails = True
+            converter.publish_article_to_telegraph(1)
+            assert SiteAndTelegraphHandler.api_calls == ['createPage']
+            assert len(SiteAndTelegraphHandler.uploads) == 1
+
+            # HTML изменился вне текста, выгрузка теперь удалась бы: страница не изменяется,
+            # изображение не загружается
+            SiteAndTelegraphHandler.upload_fails = False
+            SiteAndTelegraphHandler.page += b'<!-- cache buster -->'
+            assert converter.refresh_published_articles()["unchanged"] == 1
+            assert SiteAndTelegraphHandler.api_calls == ['createPage']
+            assert len(SiteAndTelegraphHandler.uploads) == 1
+
+            # Хэши до их появления (NULL): записываются без загрузки изображений
+            with converter.db.write() as conn:
+                conn.execute('UPDATE articles SET telegraph_content_hash = NULL, telegraph_source_hash = NULL')
+            assert converter.refresh_published_articles()["unchanged"] == 1
+            assert len(SiteAndTelegraphHandler.uploads) == 1
+        finally:
+            SiteAndTelegraphHandler.upload_fails = False
+
+
+def test_failed_part_keeps_created_parts():
+    """Ошибка на первой части: созданные последние части сохраняются и изменяются при повторе"""
+    _, pages = load_corpus()
+    with published_site(pages['links.html']) as converter:
+        def parts():
+            url, parts_json = converter.db.reader().execute(
+                'SELECT telegraph_url, telegraph_parts FROM articles WHERE id = 1').fetchone()
+            return url, [part and part['path'] for part in json.loads(parts_json)]
+
+        # Три части создаются с конца; первая (третий запрос) не создана
+        SiteAndTelegraphHandler.failing_call = 3
+        assert converter.publish_article_to_telegraph(1) is None
+        assert SiteAndTelegraphHandler.api_calls == ['createPage'] * 3
+        assert parts() == (None, [None, 'Page-2', 'Page-1'])
+
+        # Повтор изменяет созданные части и создает только недостающую
+        SiteAndTelegraphHandler.failing_call = None
+        assert converter.publish_article_to_telegraph(1)['path'] == 'Page-6'
+        assert SiteAndTelegraphHandler.api_calls[3:] == ['editPage', 'editPage', 'createPage']
+        assert parts() == ('https://telegra.ph/Page-6', ['Page-6', 'Page-2', 'Page-1'])
+
+        # Правка прервана на второй части: новая третья часть не теряется, первая остается прежней
+        with converter.db.write() as conn:
+            conn.execute("UPDATE articles SET telegraph_parts = ? WHERE id = 1",
+                         (json.dumps([{'url': 'https://telegra.ph/Page-6', 'path': 'Page-6'},
+                                      {'url': 'https://telegra.ph/Page-2', 'path': 'Page-2'}]),))
+        SiteAndTelegraphHandler.page = pages['links.html'].replace(b'<p>', b'<p>Updated. ', 1)
+        SiteAndTelegraphHandler.failing_call = 8
+        assert converter.refresh_published_articles()["failed"] == 1
+        assert SiteAndTelegraphHandler.api_calls[6:] == ['createPage', 'editPage']
+        assert parts() == ('https://telegra.ph/Page-6', ['Page-6', 'Page-2', 'Page-7'])
+
+
+if __name__ == "__main__":
+    test_refresh_edits_only_changed_articles()
+    test_image_rehosting_does_not_trigger_edit()
+    test_failed_part_keeps_created_parts()
+    print("✅ Тест обновления статей пройден")
@@ -0,0 +1,68 @@
+"""
+Тест отпечатков SimHash и поиска почти дубликатов по полосам
+"""
+
+import os
+import tempfile
+
+from article_processor import parse_article_text
+from benchmark_suite import load_corpus
+from db import Database
+from simhash import BAND_BITS, MAX_DISTANCE, SimHashIndex, hamming_distance, simhash
+from testing_support import create_articles
+
+
+def flip(fingerprint, *positions):
+    for position in positions:
+        fingerprint ^= 1 << position
+    return fingerprint
+
+
+def test_band_lookup_finds_near_duplicates():
+    """Перепубликация с правкой находится, другая статья и отпечаток дальше порога - нет"""
+    _, pages = load_corpus()
+    article = parse_article_text(pages['article.html'])
+    # Перепубликация: другое вступление и одно измененное слово
+    words = article.split(' ')
+    words[len(words) // 2] = 'reposted'
+    repost = 'This piece first appeared at another site. ' + ' '.join(words)
+    other = parse_article_text(pages['links.html'])
+
+    original = simhash(article)
+    assert hamming_distance(original, simhash(repost)) <= MAX_DISTANCE
+    assert hamming_distance(original, simhash(other)) > MAX_DISTANCE
+    assert simhash('') is None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'articles.db')
+        create_articles(db_path, [{'id': article_id, 'title': title, 'url': f'https://example.com/{article_id}.html'}
+                                  for article_id, title in [(1, 'original'), (2, 'other'),
+                                                            (3, 'three bits in one band'),
+                                                            (4, 'one bit in each band')]])
+        database = Database(db_path)
+        try:
+            index = SimHashIndex(database)
+            index.store(1, original)
+            index.store(2, simhash(other))
+            # Три бита в одной полосе: остальные полосы совпадают точно
+            index.store(3, flip(original, 0, 1, 2))
+            # По биту в каждой из четырех полос: ни одна полоса не совпадает, расстояние 4
+            index.store(4, flip(original, *(band * BAND_BITS for band in range(4))))
+
+            matches = index.find_near_duplicates(simhash(repost))
+            assert matches[0] == (1, hamming_distance(original, simhash(repost)))
+            assert all(distance <= MAX_DISTANCE for _, distance in matches)
+            assert 2 not in [article_id for article_id, _ in matches]
+            assert index.find_near_duplicates(original, exclude_id=1) == [(3, 3)]
+            assert index.find_near_duplicates(original, max_distance=2, exclude_id=1) == []
+            # Отпечаток в верхней половине диапазона (знаковое INTEGER в SQLite) находится так же
+            high = original | (1 << 63)
+            index.store(2, high)
+            assert (2, 0) in index.find_near_duplicates(high)
+        finally:
+            database.close()
+
+
+if __name__ == "__main__":
+    test_band_lookup_finds_near_duplicates()
+    print("✅ Тест SimHash пройден")
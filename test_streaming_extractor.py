@@ -0,0 +1,42 @@
+"""
+Тест потокового извлечения текста статьи
+"""
+
+from streaming_extractor import extract_text_streaming
+
+BODY = [
+    "First paragraph of the article body text.",
+    "Second paragraph of the article body text.",
+]
+
+# После тела статьи - строчный контейнер (span.content) вне него и текст подвала
+PAGE = f'''<html><body>
+<div class="entry-content"><p>{BODY[0]}</p><p>{BODY[1]}</p></div>
+<span class="content">Copyright notice in an inline container</span>
+<div>Trailing footer text outside of any container</div>
+</body></html>'''.encode('utf-8')
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_inline_container_after_body_keeps_body():
+    """Текст строчного контейнера после тела статьи не вытесняет тело"""
+    text, truncated = extract_text_streaming(chunked(PAGE, 8192))
+    assert text == '\n'.join(BODY)
+    assert not truncated
+    # Результат не зависит от границ фрагментов
+    assert extract_text_streaming(chunked(PAGE, 7)) == (text, False)
+
+
+def test_max_bytes_truncates_stream():
+    text, truncated = extract_text_streaming(chunked(PAGE, 16), max_bytes=PAGE.index(b'<p>Second'))
+    assert truncated
+    assert text == BODY[0]
+
+
+if __name__ == "__main__":
+    test_inline_container_after_body_keeps_body()
+    test_max_bytes_truncates_stream()
+    print("✅ Тест потокового извлечения текста пройден")
@@ -0,0 +1,37 @@
+"""
+Тест краткого содержания по TextRank
+"""
+
+from summarizer import split_sentences, textrank_summary
+
+ARTICLE = (
+    "The Federal Reserve raised interest rates again on Wednesday.\n"
+    "My cat was asleep on the windowsill all afternoon.\n"
+    "Higher interest rates make mortgages and business loans more expensive.\n"
+    "Economists expect the Federal Reserve to keep rates high through next year! "
+    "Nobody knows why the parade was cancelled at the last minute. "
+    "Mortgages became expensive after the Federal Reserve decision on rates.\n"
+    "Short line.\n"
+)
+
+
+def test_textrank_summary_picks_central_sentences_in_order():
+    """В краткое содержание попадают связанные между собой предложения в исходном порядке"""
+    sentences = split_sentences(ARTICLE)
+    assert "Short line." not in sentences
+    assert len(sentences) == 6
+
+    summary = textrank_summary(ARTICLE, max_sentences=3)
+    # Предложения не по теме статьи не попадают в краткое содержание
+    assert "cat" not in summary and "parade" not in summary
+    assert summary.startswith("The Federal Reserve raised interest rates again on Wednesday. ")
+    assert summary.endswith(" Mortgages became expensive after the Federal Reserve decision on rates.")
+    # Короткий текст возвращается целиком, пустой - None
+    assert textrank_summary("Only one sentence in this short text.") == "Only one sentence in this short text."
+    assert textrank_summary("") is None
+    assert textrank_summary(None) is None
+
+
+if __name__ == "__main__":
+    test_textrank_summary_picks_central_sentences_in_order()
+    print("✅ Тест краткого содержания пройден")
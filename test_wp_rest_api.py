@@ -0,0 +1,132 @@
+"""
+Тест REST API способа обнаружения статей на локальном сервере с фикстурами WordPress
+"""
+
+import json
+import os
+import tempfile
+from urllib.parse import urlparse, parse_qs
+
+from article_monitor import NakedCapitalismMonitor, REST_FIELDS
+from testing_support import QuietHandler, fast_transport, local_server
+
+# Записи в формате /wp-json/wp/v2/posts (date - локальное время сайта, UTC-4)
+POSTS = [
+    {
+        "id": 303, "guid": {"rendered": "https://www.nakedcapitalism.com/?p=303"},
+        "date": "2026-10-16T08:00:00", "date_gmt": "2026-10-16T12:00:00",
+        "link": "https://www.nakedcapitalism.com/2026/10/water-cooler-10-16.html",
+        "title": {"rendered": "2:00PM Water Cooler 10/16/2026"}, "author": 2,
+        "content": {"rendered": "<p>Не должно попасть в ответ</p>"},
+    },
+    {
+        "id": 302, "guid": {"rendered": "https://www.nakedcapitalism.com/?p=302"},
+        "date": "2026-10-16T06:55:00", "date_gmt": "2026-10-16T10:55:00",
+        "link": "https://www.nakedcapitalism.com/2026/10/links-10-16-2026.html",
+        "title": {"rendered": "Links 10/16/2026 &#8211; Daily"}, "author": 1,
+        "content": {"rendered": "<p>Не должно попасть в ответ</p>"},
+    },
+    {
+        "id": 301, "guid": {"rendered": "https://www.nakedcapitalism.com/?p=301"},
+        "date": "2026-10-15T06:00:00", "date_gmt": "2026-10-15T10:00:00",
+        "link": "https://www.nakedcapitalism.com/2026/10/older-post.html",
+        "title": {"rendered": "Older post about the economy"}, "author": 1,
+        "content": {"rendered": "<p>Не должно попасть в ответ</p>"},
+    },
+]
+USERS = {1: "Yves Smith", 2: "Lambert Strether"}
+
+
+class WordPressFixtureHandler(QuietHandler):
+    """Минимальная имитация WordPress REST API"""
+    requests_log = []
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        self.requests_log.append((parsed.path, query))
+
+        if parsed.path == '/wp-json/':
+            return self.send_json({"name": "naked capitalism", "gmt_offset": -4})
+        if parsed.path == '/wp-json/wp/v2/users':
+            ids = [int(i) for i in query.get('include', '').split(',') if i]
+            return self.send_json([{"id": i, "name": USERS[i]} for i in ids if i in USERS])
+        if parsed.path == '/wp-json/wp/v2/posts':
+            posts = [p for p in POSTS if 'after' not in query or p['date'] > query['after']]
+            per_page = int(query.get('per_page', 10))
+            page = int(query.get('page', 1))
+            fields = query.get('_fields', '').split(',')
+            chunk = posts[(page - 1) * per_page:page * per_page]
+            body = [{k: v for k, v in p.items() if k in fields} for p in chunk]
+            total_pages = max(1, -(-len(posts) // per_page))
+            return self.send_json(body, {'X-WP-Total': str(len(posts)), 'X-WP-TotalPages': str(total_pages)})
+
+        self.send_response(404)
+        self.end_headers()
+
+    def send_json(self, data, headers=None):
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_monitor(site):
+    """Монитор с REST способом обнаружения, направленный на локальный сервер"""
+    monitor = NakedCapitalismMonitor(discovery_backend='rest', transport=fast_transport())
+    monitor.base_url = f"{site}/"
+    monitor.rest_url = monitor.base_url + "wp-json/"
+    return monitor
+
+
+def test_rest_backend_incremental_cursor():
+    """Первый опрос загружает последние записи, следующий - только записи новее курсора"""
+    cwd = os.getcwd()
+    all_posts = list(POSTS)
+    with local_server(WordPressFixtureHandler) as site, tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            monitor = make_monitor(site)
+
+            # Первый опрос: курсора нет, берется первая страница (самой новой записи еще нет)
+            del POSTS[0]
+            first = monitor.check_for_new_articles()
+            assert [a['url'] for a in first] == [p['link'] for p in POSTS]
+            assert first[0]['title'] == "Links 10/16/2026 – Daily"
+            assert first[0]['author'] == "Yves Smith"
+            assert first[0]['date_posted'] == "2026-10-16 10:55:00"
+            assert first[0]['guid'] == "https://www.nakedcapitalism.com/?p=302"
+
+            path, query = WordPressFixtureHandler.requests_log[0]
+            assert path == '/wp-json/wp/v2/posts'
+            assert query['_fields'] == REST_FIELDS
+            assert 'after' not in query
+
+            # Появилась новая запись: второй опрос запрашивает только новое
+            POSTS[:] = all_posts
+            WordPressFixtureHandler.requests_log.clear()
+            second = monitor.check_for_new_articles()
+            assert [a['url'] for a in second] == [POSTS[0]['link']]
+            assert second[0]['author'] == "Lambert Strether"
+
+            posts_queries = [q for p, q in WordPressFixtureHandler.requests_log if p == '/wp-json/wp/v2/posts']
+            # Курсор 10:55 UTC переводится в локальное время сайта (UTC-4) с часом запаса
+            assert posts_queries[0]['after'] == "2026-10-16T05:55:00"
+
+            # Третий опрос: ничего нового, имена авторов берутся из кэша
+            WordPressFixtureHandler.requests_log.clear()
+            assert monitor.check_for_new_articles() == []
+            assert all(p != '/wp-json/wp/v2/users' for p, _ in WordPressFixtureHandler.requests_log)
+            monitor.db.close()
+        finally:
+            POSTS[:] = all_posts
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    test_rest_backend_incremental_cursor()
+    print("✅ REST API тест пройден")
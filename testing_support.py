@@ -0,0 +1,79 @@
+"""
+Общие заготовки тестов: локальный HTTP-сервер, транспорт без ограничения частоты и база статей
+"""
+
+import functools
+import os
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import http_transport
+from article_monitor import NakedCapitalismMonitor
+from benchmark_suite import FIXTURES_DIR
+from db import Database
+
+
+class QuietHandler(BaseHTTPRequestHandler):
+    """Обработчик локального сервера без журнала запросов в stderr"""
+
+    def log_message(self, *args):
+        pass
+
+
+class QuietFileHandler(SimpleHTTPRequestHandler):
+    """Раздача файлов каталога без журнала запросов"""
+
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def local_server(handler):
+    """
+    Локальный сервер на свободном порту на время блока
+
+        with local_server(PageHandler) as site:
+            transport.get(f"{site}/page.html")
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def fixtures_server():
+    """Локальный сервер с файлами fixtures/"""
+    return local_server(functools.partial(QuietFileHandler, directory=FIXTURES_DIR))
+
+
+def fast_transport():
+    """Транспорт, ограничитель которого не замедляет тесты на локальном сервере"""
+    return http_transport.HttpTransport(limiter=http_transport.RateLimiter(default_limit=(1000.0, 1000)))
+
+
+def create_articles(db_path, articles=()):
+    """
+    База статей со схемой монитора (NakedCapitalismMonitor.setup_database) и записями articles
+
+    Args:
+        db_path: Путь к файлу базы
+        articles: Словари значений колонок articles (title и url обязательны)
+    """
+    database = Database(db_path)
+    cwd = os.getcwd()
+    # Журнал монитора (nakedcap_monitor.log) создается рядом с базой, а не в каталоге проекта
+    os.chdir(os.path.dirname(os.path.abspath(db_path)))
+    try:
+        NakedCapitalismMonitor(database=database)
+        with database.write() as conn:
+            for article in articles:
+                columns = ', '.join(article)
+                placeholders = ', '.join('?' for _ in article)
+                conn.execute(f'INSERT INTO articles ({columns}) VALUES ({placeholders})', tuple(article.values()))
+    finally:
+        os.chdir(cwd)
+        database.close()